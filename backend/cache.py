@@ -0,0 +1,100 @@
+from collections import OrderedDict
+from flask import current_app, request
+import functools
+import logging
+import os
+import threading
+import time
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+class LocalCache:
+    """Bounded in-process LRU cache of bytes with per-entry expiry."""
+    
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+    
+    def set(self, key: str, value: bytes, timeout: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+class RedisCache:
+    """Redis-backed cache shared by all workers; errors degrade to cache misses."""
+    
+    def __init__(self, url: str):
+        self._client = redis.Redis.from_url(url)
+    
+    def get(self, key: str):
+        try:
+            return self._client.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"Redis cache get failed for {key}: {str(e)}")
+            return None
+    
+    def set(self, key: str, value: bytes, timeout: int):
+        try:
+            self._client.set(key, value, ex=timeout)
+        except redis.RedisError as e:
+            logger.warning(f"Redis cache set failed for {key}: {str(e)}")
+    
+    def delete(self, *keys: str):
+        try:
+            self._client.delete(*keys)
+        except redis.RedisError as e:
+            logger.warning(f"Redis cache delete failed for {keys}: {str(e)}")
+
+# Shared across workers when REDIS_URL is configured, per process otherwise
+cache = RedisCache(os.environ['REDIS_URL']) if os.environ.get('REDIS_URL') else LocalCache()
+
+def cached_view(key, timeout: int):
+    """Cache a JSON view's successful body; key may be a callable returning None to skip."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            cache_key = key() if callable(key) else key
+            if cache_key:
+                body = cache.get(cache_key)
+                if body is not None:
+                    return current_app.response_class(body, mimetype='application/json')
+            
+            response = view(*args, **kwargs)
+            # Error views return (response, status) tuples and are never cached
+            if cache_key and isinstance(response, current_app.response_class) and response.status_code == 200:
+                cache.set(cache_key, response.get_data(), timeout)
+            return response
+        return wrapper
+    return decorator
+
+def first_page_key(key: str):
+    """Cache key callable for cached_view: key for the unfiltered default first page, which the dashboard polls."""
+    def page_key():
+        args = request.args
+        if any(arg not in ('page', 'per_page') for arg in args):
+            return None
+        if args.get('page', 1, type=int) != 1 or args.get('per_page', 20, type=int) != 20:
+            return None
+        return key
+    return page_key
@@ -0,0 +1,36 @@
+import logging
+from logging.config import fileConfig
+
+from alembic import context
+
+from app import app
+from models import db
+
+config = context.config
+fileConfig(config.config_file_name)
+logger = logging.getLogger('alembic.env')
+
+target_metadata = db.metadata
+
+def run_migrations_offline():
+    """Emit the migration SQL against the app's database URL without connecting."""
+    with app.app_context():
+        url = str(db.engine.url).replace('%', '%%')
+    context.configure(url=url, target_metadata=target_metadata, literal_binds=True)
+    
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    """Run the migrations on a connection from the app's engine."""
+    with app.app_context():
+        with db.engine.connect() as connection:
+            context.configure(connection=connection, target_metadata=target_metadata)
+            
+            with context.begin_transaction():
+                context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,54 @@
+"""Store backtest equity curves as bytea
+
+Revision ID: 0001_equity_curve_bytea
+Revises:
+Create Date: 2026-10-15 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_equity_curve_bytea'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _equity_curve_type():
+    """Current type of bitunix_backtests.equity_curve, or None before the table exists."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('bitunix_backtests'):
+        return None
+    for column in inspector.get_columns('bitunix_backtests'):
+        if column['name'] == 'equity_curve':
+            return column['type']
+    return None
+
+
+def upgrade():
+    # Tables made by db.create_all() after the switch already have the binary column
+    if not isinstance(_equity_curve_type(), sa.Text):
+        return
+    # Existing JSON text is kept byte for byte; EquityCurveType reads it as the legacy layout
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "ALTER TABLE bitunix_backtests ALTER COLUMN equity_curve "
+            "TYPE bytea USING convert_to(equity_curve, 'UTF8')"
+        )
+    else:
+        with op.batch_alter_table('bitunix_backtests') as batch_op:
+            batch_op.alter_column('equity_curve', type_=sa.LargeBinary(), existing_type=sa.Text())
+
+
+def downgrade():
+    # Binary curves have no text form, so they are dropped rather than mangled
+    op.execute(
+        "UPDATE bitunix_backtests SET equity_curve = NULL "
+        "WHERE substring(equity_curve from 1 for 4) = 'EQC1'::bytea"
+    )
+    op.execute(
+        "ALTER TABLE bitunix_backtests ALTER COLUMN equity_curve "
+        "TYPE text USING convert_from(equity_curve, 'UTF8')"
+    )
@@ -0,0 +1,46 @@
+"""One trade per signal: unique bitunix_trades.signal_id
+
+Revision ID: 0002_unique_trade_signal_id
+Revises: 0001_equity_curve_bytea
+Create Date: 2026-10-15 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_unique_trade_signal_id'
+down_revision = '0001_equity_curve_bytea'
+branch_labels = None
+depends_on = None
+
+# Name PostgreSQL gives the inline UNIQUE that db.create_all() emits for the column
+CONSTRAINT_NAME = 'bitunix_trades_signal_id_key'
+
+
+def _has_unique_signal_id():
+    """Whether bitunix_trades.signal_id is already covered by a unique constraint or index."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('bitunix_trades'):
+        return True  # create_all() makes the table with the constraint
+    constraints = inspector.get_unique_constraints('bitunix_trades')
+    indexes = [index for index in inspector.get_indexes('bitunix_trades') if index['unique']]
+    return any(item['column_names'] == ['signal_id'] for item in constraints + indexes)
+
+
+def upgrade():
+    if _has_unique_signal_id():
+        return
+    # Signals executed more than once keep their first trade; nothing references trade rows
+    op.execute(
+        "DELETE FROM bitunix_trades WHERE id NOT IN "
+        "(SELECT MIN(id) FROM bitunix_trades GROUP BY signal_id)"
+    )
+    with op.batch_alter_table('bitunix_trades') as batch_op:
+        batch_op.create_unique_constraint(CONSTRAINT_NAME, ['signal_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('bitunix_trades') as batch_op:
+        batch_op.drop_constraint(CONSTRAINT_NAME, type_='unique')
@@ -0,0 +1,63 @@
+"""Indexes behind the list, filter and stats queries
+
+Revision ID: 0003_list_indexes
+Revises: 0002_unique_trade_signal_id
+Create Date: 2026-10-15 00:00:00
+
+"""
+from alembic import op
+from sqlalchemy import DDL
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_list_indexes'
+down_revision = '0002_unique_trade_signal_id'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns) of the indexes declared on the models; db.create_all()
+# only makes them for new tables, existing ones get them here
+INDEXES = [
+    ('ix_bitunix_settings_vendor', 'bitunix_settings', ['vendor']),
+    ('ix_bitunix_signals_vendor_created_at', 'bitunix_signals', ['vendor', 'created_at']),
+    ('ix_bitunix_signals_created_at_id', 'bitunix_signals', ['created_at', 'id']),
+    ('ix_bitunix_trades_vendor_created_at', 'bitunix_trades', ['vendor', 'created_at']),
+    ('ix_bitunix_trades_created_at_id', 'bitunix_trades', ['created_at', 'id']),
+    ('ix_bitunix_signals_processed_created_at', 'bitunix_signals', ['processed', 'created_at']),
+    ('ix_bitunix_signals_position_type_created_at', 'bitunix_signals', ['position_type', 'created_at']),
+    ('ix_bitunix_trades_status_created_at', 'bitunix_trades', ['status', 'created_at']),
+    ('ix_bitunix_trades_position_type_created_at', 'bitunix_trades', ['position_type', 'created_at']),
+    ('ix_bitunix_backtests_created_at', 'bitunix_backtests', ['created_at']),
+    ('ix_bitunix_backtests_status_completed_at', 'bitunix_backtests', ['status', 'completed_at']),
+    ('ix_bitunix_backtests_status_total_pnl_percentage', 'bitunix_backtests', ['status', 'total_pnl_percentage']),
+    ('ix_bitunix_ai_optimizations_created_at_id', 'bitunix_ai_optimizations', ['created_at', 'id']),
+    ('ix_bitunix_ai_optimizations_applied_created_at', 'bitunix_ai_optimizations', ['applied', 'created_at']),
+]
+
+# Trigram indexes for coin ILIKE '%...%' filters; other databases get a plain index
+TRIGRAM_INDEXES = [
+    ('ix_bitunix_signals_coin_trgm', 'bitunix_signals'),
+    ('ix_bitunix_trades_coin_trgm', 'bitunix_trades'),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+    # Same guard as the models' before_create hook: pg_trgm exists only on PostgreSQL
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')(None, op.get_bind())
+    for name, table in TRIGRAM_INDEXES:
+        op.create_index(
+            name, table, ['coin'], if_not_exists=True,
+            postgresql_using='gin', postgresql_ops={'coin': 'gin_trgm_ops'}
+        )
+    # Superseded by the (created_at, id) index
+    op.drop_index('ix_bitunix_ai_optimizations_created_at', 'bitunix_ai_optimizations', if_exists=True)
+
+
+def downgrade():
+    op.create_index('ix_bitunix_ai_optimizations_created_at', 'bitunix_ai_optimizations', ['created_at'], if_not_exists=True)
+    for name, table in TRIGRAM_INDEXES:
+        op.drop_index(name, table, if_exists=True)
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table, if_exists=True)
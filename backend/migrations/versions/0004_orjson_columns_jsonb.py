@@ -0,0 +1,50 @@
+"""Store OrjsonType columns as JSONB on PostgreSQL
+
+Revision ID: 0004_orjson_columns_jsonb
+Revises: 0003_list_indexes
+Create Date: 2026-10-15 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_orjson_columns_jsonb'
+down_revision = '0003_list_indexes'
+branch_labels = None
+depends_on = None
+
+# OrjsonType columns by table; other databases keep them as TEXT
+COLUMNS = {
+    'bitunix_signals': ['entry_zones', 'targets', 'parse_errors'],
+    'bitunix_trades': ['entry_orders', 'target_prices', 'target_orders'],
+    'bitunix_backtests': ['signals_data', 'settings_snapshot', 'trade_history'],
+    'bitunix_ai_optimizations': ['recommended_settings', 'performance_after'],
+}
+
+
+def _text_columns(table, columns):
+    """The given columns of a table that are still TEXT."""
+    types = {column['name']: column['type'] for column in sa.inspect(op.get_bind()).get_columns(table)}
+    return [column for column in columns if isinstance(types.get(column), sa.Text)]
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table, columns in COLUMNS.items():
+        for column in _text_columns(table, columns):
+            # Empty strings were stored for no value and load as NULL either way
+            op.execute(
+                f"ALTER TABLE {table} ALTER COLUMN {column} "
+                f"TYPE jsonb USING NULLIF({column}, '')::jsonb"
+            )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table, columns in COLUMNS.items():
+        for column in columns:
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE text USING {column}::text")
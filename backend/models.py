@@ -1,59 +1,176 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import DDL, cast, event
+from sqlalchemy.types import TypeDecorator, UserDefinedType
 from datetime import datetime
-import json
+import numpy as np
+import orjson
 
 db = SQLAlchemy()
 
+def _compile_to_dict(fields):
+    """Build a straight-line to_dict method from (key, expression) pairs."""
+    body = ', '.join(f'{key!r}: {expr}' for key, expr in fields)
+    namespace = {}
+    exec(f'def to_dict(self):\n    return {{{body}}}', namespace)
+    return namespace['to_dict']
+
+class _JSONBText(UserDefinedType):
+    """JSONB storage whose values travel as JSON text, leaving encoding to OrjsonType."""
+    
+    cache_ok = True
+    
+    def get_col_spec(self, **kw):
+        return 'JSONB'
+
+class OrjsonType(TypeDecorator):
+    """JSON column (JSONB on PostgreSQL), encoded and decoded with orjson."""
+    
+    impl = db.Text
+    cache_ok = True
+    
+    def __init__(self, empty=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Factory for the value NULL loads as, e.g. list or dict
+        self.empty = empty
+    
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return _JSONBText()
+        return dialect.type_descriptor(db.Text())
+    
+    def column_expression(self, column):
+        # Read JSONB back as text so orjson, not the driver's json module, decodes it
+        return cast(column, db.Text)
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        # Backtest results carry numpy scalars, which orjson only accepts with this flag
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    
+    def process_result_value(self, value, dialect):
+        if value:
+            return orjson.loads(value)
+        return self.empty() if self.empty else None
+
+class EquityCurveType(TypeDecorator):
+    """Equity curve packed as binary (timestamp, balance, trade_pnl) records."""
+    
+    impl = db.LargeBinary
+    cache_ok = True
+    
+    MAGIC = b'EQC1'
+    DTYPE = np.dtype([('timestamp', '<M8[ms]'), ('balance', '<f8'), ('trade_pnl', '<f8')])
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, np.ndarray):
+            # Structured records from the backtest engine pack without a Python pass
+            return self.MAGIC + value.astype(self.DTYPE, copy=False).tobytes()
+        records = np.empty(len(value), dtype=self.DTYPE)
+        records['timestamp'] = [point['timestamp'] for point in value]
+        records['balance'] = [point['balance'] for point in value]
+        records['trade_pnl'] = [point['trade_pnl'] for point in value]
+        return self.MAGIC + records.tobytes()
+    
+    def process_result_value(self, value, dialect):
+        if not value:
+            return []
+        if not value.startswith(self.MAGIC):
+            return orjson.loads(value)  # Curve stored as JSON before the binary layout
+        records = np.frombuffer(value, dtype=self.DTYPE, offset=len(self.MAGIC))
+        timestamps = np.datetime_as_string(records['timestamp'], unit='s').tolist()
+        return [
+            {'timestamp': timestamp, 'balance': balance, 'trade_pnl': trade_pnl}
+            for timestamp, balance, trade_pnl in zip(
+                timestamps, records['balance'].tolist(), records['trade_pnl'].tolist()
+            )
+        ]
+    
+    @classmethod
+    def balances(cls, value) -> bytes:
+        """Balance column of a stored curve as packed little-endian float32."""
+        if not value:
+            return b''
+        if not value.startswith(cls.MAGIC):
+            balances = [point['balance'] for point in orjson.loads(value)]
+        else:
+            balances = np.frombuffer(value, dtype=cls.DTYPE, offset=len(cls.MAGIC))['balance']
+        return np.asarray(balances, dtype='<f4').tobytes()
+
 class BitunixSignal(db.Model):
     __tablename__ = 'bitunix_signals'
+    __table_args__ = (
+        db.Index('ix_bitunix_signals_vendor_created_at', 'vendor', 'created_at'),
+        db.Index('ix_bitunix_signals_created_at_id', 'created_at', 'id'),
+        db.Index('ix_bitunix_signals_processed_created_at', 'processed', 'created_at'),
+        db.Index('ix_bitunix_signals_position_type_created_at', 'position_type', 'created_at'),
+        # Trigram index so coin ILIKE '%...%' filters avoid a sequential scan
+        db.Index('ix_bitunix_signals_coin_trgm', 'coin',
+                 postgresql_using='gin', postgresql_ops={'coin': 'gin_trgm_ops'}),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     vendor = db.Column(db.String(50), default='bitunix', nullable=False)
-    raw_text = db.Column(db.Text, nullable=False)
+    raw_text = db.deferred(db.Column(db.Text, nullable=False))  # Loaded only where it is read
     coin = db.Column(db.String(20), nullable=False)
     pair = db.Column(db.String(20), nullable=False, default='USDT')
     position_type = db.Column(db.String(10), nullable=False)  # LONG/SHORT
     
     # Entry configuration
-    entry_zones = db.Column(db.Text)  # JSON string of entry zones
+    entry_zones = db.Column(OrjsonType(list), default=list)  # JSON list of entry zones
     leverage = db.Column(db.Integer, default=1)
     cross_leverage = db.Column(db.Boolean, default=False)
     
     # Targets and stops
-    targets = db.Column(db.Text)  # JSON string of targets
+    targets = db.Column(OrjsonType(list), default=list)  # JSON list of targets
     stop_loss = db.Column(db.Float)
     
     # Metadata
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     processed = db.Column(db.Boolean, default=False)
-    parse_errors = db.Column(db.Text)
+    parse_errors = db.Column(OrjsonType(list), default=list)  # JSON list of parse errors
     
     # Relationships
-    trades = db.relationship('BitunixTrade', backref='signal', lazy=True)
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'vendor': self.vendor,
-            'coin': self.coin,
-            'pair': self.pair,
-            'position_type': self.position_type,
-            'entry_zones': json.loads(self.entry_zones) if self.entry_zones else [],
-            'leverage': self.leverage,
-            'cross_leverage': self.cross_leverage,
-            'targets': json.loads(self.targets) if self.targets else [],
-            'stop_loss': self.stop_loss,
-            'created_at': self.created_at.isoformat(),
-            'processed': self.processed,
-            'parse_errors': self.parse_errors
-        }
+    trades = db.relationship('BitunixTrade', back_populates='signal', lazy='selectin')
+    
+    to_dict = _compile_to_dict((
+        ('id', 'self.id'),
+        ('vendor', 'self.vendor'),
+        ('coin', 'self.coin'),
+        ('pair', 'self.pair'),
+        ('position_type', 'self.position_type'),
+        ('entry_zones', 'self.entry_zones'),
+        ('leverage', 'self.leverage'),
+        ('cross_leverage', 'self.cross_leverage'),
+        ('targets', 'self.targets'),
+        ('stop_loss', 'self.stop_loss'),
+        ('created_at', 'self.created_at'),
+        ('processed', 'self.processed'),
+        ('parse_errors', 'self.parse_errors'),
+    ))
+
+# The trigram indexes need pg_trgm; other databases get a plain index on coin
+event.listen(
+    BitunixSignal.__table__, 'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+)
 
 class BitunixTrade(db.Model):
     __tablename__ = 'bitunix_trades'
+    __table_args__ = (
+        db.Index('ix_bitunix_trades_vendor_created_at', 'vendor', 'created_at'),
+        db.Index('ix_bitunix_trades_created_at_id', 'created_at', 'id'),
+        db.Index('ix_bitunix_trades_status_created_at', 'status', 'created_at'),
+        db.Index('ix_bitunix_trades_position_type_created_at', 'position_type', 'created_at'),
+        db.Index('ix_bitunix_trades_coin_trgm', 'coin',
+                 postgresql_using='gin', postgresql_ops={'coin': 'gin_trgm_ops'}),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     vendor = db.Column(db.String(50), default='bitunix', nullable=False)
-    signal_id = db.Column(db.Integer, db.ForeignKey('bitunix_signals.id'), nullable=False)
+    signal_id = db.Column(db.Integer, db.ForeignKey('bitunix_signals.id'), nullable=False, unique=True)  # One trade per signal
     
     # Trade details
     coin = db.Column(db.String(20), nullable=False)
@@ -64,17 +181,17 @@ class BitunixTrade(db.Model):
     
     # Entry details
     entry_price = db.Column(db.Float)
-    entry_orders = db.Column(db.Text)  # JSON string of order IDs
+    entry_orders = db.Column(OrjsonType(list), default=list)  # JSON list of order IDs
     entry_filled = db.Column(db.Float, default=0.0)
     
     # Exit details
-    target_prices = db.Column(db.Text)  # JSON string of target prices
-    target_orders = db.Column(db.Text)  # JSON string of target order IDs
+    target_prices = db.Column(OrjsonType(list), default=list)  # JSON list of target prices
+    target_orders = db.Column(OrjsonType(list), default=list)  # JSON list of target order IDs
     stop_loss_price = db.Column(db.Float)
     stop_loss_order_id = db.Column(db.String(100))
     
     # Status tracking
-    status = db.Column(db.String(20), default='pending')  # pending, active, partially_filled, closed, cancelled
+    status = db.Column(db.String(20), default='pending')  # pending, executing, active, partially_filled, closing, closed, cancelled
     pnl = db.Column(db.Float, default=0.0)
     pnl_percentage = db.Column(db.Float, default=0.0)
     
@@ -86,37 +203,39 @@ class BitunixTrade(db.Model):
     # Error handling
     errors = db.Column(db.Text)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'vendor': self.vendor,
-            'signal_id': self.signal_id,
-            'coin': self.coin,
-            'pair': self.pair,
-            'position_type': self.position_type,
-            'size': self.size,
-            'leverage': self.leverage,
-            'entry_price': self.entry_price,
-            'entry_orders': json.loads(self.entry_orders) if self.entry_orders else [],
-            'entry_filled': self.entry_filled,
-            'target_prices': json.loads(self.target_prices) if self.target_prices else [],
-            'target_orders': json.loads(self.target_orders) if self.target_orders else [],
-            'stop_loss_price': self.stop_loss_price,
-            'stop_loss_order_id': self.stop_loss_order_id,
-            'status': self.status,
-            'pnl': self.pnl,
-            'pnl_percentage': self.pnl_percentage,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'closed_at': self.closed_at.isoformat() if self.closed_at else None,
-            'errors': self.errors
-        }
+    # Relationships
+    signal = db.relationship('BitunixSignal', back_populates='trades')
+    
+    to_dict = _compile_to_dict((
+        ('id', 'self.id'),
+        ('vendor', 'self.vendor'),
+        ('signal_id', 'self.signal_id'),
+        ('coin', 'self.coin'),
+        ('pair', 'self.pair'),
+        ('position_type', 'self.position_type'),
+        ('size', 'self.size'),
+        ('leverage', 'self.leverage'),
+        ('entry_price', 'self.entry_price'),
+        ('entry_orders', 'self.entry_orders'),
+        ('entry_filled', 'self.entry_filled'),
+        ('target_prices', 'self.target_prices'),
+        ('target_orders', 'self.target_orders'),
+        ('stop_loss_price', 'self.stop_loss_price'),
+        ('stop_loss_order_id', 'self.stop_loss_order_id'),
+        ('status', 'self.status'),
+        ('pnl', 'self.pnl'),
+        ('pnl_percentage', 'self.pnl_percentage'),
+        ('created_at', 'self.created_at'),
+        ('updated_at', 'self.updated_at'),
+        ('closed_at', 'self.closed_at'),
+        ('errors', 'self.errors'),
+    ))
 
 class BitunixSettings(db.Model):
     __tablename__ = 'bitunix_settings'
     
     id = db.Column(db.Integer, primary_key=True)
-    vendor = db.Column(db.String(50), default='bitunix', nullable=False)
+    vendor = db.Column(db.String(50), default='bitunix', nullable=False, index=True)
     
     # API Configuration
     api_key = db.Column(db.String(255))
@@ -132,10 +251,10 @@ class BitunixSettings(db.Model):
     
     # Entry Configuration
     entry_steps = db.Column(db.Integer, default=3)
-    entry_distribution = db.Column(db.Text)  # JSON: [40, 35, 25] percentages
+    entry_distribution = db.Column(OrjsonType)  # JSON: [40, 35, 25] percentages
     
     # Exit Configuration
-    target_distribution = db.Column(db.Text)  # JSON: [50, 30, 20] percentages
+    target_distribution = db.Column(OrjsonType)  # JSON: [50, 30, 20] percentages
     auto_stop_loss = db.Column(db.Boolean, default=True)
     trailing_stop = db.Column(db.Boolean, default=False)
     trailing_stop_percentage = db.Column(db.Float, default=5.0)
@@ -158,49 +277,62 @@ class BitunixSettings(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'vendor': self.vendor,
-            'api_key': self.api_key[:8] + '...' if self.api_key else None,  # Masked for security
-            'testnet': self.testnet,
-            'default_leverage': self.default_leverage,
-            'default_position_size': self.default_position_size,
-            'max_position_size': self.max_position_size,
-            'risk_percentage': self.risk_percentage,
-            'entry_steps': self.entry_steps,
-            'entry_distribution': json.loads(self.entry_distribution) if self.entry_distribution else [40, 35, 25],
-            'target_distribution': json.loads(self.target_distribution) if self.target_distribution else [50, 30, 20],
-            'auto_stop_loss': self.auto_stop_loss,
-            'trailing_stop': self.trailing_stop,
-            'trailing_stop_percentage': self.trailing_stop_percentage,
-            'auto_trade': self.auto_trade,
-            'require_confirmation': self.require_confirmation,
-            'email_notifications': self.email_notifications,
-            'email_address': self.email_address,
-            'ai_provider': self.ai_provider,
-            'ai_model': self.ai_model,
-            'ai_enabled': self.ai_enabled,
-            'auto_optimize': self.auto_optimize,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        }
+    @property
+    def api_key_masked(self):
+        """API key prefix for display, recomputed only when the key changes."""
+        cached = self.__dict__.get('_api_key_masked')
+        if cached is None or cached[0] is not self.api_key:
+            masked = self.api_key[:8] + '...' if self.api_key else None
+            cached = self.__dict__['_api_key_masked'] = (self.api_key, masked)
+        return cached[1]
+    
+    to_dict = _compile_to_dict((
+        ('id', 'self.id'),
+        ('vendor', 'self.vendor'),
+        ('api_key', 'self.api_key_masked'),  # Masked for security
+        ('testnet', 'self.testnet'),
+        ('default_leverage', 'self.default_leverage'),
+        ('default_position_size', 'self.default_position_size'),
+        ('max_position_size', 'self.max_position_size'),
+        ('risk_percentage', 'self.risk_percentage'),
+        ('entry_steps', 'self.entry_steps'),
+        ('entry_distribution', 'self.entry_distribution or [40, 35, 25]'),
+        ('target_distribution', 'self.target_distribution or [50, 30, 20]'),
+        ('auto_stop_loss', 'self.auto_stop_loss'),
+        ('trailing_stop', 'self.trailing_stop'),
+        ('trailing_stop_percentage', 'self.trailing_stop_percentage'),
+        ('auto_trade', 'self.auto_trade'),
+        ('require_confirmation', 'self.require_confirmation'),
+        ('email_notifications', 'self.email_notifications'),
+        ('email_address', 'self.email_address'),
+        ('ai_provider', 'self.ai_provider'),
+        ('ai_model', 'self.ai_model'),
+        ('ai_enabled', 'self.ai_enabled'),
+        ('auto_optimize', 'self.auto_optimize'),
+        ('created_at', 'self.created_at'),
+        ('updated_at', 'self.updated_at'),
+    ))
 
 class BitunixBacktest(db.Model):
     __tablename__ = 'bitunix_backtests'
+    __table_args__ = (
+        db.Index('ix_bitunix_backtests_created_at', 'created_at'),
+        db.Index('ix_bitunix_backtests_status_completed_at', 'status', 'completed_at'),
+        db.Index('ix_bitunix_backtests_status_total_pnl_percentage', 'status', 'total_pnl_percentage'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     vendor = db.Column(db.String(50), default='bitunix', nullable=False)
     name = db.Column(db.String(200), nullable=False)
     
     # Backtest parameters
-    signals_data = db.Column(db.Text)  # JSON string of signals
+    signals_data = db.Column(OrjsonType(list), default=list)  # JSON signals, one list per field (older rows: list of signals)
     start_date = db.Column(db.DateTime)
     end_date = db.Column(db.DateTime)
     initial_balance = db.Column(db.Float, default=1000.0)
     
     # Configuration used
-    settings_snapshot = db.Column(db.Text)  # JSON snapshot of settings
+    settings_snapshot = db.Column(OrjsonType(dict), default=dict)  # JSON snapshot of settings
     
     # Results
     final_balance = db.Column(db.Float)
@@ -214,38 +346,91 @@ class BitunixBacktest(db.Model):
     sharpe_ratio = db.Column(db.Float)
     
     # Detailed results
-    trade_history = db.Column(db.Text)  # JSON string of all trades
-    equity_curve = db.Column(db.Text)  # JSON string of equity over time
+    trade_history = db.Column(OrjsonType(list), default=list)  # JSON list of all trades (older runs; see trades)
+    equity_curve = db.Column(EquityCurveType)  # Binary equity records over time
     
     # Metadata
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime)
     status = db.Column(db.String(20), default='pending')  # pending, running, completed, failed
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'vendor': self.vendor,
-            'name': self.name,
-            'start_date': self.start_date.isoformat() if self.start_date else None,
-            'end_date': self.end_date.isoformat() if self.end_date else None,
-            'initial_balance': self.initial_balance,
-            'final_balance': self.final_balance,
-            'total_pnl': self.total_pnl,
-            'total_pnl_percentage': self.total_pnl_percentage,
-            'total_trades': self.total_trades,
-            'winning_trades': self.winning_trades,
-            'losing_trades': self.losing_trades,
-            'win_rate': self.win_rate,
-            'max_drawdown': self.max_drawdown,
-            'sharpe_ratio': self.sharpe_ratio,
-            'created_at': self.created_at.isoformat(),
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
-            'status': self.status
-        }
+    # Relationships
+    trades = db.relationship(
+        'BitunixBacktestTrade', back_populates='backtest',
+        order_by='BitunixBacktestTrade.id', cascade='all, delete-orphan'
+    )
+    
+    to_dict = _compile_to_dict((
+        ('id', 'self.id'),
+        ('vendor', 'self.vendor'),
+        ('name', 'self.name'),
+        ('start_date', 'self.start_date'),
+        ('end_date', 'self.end_date'),
+        ('initial_balance', 'self.initial_balance'),
+        ('final_balance', 'self.final_balance'),
+        ('total_pnl', 'self.total_pnl'),
+        ('total_pnl_percentage', 'self.total_pnl_percentage'),
+        ('total_trades', 'self.total_trades'),
+        ('winning_trades', 'self.winning_trades'),
+        ('losing_trades', 'self.losing_trades'),
+        ('win_rate', 'self.win_rate'),
+        ('max_drawdown', 'self.max_drawdown'),
+        ('sharpe_ratio', 'self.sharpe_ratio'),
+        ('created_at', 'self.created_at'),
+        ('completed_at', 'self.completed_at'),
+        ('status', 'self.status'),
+    ))
+
+class BitunixBacktestTrade(db.Model):
+    __tablename__ = 'bitunix_backtest_trades'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    backtest_id = db.Column(db.Integer, db.ForeignKey('bitunix_backtests.id'), nullable=False, index=True)
+    
+    # Trade details
+    coin = db.Column(db.String(20))
+    symbol = db.Column(db.String(40))
+    position_type = db.Column(db.String(10))
+    position_size = db.Column(db.Float)
+    leverage = db.Column(db.Integer)
+    
+    # Entry and exit
+    entry_price = db.Column(db.Float)
+    exit_price = db.Column(db.Float)
+    entry_time = db.Column(db.DateTime)
+    exit_time = db.Column(db.DateTime)
+    exit_reason = db.Column(db.String(20))  # target, stop_loss, timeout
+    duration_hours = db.Column(db.Float)
+    
+    # Results
+    pnl = db.Column(db.Float)
+    pnl_percentage = db.Column(db.Float)
+    
+    # Relationships
+    backtest = db.relationship('BitunixBacktest', back_populates='trades')
+    
+    to_dict = _compile_to_dict((
+        ('coin', 'self.coin'),
+        ('symbol', 'self.symbol'),
+        ('position_type', 'self.position_type'),
+        ('entry_price', 'self.entry_price'),
+        ('exit_price', 'self.exit_price'),
+        ('entry_time', 'self.entry_time'),
+        ('exit_time', 'self.exit_time'),
+        ('position_size', 'self.position_size'),
+        ('leverage', 'self.leverage'),
+        ('pnl', 'self.pnl'),
+        ('pnl_percentage', 'self.pnl_percentage'),
+        ('exit_reason', 'self.exit_reason'),
+        ('duration_hours', 'self.duration_hours'),
+    ))
 
 class BitunixAIOptimization(db.Model):
     __tablename__ = 'bitunix_ai_optimizations'
+    __table_args__ = (
+        db.Index('ix_bitunix_ai_optimizations_created_at_id', 'created_at', 'id'),
+        db.Index('ix_bitunix_ai_optimizations_applied_created_at', 'applied', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     vendor = db.Column(db.String(50), default='bitunix', nullable=False)
@@ -261,30 +446,34 @@ class BitunixAIOptimization(db.Model):
     ai_response = db.Column(db.Text)
     
     # Recommendations
-    recommended_settings = db.Column(db.Text)  # JSON string
+    recommended_settings = db.Column(OrjsonType(dict), default=dict)  # JSON dict
     confidence_score = db.Column(db.Float)
     expected_improvement = db.Column(db.Float)
     
     # Implementation
     applied = db.Column(db.Boolean, default=False)
     applied_at = db.Column(db.DateTime)
-    performance_after = db.Column(db.Text)  # JSON string of performance metrics
+    performance_after = db.Column(OrjsonType(dict), default=dict)  # JSON dict of performance metrics
     
     # Metadata
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'vendor': self.vendor,
-            'backtest_id': self.backtest_id,
-            'optimization_type': self.optimization_type,
-            'ai_provider': self.ai_provider,
-            'ai_model': self.ai_model,
-            'recommended_settings': json.loads(self.recommended_settings) if self.recommended_settings else {},
-            'confidence_score': self.confidence_score,
-            'expected_improvement': self.expected_improvement,
-            'applied': self.applied,
-            'applied_at': self.applied_at.isoformat() if self.applied_at else None,
-            'created_at': self.created_at.isoformat()
-        }
\ No newline at end of file
+    @property
+    def recommendations(self) -> dict:
+        """Recommended settings as a dict (NULL loads as {})."""
+        return self.recommended_settings
+    
+    to_dict = _compile_to_dict((
+        ('id', 'self.id'),
+        ('vendor', 'self.vendor'),
+        ('backtest_id', 'self.backtest_id'),
+        ('optimization_type', 'self.optimization_type'),
+        ('ai_provider', 'self.ai_provider'),
+        ('ai_model', 'self.ai_model'),
+        ('recommended_settings', 'self.recommendations'),
+        ('confidence_score', 'self.confidence_score'),
+        ('expected_improvement', 'self.expected_improvement'),
+        ('applied', 'self.applied'),
+        ('applied_at', 'self.applied_at'),
+        ('created_at', 'self.created_at'),
+    ))
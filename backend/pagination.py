@@ -0,0 +1,88 @@
+from datetime import datetime
+from sqlalchemy import func, select, tuple_
+from models import db
+import math
+
+# Rows fetched per round trip when a page is streamed
+_STREAM_BATCH_SIZE = 500
+
+def parse_cursor(cursor: str):
+    """Split a '<iso timestamp>_<id>' cursor; raises ValueError if malformed."""
+    created_at, _, row_id = cursor.rpartition('_')
+    return datetime.fromisoformat(created_at), int(row_id)
+
+def keyset_page(stmt, model, cursor, per_page: int, column=None, stream: bool = False):
+    """One (column, id) keyset page of row dicts, newest first, without COUNT(*).
+    
+    column defaults to created_at; a None cursor returns the first page. With
+    stream=True the rows are a generator fetched in batches, and has_next and
+    next_cursor are filled in once it is exhausted.
+    """
+    column = model.created_at if column is None else column
+    if cursor:
+        position, row_id = parse_cursor(cursor)
+        stmt = stmt.where(tuple_(column, model.id) < tuple_(position, row_id))
+    stmt = stmt.order_by(column.desc(), model.id.desc()).limit(per_page + 1)
+    pagination = {'per_page': per_page, 'has_next': False, 'next_cursor': None}
+    if stream:
+        return _stream_keyset(stmt, column, per_page, pagination), pagination
+    
+    rows = db.session.execute(stmt).mappings().all()
+    
+    # The extra row only tells us whether another page exists
+    has_next = len(rows) > per_page
+    rows = [dict(row) for row in rows[:per_page]]
+    last = rows[-1] if has_next else None
+    pagination['has_next'] = has_next
+    pagination['next_cursor'] = f"{last[column.key].isoformat()}_{last['id']}" if last else None
+    return rows, pagination
+
+def _stream_keyset(stmt, column, per_page: int, pagination: dict):
+    """Yield a keyset page's rows in batches, recording the cursor when the extra row shows up."""
+    result = db.session.execute(stmt.execution_options(yield_per=_STREAM_BATCH_SIZE)).mappings()
+    last = None
+    try:
+        for i, row in enumerate(result):
+            if i == per_page:
+                pagination['has_next'] = True
+                pagination['next_cursor'] = f"{last[column.key].isoformat()}_{last['id']}"
+                break
+            last = row
+            yield dict(row)
+    finally:
+        result.close()
+
+def offset_page(stmt, model, page: int, per_page: int, stream: bool = False):
+    """One numbered page of row dicts, newest first, with the same fields as paginate().
+    
+    With stream=True the rows are a generator fetched in batches.
+    """
+    page = max(page, 1)
+    if per_page < 1:
+        per_page = 20
+    
+    total = db.session.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
+    pages = math.ceil(total / per_page)
+    stmt = stmt.order_by(model.created_at.desc()).offset((page - 1) * per_page).limit(per_page)
+    pagination = {
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'pages': pages,
+        'has_next': page < pages,
+        'has_prev': page > 1
+    }
+    if stream:
+        return _stream_rows(stmt), pagination
+    
+    rows = db.session.execute(stmt).mappings().all()
+    return [dict(row) for row in rows], pagination
+
+def _stream_rows(stmt):
+    """Yield a statement's rows as dicts, fetched in batches."""
+    result = db.session.execute(stmt.execution_options(yield_per=_STREAM_BATCH_SIZE)).mappings()
+    try:
+        for row in result:
+            yield dict(row)
+    finally:
+        result.close()
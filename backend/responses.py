@@ -0,0 +1,61 @@
+from flask import current_app, request, stream_with_context
+import functools
+import logging
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Backtest results carry numpy scalars; grouped stats may use non-string keys
+_DUMPS_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def dumps(payload):
+    """Encode payload to JSON bytes with the options used for responses."""
+    return orjson.dumps(payload, option=_DUMPS_OPTIONS)
+
+def json_response(payload, status=200):
+    """Build a JSON response with orjson, which also formats datetimes."""
+    return current_app.response_class(
+        dumps(payload),
+        status=status,
+        mimetype='application/json'
+    )
+
+def stream_response(rows_key: str, rows, tail):
+    """Stream {rows_key: [...rows], **tail()} one row at a time; tail is called after the rows."""
+    def generate():
+        yield b'{' + dumps(rows_key) + b':['
+        try:
+            for i, row in enumerate(rows):
+                if i:
+                    yield b','
+                yield dumps(row)
+        except Exception as e:
+            # Headers are already sent, so the client sees a truncated body
+            logger.error(f"Error streaming {rows_key}: {str(e)}")
+            raise
+        yield b']'
+        for key, value in tail().items():
+            yield b',' + dumps(key) + b':' + dumps(value)
+        yield b'}'
+    
+    return current_app.response_class(stream_with_context(generate()), mimetype='application/json')
+
+def not_modified(etag):
+    """Build an empty 304 response carrying the current ETag."""
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    return response
+
+def conditional(max_age: int):
+    """Tag a view's successful response with a body ETag, answering If-None-Match with 304."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            response = view(*args, **kwargs)
+            if isinstance(response, current_app.response_class) and response.status_code == 200:
+                response.cache_control.max_age = max_age
+                response.add_etag()
+                response.make_conditional(request)
+            return response
+        return wrapper
+    return decorator
@@ -1,63 +1,179 @@
-from flask import Blueprint, request, jsonify
-from models import BitunixAIOptimization, BitunixBacktest, BitunixSettings, db
+from flask import Blueprint, g, request
+from sqlalchemy import select, update
+from sqlalchemy.orm import defer, raiseload, selectinload
+from cache import cache, cached_view, first_page_key
+from models import BitunixAIOptimization, BitunixBacktest, BitunixSettings, OrjsonType, db
+from pagination import keyset_page, offset_page
+from responses import json_response, stream_response
 from services.ai_optimizer import AIOptimizer
-import json
+from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
 bp = Blueprint('ai', __name__, url_prefix='/api/ai')
 
+def _coerce_int(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError('expected an integer')
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError('expected a whole number')
+    return int(value)
+
+def _coerce_float(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError('expected a number')
+    return float(value)
+
+def _coerce_bool(value):
+    if not isinstance(value, bool):
+        raise TypeError('expected a boolean')
+    return value
+
+def _coerce_list(value):
+    if not isinstance(value, list):
+        raise TypeError('expected a list')
+    return value
+
+def _coerce_str(value):
+    if not isinstance(value, str):
+        raise TypeError('expected a string')
+    return value
+
+def _settings_coercer(column):
+    """Pick the value coercer for a settings column from its type."""
+    if isinstance(column.type, OrjsonType):
+        return _coerce_list
+    return {
+        int: _coerce_int,
+        float: _coerce_float,
+        bool: _coerce_bool,
+        str: _coerce_str
+    }[column.type.python_type]
+
+# Settings columns an optimization is allowed to overwrite, with their coercers.
+# Built once at import; credentials and bookkeeping columns are never writable.
+_SETTINGS_COERCERS = {
+    c.name: _settings_coercer(c)
+    for c in BitunixSettings.__table__.columns
+    if c.name not in {
+        'id', 'vendor', 'api_key', 'api_secret', 'api_passphrase',
+        'created_at', 'updated_at'
+    }
+}
+
+def get_bitunix_settings():
+    """Get the Bitunix settings row, loaded at most once per request."""
+    if 'bitunix_settings' not in g:
+        g.bitunix_settings = BitunixSettings.query.filter_by(vendor='bitunix').first()
+    return g.bitunix_settings
+
+# Cached views, dropped whenever optimizations are created or applied
+_CACHED_VIEW_KEYS = ('ai:stats', 'ai:optimizations:first_page')
+_first_page_key = first_page_key('ai:optimizations:first_page')
+
+# Columns of BitunixAIOptimization.to_dict(), selected as plain rows for lists
+_OPTIMIZATION_LIST_COLUMNS = (
+    BitunixAIOptimization.id,
+    BitunixAIOptimization.vendor,
+    BitunixAIOptimization.backtest_id,
+    BitunixAIOptimization.optimization_type,
+    BitunixAIOptimization.ai_provider,
+    BitunixAIOptimization.ai_model,
+    BitunixAIOptimization.recommended_settings,
+    BitunixAIOptimization.confidence_score,
+    BitunixAIOptimization.expected_improvement,
+    BitunixAIOptimization.applied,
+    BitunixAIOptimization.applied_at,
+    BitunixAIOptimization.created_at
+)
+
 @bp.route('/optimizations', methods=['GET'])
+@cached_view(_first_page_key, 10)
 def get_optimizations():
     """Get all AI optimizations with pagination."""
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        if per_page < 1:
+            per_page = 20
         
-        optimizations = BitunixAIOptimization.query.order_by(
-            BitunixAIOptimization.created_at.desc()
-        ).paginate(page=page, per_page=per_page, error_out=False)
-        
-        return jsonify({
-            'optimizations': [opt.to_dict() for opt in optimizations.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': optimizations.total,
-                'pages': optimizations.pages,
-                'has_next': optimizations.has_next,
-                'has_prev': optimizations.has_prev
-            }
-        })
+        stmt = select(*_OPTIMIZATION_LIST_COLUMNS)
+        
+        # ?cursor=<created_at>_<id> seeks on the (created_at, id) index and skips COUNT(*)
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                optimizations, pagination = keyset_page(stmt, BitunixAIOptimization, cursor, per_page, stream=True)
+            except ValueError:
+                return json_response({'error': 'Invalid cursor'}), 400
+            # A keyset cursor is only known after the last row
+            return stream_response('optimizations', optimizations, lambda: {'pagination': pagination})
+        
+        # The cached first page is built whole; cached_view stores its body
+        if _first_page_key():
+            optimizations, pagination = offset_page(stmt, BitunixAIOptimization, page, per_page)
+            return json_response({'optimizations': optimizations, 'pagination': pagination})
+        
+        optimizations, pagination = offset_page(stmt, BitunixAIOptimization, page, per_page, stream=True)
+        return stream_response('optimizations', optimizations, lambda: {'pagination': pagination})
         
     except Exception as e:
         logger.error(f"Error fetching AI optimizations: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}), 500
 
 @bp.route('/optimizations/<int:optimization_id>', methods=['GET'])
 def get_optimization(optimization_id):
     """Get a specific AI optimization by ID."""
     try:
         optimization = BitunixAIOptimization.query.get_or_404(optimization_id)
-        return jsonify(optimization.to_dict())
+        return json_response(optimization.to_dict())
     except Exception as e:
         logger.error(f"Error fetching AI optimization {optimization_id}: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}), 500
+
+# Backtests analyzed per batch request; each analysis needs a few hundred output tokens
+_MAX_BATCH_ANALYSES = 10
+
+def _analysis_input(backtest):
+    """Backtest data in the shape the AI analysis prompt expects."""
+    return {
+        'results': backtest.to_dict(),
+        'trade_history': backtest.trade_history or [trade.to_dict() for trade in backtest.trades],
+        'settings_used': backtest.settings_snapshot
+    }
+
+def _optimization_record(backtest_id, optimization_type, settings, analysis_result):
+    """Optimization row for a successful analysis of a backtest."""
+    return BitunixAIOptimization(
+        backtest_id=backtest_id,
+        optimization_type=optimization_type,
+        ai_provider=settings.ai_provider,
+        ai_model=settings.ai_model,
+        analysis_prompt=analysis_result['prompt'],
+        ai_response=analysis_result['response'],
+        recommended_settings=analysis_result['recommendations'],
+        confidence_score=analysis_result.get('confidence_score', 0.5),
+        expected_improvement=analysis_result.get('expected_improvement', 0)
+    )
 
 @bp.route('/analyze-backtest/<int:backtest_id>', methods=['POST'])
 def analyze_backtest(backtest_id):
     """Analyze a backtest with AI and provide optimization recommendations."""
     try:
-        backtest = BitunixBacktest.query.get_or_404(backtest_id)
+        # The raw signals and equity curve are not part of the analysis
+        backtest = BitunixBacktest.query.options(
+            defer(BitunixBacktest.signals_data),
+            defer(BitunixBacktest.equity_curve)
+        ).get_or_404(backtest_id)
         
         if backtest.status != 'completed':
-            return jsonify({'error': 'Backtest must be completed for analysis'}), 400
+            return json_response({'error': 'Backtest must be completed for analysis'}), 400
         
         # Get current settings
-        settings = BitunixSettings.query.filter_by(vendor='bitunix').first()
+        settings = get_bitunix_settings()
         if not settings or not settings.ai_enabled:
-            return jsonify({'error': 'AI analysis not enabled in settings'}), 400
+            return json_response({'error': 'AI analysis not enabled in settings'}), 400
         
         # Get optimization type from request
         data = request.get_json() or {}
@@ -69,47 +185,98 @@ def analyze_backtest(backtest_id):
             model=settings.ai_model
         )
         
-        # Prepare backtest data for analysis
-        backtest_data = {
-            'results': backtest.to_dict(),
-            'trade_history': json.loads(backtest.trade_history) if backtest.trade_history else [],
-            'settings_used': json.loads(backtest.settings_snapshot) if backtest.settings_snapshot else {}
-        }
-        
         # Run AI analysis
-        analysis_result = optimizer.analyze_performance(backtest_data, optimization_type)
+        analysis_result = optimizer.analyze_performance(_analysis_input(backtest), optimization_type)
         
         if analysis_result['success']:
             # Create optimization record
-            optimization = BitunixAIOptimization(
-                backtest_id=backtest_id,
-                optimization_type=optimization_type,
-                ai_provider=settings.ai_provider,
-                ai_model=settings.ai_model,
-                analysis_prompt=analysis_result['prompt'],
-                ai_response=analysis_result['response'],
-                recommended_settings=json.dumps(analysis_result['recommendations']),
-                confidence_score=analysis_result.get('confidence_score', 0.5),
-                expected_improvement=analysis_result.get('expected_improvement', 0)
-            )
+            optimization = _optimization_record(backtest_id, optimization_type, settings, analysis_result)
             
             db.session.add(optimization)
             db.session.commit()
+            cache.delete(*_CACHED_VIEW_KEYS)
             
-            return jsonify({
+            return json_response({
                 'success': True,
                 'optimization': optimization.to_dict(),
                 'analysis': analysis_result
             })
         else:
-            return jsonify({
+            return json_response({
                 'success': False,
                 'error': analysis_result.get('error', 'AI analysis failed')
             }), 500
             
     except Exception as e:
         logger.error(f"Error analyzing backtest {backtest_id}: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}), 500
+
+@bp.route('/analyze-backtests', methods=['POST'])
+def analyze_backtests():
+    """Analyze several completed backtests with a single AI request."""
+    try:
+        data = request.get_json() or {}
+        backtest_ids = data.get('backtest_ids')
+        if (not isinstance(backtest_ids, list) or not backtest_ids
+                or not all(isinstance(i, int) and not isinstance(i, bool) for i in backtest_ids)):
+            return json_response({'error': 'backtest_ids must be a non-empty list of ids'}), 400
+        backtest_ids = list(dict.fromkeys(backtest_ids))
+        if len(backtest_ids) > _MAX_BATCH_ANALYSES:
+            return json_response({'error': f'At most {_MAX_BATCH_ANALYSES} backtests per request'}), 400
+        
+        settings = get_bitunix_settings()
+        if not settings or not settings.ai_enabled:
+            return json_response({'error': 'AI analysis not enabled in settings'}), 400
+        
+        optimization_type = data.get('type', 'parameters')  # parameters, strategy, risk_management
+        
+        backtests = {
+            backtest.id: backtest
+            for backtest in BitunixBacktest.query.options(
+                defer(BitunixBacktest.signals_data),
+                defer(BitunixBacktest.equity_curve),
+                selectinload(BitunixBacktest.trades)
+            ).filter(
+                BitunixBacktest.id.in_(backtest_ids),
+                BitunixBacktest.status == 'completed'
+            )
+        }
+        missing = [backtest_id for backtest_id in backtest_ids if backtest_id not in backtests]
+        if missing:
+            return json_response({'error': f'Backtests not found or not completed: {missing}'}), 400
+        
+        optimizer = AIOptimizer(
+            provider=settings.ai_provider,
+            model=settings.ai_model
+        )
+        results = optimizer.analyze_performance_batch(
+            [_analysis_input(backtests[backtest_id]) for backtest_id in backtest_ids], optimization_type
+        )
+        
+        # One optimization record per backtest the model answered for
+        optimizations = [
+            _optimization_record(backtest_id, optimization_type, settings, result)
+            for backtest_id, result in zip(backtest_ids, results)
+            if result['success']
+        ]
+        if optimizations:
+            db.session.add_all(optimizations)
+            db.session.commit()
+            cache.delete(*_CACHED_VIEW_KEYS)
+        
+        return json_response({
+            'success': bool(optimizations),
+            'optimizations': [optimization.to_dict() for optimization in optimizations],
+            'analyses': [
+                {'backtest_id': backtest_id, **result}
+                for backtest_id, result in zip(backtest_ids, results)
+            ]
+        })
+        
+    except Exception as e:
+        logger.error(f"Error analyzing backtests: {str(e)}")
+        db.session.rollback()
+        return json_response({'error': str(e)}), 500
 
 @bp.route('/optimize-settings', methods=['POST'])
 def optimize_settings():
@@ -118,17 +285,26 @@ def optimize_settings():
         data = request.get_json() or {}
         
         # Get current settings
-        settings = BitunixSettings.query.filter_by(vendor='bitunix').first()
+        settings = get_bitunix_settings()
         if not settings or not settings.ai_enabled:
-            return jsonify({'error': 'AI optimization not enabled in settings'}), 400
-        
-        # Get recent backtests for analysis
-        recent_backtests = BitunixBacktest.query.filter_by(
-            status='completed'
-        ).order_by(BitunixBacktest.completed_at.desc()).limit(5).all()
+            return json_response({'error': 'AI optimization not enabled in settings'}), 400
+        
+        # Get recent backtests for analysis; only the metrics the prompt uses
+        recent_backtests = db.session.execute(
+            select(
+                BitunixBacktest.id,
+                BitunixBacktest.total_pnl_percentage,
+                BitunixBacktest.win_rate,
+                BitunixBacktest.max_drawdown,
+                BitunixBacktest.settings_snapshot
+            )
+            .filter_by(status='completed')
+            .order_by(BitunixBacktest.completed_at.desc())
+            .limit(5)
+        ).all()
         
         if not recent_backtests:
-            return jsonify({'error': 'No completed backtests found for optimization'}), 400
+            return json_response({'error': 'No completed backtests found for optimization'}), 400
         
         # Initialize AI optimizer
         optimizer = AIOptimizer(
@@ -137,12 +313,18 @@ def optimize_settings():
         )
         
         # Prepare data for optimization
-        performance_data = []
-        for backtest in recent_backtests:
-            performance_data.append({
-                'results': backtest.to_dict(),
-                'settings': json.loads(backtest.settings_snapshot) if backtest.settings_snapshot else {}
-            })
+        performance_data = [
+            {
+                'results': {
+                    'id': backtest.id,
+                    'total_pnl_percentage': backtest.total_pnl_percentage,
+                    'win_rate': backtest.win_rate,
+                    'max_drawdown': backtest.max_drawdown
+                },
+                'settings': backtest.settings_snapshot
+            }
+            for backtest in recent_backtests
+        ]
         
         # Run optimization
         optimization_result = optimizer.optimize_settings(
@@ -159,29 +341,30 @@ def optimize_settings():
                 ai_model=settings.ai_model,
                 analysis_prompt=optimization_result['prompt'],
                 ai_response=optimization_result['response'],
-                recommended_settings=json.dumps(optimization_result['recommendations']),
+                recommended_settings=optimization_result['recommendations'],
                 confidence_score=optimization_result.get('confidence_score', 0.5),
                 expected_improvement=optimization_result.get('expected_improvement', 0)
             )
             
             db.session.add(optimization)
             db.session.commit()
+            cache.delete(*_CACHED_VIEW_KEYS)
             
-            return jsonify({
+            return json_response({
                 'success': True,
                 'optimization': optimization.to_dict(),
                 'recommendations': optimization_result['recommendations'],
                 'apply_url': f'/api/ai/optimizations/{optimization.id}/apply'
             })
         else:
-            return jsonify({
+            return json_response({
                 'success': False,
                 'error': optimization_result.get('error', 'AI optimization failed')
             }), 500
             
     except Exception as e:
         logger.error(f"Error optimizing settings: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}), 500
 
 @bp.route('/optimizations/<int:optimization_id>/apply', methods=['POST'])
 def apply_optimization(optimization_id):
@@ -190,60 +373,69 @@ def apply_optimization(optimization_id):
         optimization = BitunixAIOptimization.query.get_or_404(optimization_id)
         
         if optimization.applied:
-            return jsonify({'error': 'Optimization already applied'}), 400
+            return json_response({'error': 'Optimization already applied'}), 400
         
         # Get current settings
-        settings = BitunixSettings.query.filter_by(vendor='bitunix').first()
+        settings = get_bitunix_settings()
         if not settings:
-            return jsonify({'error': 'No settings found'}), 400
-        
-        # Parse recommendations
-        recommendations = json.loads(optimization.recommended_settings)
+            return json_response({'error': 'No settings found'}), 400
         
-        # Apply recommendations to settings
+        # Validate and normalize recommended values; old values come from the loaded row
+        values = {}
         applied_changes = []
-        for key, value in recommendations.items():
-            if hasattr(settings, key):
-                old_value = getattr(settings, key)
-                
-                # Handle JSON fields
-                if key in ['entry_distribution', 'target_distribution']:
-                    setattr(settings, key, json.dumps(value))
-                else:
-                    setattr(settings, key, value)
-                
+        rejected_changes = []
+        for key, value in optimization.recommendations.items():
+            coerce = _SETTINGS_COERCERS.get(key)
+            if coerce:
+                try:
+                    value = coerce(value)
+                except (TypeError, ValueError) as e:
+                    # Values of the wrong type are skipped and reported, never converted
+                    rejected_changes.append({'field': key, 'value': value, 'error': str(e)})
+                    continue
+                values[key] = value
                 applied_changes.append({
                     'field': key,
-                    'old_value': old_value,
+                    'old_value': getattr(settings, key),
                     'new_value': value
                 })
         
+        # Apply all recommendations with a single UPDATE
+        if values:
+            db.session.execute(
+                update(BitunixSettings)
+                .where(BitunixSettings.id == settings.id)
+                .values(**values)
+            )
+        
         # Mark optimization as applied
         optimization.applied = True
-        optimization.applied_at = db.func.now()
+        optimization.applied_at = datetime.utcnow()
         
         db.session.commit()
+        cache.delete(*_CACHED_VIEW_KEYS)
         
-        return jsonify({
+        return json_response({
             'success': True,
             'message': 'Optimization applied successfully',
             'applied_changes': applied_changes,
+            'rejected_changes': rejected_changes,
             'updated_settings': settings.to_dict()
         })
         
     except Exception as e:
         logger.error(f"Error applying optimization {optimization_id}: {str(e)}")
         db.session.rollback()
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}), 500
 
 @bp.route('/suggestions', methods=['GET'])
 def get_ai_suggestions():
     """Get AI suggestions for improving trading performance."""
     try:
         # Get current settings
-        settings = BitunixSettings.query.filter_by(vendor='bitunix').first()
+        settings = get_bitunix_settings()
         if not settings or not settings.ai_enabled:
-            return jsonify({'error': 'AI suggestions not enabled in settings'}), 400
+            return json_response({'error': 'AI suggestions not enabled in settings'}), 400
         
         # Get recent performance data
         recent_backtests = BitunixBacktest.query.filter_by(
@@ -263,21 +455,21 @@ def get_ai_suggestions():
         )
         
         if suggestions_result['success']:
-            return jsonify({
+            return json_response({
                 'success': True,
                 'suggestions': suggestions_result['suggestions'],
                 'confidence': suggestions_result.get('confidence', 0.5),
                 'generated_at': suggestions_result.get('timestamp')
             })
         else:
-            return jsonify({
+            return json_response({
                 'success': False,
                 'error': suggestions_result.get('error', 'Failed to generate suggestions')
             }), 500
             
     except Exception as e:
         logger.error(f"Error getting AI suggestions: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}), 500
 
 @bp.route('/market-analysis', methods=['POST'])
 def analyze_market_conditions():
@@ -287,9 +479,9 @@ def analyze_market_conditions():
         coins = data.get('coins', ['BTC', 'ETH', 'SOL'])
         
         # Get current settings
-        settings = BitunixSettings.query.filter_by(vendor='bitunix').first()
+        settings = get_bitunix_settings()
         if not settings or not settings.ai_enabled:
-            return jsonify({'error': 'AI market analysis not enabled in settings'}), 400
+            return json_response({'error': 'AI market analysis not enabled in settings'}), 400
         
         # Initialize AI optimizer
         optimizer = AIOptimizer(
@@ -301,7 +493,7 @@ def analyze_market_conditions():
         analysis_result = optimizer.analyze_market_conditions(coins)
         
         if analysis_result['success']:
-            return jsonify({
+            return json_response({
                 'success': True,
                 'analysis': analysis_result['analysis'],
                 'recommendations': analysis_result.get('recommendations', []),
@@ -309,21 +501,29 @@ def analyze_market_conditions():
                 'timestamp': analysis_result.get('timestamp')
             })
         else:
-            return jsonify({
+            return json_response({
                 'success': False,
                 'error': analysis_result.get('error', 'Market analysis failed')
             }), 500
             
     except Exception as e:
         logger.error(f"Error analyzing market conditions: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}), 500
 
 @bp.route('/stats', methods=['GET'])
+@cached_view('ai:stats', 10)
 def get_ai_stats():
     """Get AI optimization statistics."""
     try:
-        total_optimizations = BitunixAIOptimization.query.count()
-        applied_optimizations = BitunixAIOptimization.query.filter_by(applied=True).count()
+        # Totals and average confidence in a single pass
+        totals = db.session.query(
+            db.func.count(BitunixAIOptimization.id),
+            db.func.sum(db.case((BitunixAIOptimization.applied == True, 1), else_=0)),
+            db.func.avg(BitunixAIOptimization.confidence_score)
+        ).one()
+        total_optimizations = totals[0]
+        applied_optimizations = int(totals[1] or 0)
+        avg_confidence = totals[2] or 0
         
         # Count by optimization type
         type_stats = db.session.query(
@@ -331,17 +531,14 @@ def get_ai_stats():
             db.func.count(BitunixAIOptimization.id).label('count')
         ).group_by(BitunixAIOptimization.optimization_type).all()
         
-        # Average confidence score
-        avg_confidence = db.session.query(
-            db.func.avg(BitunixAIOptimization.confidence_score)
-        ).scalar() or 0
-        
         # Recent optimizations
-        recent_optimizations = BitunixAIOptimization.query.order_by(
+        recent_optimizations = BitunixAIOptimization.query.options(
+            raiseload('*')
+        ).order_by(
             BitunixAIOptimization.created_at.desc()
         ).limit(5).all()
         
-        return jsonify({
+        return json_response({
             'total_optimizations': total_optimizations,
             'applied_optimizations': applied_optimizations,
             'pending_optimizations': total_optimizations - applied_optimizations,
@@ -355,4 +552,4 @@ def get_ai_stats():
         
     except Exception as e:
         logger.error(f"Error fetching AI stats: {str(e)}")
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return json_response({'error': str(e)}), 500
\ No newline at end of file
@@ -1,15 +1,238 @@
-from flask import Blueprint, request, jsonify
-from models import BitunixBacktest, BitunixSettings, db
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from sqlalchemy import cast, insert, select, type_coerce, update
+from sqlalchemy.orm import defer
+from cache import cache
+from models import BitunixBacktest, BitunixBacktestTrade, BitunixSettings, EquityCurveType, db
+from responses import dumps, json_response, not_modified
 from services.telegram_parser import TelegramSignalParser
-from services.backtest_engine import BacktestEngine
-import json
+from services.backtest_engine import BacktestEngine, signals_to_columns
+import hashlib
 import logging
+import numpy as np
+import orjson
+import threading
+import time
+import uuid
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
 bp = Blueprint('backtest', __name__, url_prefix='/api/backtest')
 
+# Input and result blobs that to_dict() never reads; skipped for summary views
+_SUMMARY_OPTIONS = (
+    defer(BitunixBacktest.signals_data),
+    defer(BitunixBacktest.settings_snapshot),
+    defer(BitunixBacktest.trade_history),
+    defer(BitunixBacktest.equity_curve)
+)
+
+# Completed backtests never change, so their detail bodies are cached for long
+_DETAIL_CACHE_TIMEOUT = 3600  # seconds
+
+# Background job state lives in the shared cache, so any worker can stream it; a
+# running job's record expires unless its heartbeat keeps refreshing it
+_JOB_KEY = 'backtest_job:{}'
+_JOB_TTL = 30  # seconds
+_JOB_HEARTBEAT = 10
+_JOB_RETENTION = 300  # seconds a finished job's final message is kept
+_SWEEP_RETENTION = 3600  # sweep results exist only there, so they are kept longer
+
+# Seconds between cache polls and between SSE heartbeats of a progress stream
+_PROGRESS_POLL = 0.5
+_PROGRESS_HEARTBEAT = 15
+
+class _Job:
+    """A background job's latest message in the shared cache, refreshed while it runs."""
+    
+    def __init__(self, job_id, retention, **info):
+        self.key = _JOB_KEY.format(job_id)
+        self.retention = retention
+        # Sent with every message, e.g. the job kind and its backtest id
+        self.info = info
+        self.body = None
+        self.finished = threading.Event()
+        self._lock = threading.Lock()
+    
+    def publish(self, message):
+        finished = message['type'] in ('done', 'error')
+        with self._lock:
+            if self.finished.is_set():
+                return
+            self.body = dumps({**message, **self.info})
+            cache.set(self.key, self.body, self.retention if finished else _JOB_TTL)
+            if finished:
+                self.finished.set()
+    
+    def progress(self, pct, stage):
+        self.publish({'type': 'progress', 'pct': pct, 'stage': stage})
+    
+    def keep_alive(self):
+        while not self.finished.wait(_JOB_HEARTBEAT):
+            with self._lock:
+                if not self.finished.is_set():
+                    cache.set(self.key, self.body, _JOB_TTL)
+
+def _run_job(app, target, args, job):
+    """Run a job's target, making sure the job ends with a final message."""
+    try:
+        target(app, *args, job)
+    except Exception as e:
+        logger.error(f"Error in backtest job {job.key}: {str(e)}")
+        job.publish({'type': 'error', 'error': str(e)})
+    finally:
+        job.publish({'type': 'error', 'error': 'Job ended without a result'})
+
+def _start_job(target, *args, retention=_JOB_RETENTION, **info):
+    """Run target(app, *args, job) in a background thread and return the job id."""
+    job_id = uuid.uuid4().hex
+    job = _Job(job_id, retention, **info)
+    job.progress(0, 'Queued')
+    
+    threading.Thread(target=job.keep_alive, daemon=True).start()
+    threading.Thread(
+        target=_run_job,
+        args=(current_app._get_current_object(), target, args, job),
+        daemon=True
+    ).start()
+    return job_id
+
+def _execute_backtest(app, backtest_id, job):
+    """Run a backtest in a worker thread, publishing progress to its job."""
+    with app.app_context():
+        backtest = None
+        try:
+            backtest = db.session.get(BitunixBacktest, backtest_id)
+            if backtest is None:
+                job.publish({'type': 'error', 'error': 'Backtest not found'})
+                return
+            
+            inputs = {
+                'signals': backtest.signals_data,
+                'settings': backtest.settings_snapshot,
+                'initial_balance': backtest.initial_balance,
+                'start_date': backtest.start_date,
+                'end_date': backtest.end_date
+            }
+            
+            # End the read transaction so no connection is held while the engine runs
+            db.session.commit()
+            
+            engine = BacktestEngine()
+            results = engine.run_backtest(**inputs, progress_cb=job.progress)
+            
+            # Update backtest with results
+            backtest.final_balance = results['final_balance']
+            backtest.total_pnl = results['total_pnl']
+            backtest.total_pnl_percentage = results['total_pnl_percentage']
+            backtest.total_trades = results['total_trades']
+            backtest.winning_trades = results['winning_trades']
+            backtest.losing_trades = results['losing_trades']
+            backtest.win_rate = results['win_rate']
+            backtest.max_drawdown = results['max_drawdown']
+            backtest.sharpe_ratio = results.get('sharpe_ratio')
+            # The engine's structured records pack directly; the dict list goes to the client
+            backtest.equity_curve = results.pop('equity_records')
+            backtest.completed_at = datetime.utcnow()
+            backtest.status = 'completed'
+            
+            # Trades go to their own table in one executemany INSERT
+            if results['trade_history']:
+                db.session.execute(insert(BitunixBacktestTrade), [
+                    {
+                        **trade,
+                        'backtest_id': backtest_id,
+                        'entry_time': datetime.fromisoformat(trade['entry_time']),
+                        'exit_time': datetime.fromisoformat(trade['exit_time'])
+                    }
+                    for trade in results['trade_history']
+                ])
+            
+            db.session.commit()
+            
+            job.publish({
+                'type': 'done',
+                'backtest': backtest.to_dict(),
+                'results': results
+            })
+            
+        except Exception as e:
+            logger.error(f"Error running backtest {backtest_id}: {str(e)}")
+            db.session.rollback()
+            # By id, so a row deleted meanwhile is simply not updated
+            _fail_backtest(backtest_id)
+            job.publish({'type': 'error', 'error': str(e)})
+
+def _fail_backtest(backtest_id):
+    """Mark a running backtest failed."""
+    db.session.execute(
+        update(BitunixBacktest)
+        .where(BitunixBacktest.id == backtest_id, BitunixBacktest.status == 'running')
+        .values(status='failed')
+    )
+    db.session.commit()
+
+def _execute_sweep(app, backtest_id, param_grid, job):
+    """Run a settings sweep in a worker thread, publishing progress to its job."""
+    with app.app_context():
+        try:
+            backtest = db.session.get(BitunixBacktest, backtest_id)
+            if backtest is None:
+                job.publish({'type': 'error', 'error': 'Backtest not found'})
+                return
+            
+            # Each row overrides the backtest's own settings
+            base_settings = backtest.settings_snapshot or {}
+            inputs = {
+                'signals': backtest.signals_data,
+                'param_grid': [{**base_settings, **params} for params in param_grid],
+                'initial_balance': backtest.initial_balance,
+                'start_date': backtest.start_date,
+                'end_date': backtest.end_date
+            }
+            
+            # End the read transaction so no connection is held while the engine runs
+            db.session.commit()
+            
+            results = BacktestEngine().run_sweep(**inputs, progress_cb=job.progress)
+            
+            job.publish({'type': 'done', 'results': results})
+            
+        except Exception as e:
+            logger.error(f"Error running sweep for backtest {backtest_id}: {str(e)}")
+            db.session.rollback()
+            job.publish({'type': 'error', 'error': str(e)})
+
+def _stream_progress(key, body):
+    """Yield a job's messages as Server-Sent Events, polling the shared cache until it finishes."""
+    sent, sent_at = None, time.monotonic()
+    while True:
+        if body is None:
+            # The record expired: the worker running the job stopped refreshing it
+            last = orjson.loads(sent)
+            message = {
+                'type': 'error',
+                'error': 'Job was lost when its worker stopped',
+                'kind': last['kind'],
+                'backtest_id': last['backtest_id']
+            }
+            if message['kind'] == 'run':
+                _fail_backtest(message['backtest_id'])
+            yield b'data: ' + dumps(message) + b'\n\n'
+            return
+        
+        if body != sent:
+            sent, sent_at = body, time.monotonic()
+            yield b'data: ' + body + b'\n\n'
+            if orjson.loads(body)['type'] in ('done', 'error'):
+                return
+        elif time.monotonic() - sent_at >= _PROGRESS_HEARTBEAT:
+            sent_at = time.monotonic()
+            yield b':\n\n'
+        
+        time.sleep(_PROGRESS_POLL)
+        body = cache.get(key)
+
 @bp.route('/', methods=['GET'])
 def get_backtests():
     """Get all backtests with pagination."""
@@ -17,11 +240,11 @@ def get_backtests():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         
-        backtests = BitunixBacktest.query.order_by(
+        backtests = BitunixBacktest.query.options(*_SUMMARY_OPTIONS).order_by(
             BitunixBacktest.created_at.desc()
         ).paginate(page=page, per_page=per_page, error_out=False)
         
-        return jsonify({
+        return json_response({
             'backtests': [backtest.to_dict() for backtest in backtests.items],
             'pagination': {
                 'page': page,
@@ -41,21 +264,91 @@ def get_backtests():
 def get_backtest(backtest_id):
     """Get a specific backtest by ID."""
     try:
-        backtest = BitunixBacktest.query.get_or_404(backtest_id)
-        backtest_dict = backtest.to_dict()
+        # Only the full (unpaged) body is cached
+        cache_key = None if 'trades_page' in request.args else f'backtest:{backtest_id}'
+        if cache_key:
+            body = cache.get(cache_key)
+            if body is not None:
+                return Response(body, mimetype='application/json')
+        
+        # Trade history comes back as its stored JSON text, never decoded here
+        row = db.session.execute(
+            select(
+                BitunixBacktest,
+                cast(BitunixBacktest.trade_history, db.Text),
+                BitunixBacktest.equity_curve
+            ).options(*_SUMMARY_OPTIONS).where(BitunixBacktest.id == backtest_id)
+        ).first()
+        if row is None:
+            return jsonify({'error': 'Backtest not found'}), 404
+        backtest, trade_history, equity_curve = row
+        
+        # Include detailed results if available, spliced into the encoded summary
+        body = dumps(backtest.to_dict())
+        if trade_history and trade_history != '[]':
+            # Runs from before the trades table keep their history as a JSON blob
+            body = body[:-1] + b',"trade_history":' + trade_history.encode() + b'}'
+        else:
+            trades_query = BitunixBacktestTrade.query.filter_by(
+                backtest_id=backtest_id
+            ).order_by(BitunixBacktestTrade.id)
+            
+            # ?trades_page=N pages through the trades instead of returning all of them
+            trades_page = request.args.get('trades_page', type=int)
+            if trades_page:
+                trades_per_page = request.args.get('trades_per_page', 100, type=int)
+                trades = trades_query.paginate(page=trades_page, per_page=trades_per_page, error_out=False)
+                extra = {
+                    'trade_history': [trade.to_dict() for trade in trades.items],
+                    'trades_pagination': {
+                        'page': trades_page,
+                        'per_page': trades_per_page,
+                        'total': trades.total,
+                        'pages': trades.pages,
+                        'has_next': trades.has_next,
+                        'has_prev': trades.has_prev
+                    }
+                }
+            else:
+                trades = trades_query.all()
+                extra = {'trade_history': [trade.to_dict() for trade in trades]} if trades else {}
+            
+            if extra:
+                body = body[:-1] + b',' + dumps(extra)[1:]
+        if equity_curve:
+            body = body[:-1] + b',"equity_curve":' + dumps(equity_curve) + b'}'
         
-        # Include detailed results if available
-        if backtest.trade_history:
-            backtest_dict['trade_history'] = json.loads(backtest.trade_history)
-        if backtest.equity_curve:
-            backtest_dict['equity_curve'] = json.loads(backtest.equity_curve)
+        if cache_key and backtest.status == 'completed':
+            cache.set(cache_key, body, _DETAIL_CACHE_TIMEOUT)
         
-        return jsonify(backtest_dict)
+        return Response(body, mimetype='application/json')
         
     except Exception as e:
         logger.error(f"Error fetching backtest {backtest_id}: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/<int:backtest_id>/equity_curve.bin', methods=['GET'])
+def get_equity_curve(backtest_id):
+    """Get a backtest's equity curve balances as raw float32 bytes."""
+    try:
+        # Raw stored bytes, skipping the per-point dict decoding
+        row = db.session.execute(
+            select(type_coerce(BitunixBacktest.equity_curve, db.LargeBinary))
+            .where(BitunixBacktest.id == backtest_id)
+        ).first()
+        if row is None:
+            return jsonify({'error': 'Backtest not found'}), 404
+        
+        # ?format=json returns the full points, timestamps included
+        if request.args.get('format') == 'json':
+            return json_response(EquityCurveType().process_result_value(row[0], None))
+        
+        return Response(EquityCurveType.balances(row[0]), mimetype='application/octet-stream')
+        
+    except Exception as e:
+        logger.error(f"Error fetching equity curve for backtest {backtest_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @bp.route('/create', methods=['POST'])
 def create_backtest():
     """Create a new backtest."""
@@ -105,18 +398,18 @@ def create_backtest():
         # Create backtest record
         backtest = BitunixBacktest(
             name=name,
-            signals_data=json.dumps(parsed_signals),
+            signals_data=signals_to_columns(parsed_signals),
             start_date=start_date,
             end_date=end_date,
             initial_balance=initial_balance,
-            settings_snapshot=json.dumps(settings_dict),
+            settings_snapshot=settings_dict,
             status='pending'
         )
         
         db.session.add(backtest)
         db.session.commit()
         
-        return jsonify({
+        return json_response({
             'success': True,
             'backtest': backtest.to_dict(),
             'parsed_signals': len(parsed_signals)
@@ -129,68 +422,58 @@ def create_backtest():
 
 @bp.route('/<int:backtest_id>/run', methods=['POST'])
 def run_backtest(backtest_id):
-    """Run a backtest."""
+    """Start a backtest in the background and return its job id."""
     try:
-        backtest = BitunixBacktest.query.get_or_404(backtest_id)
+        # Lock the row so concurrent run requests cannot both start it
+        backtest = BitunixBacktest.query.options(*_SUMMARY_OPTIONS).filter_by(
+            id=backtest_id
+        ).with_for_update(skip_locked=True).one_or_none()
+        
+        if backtest is None:
+            db.session.rollback()
+            if db.session.get(BitunixBacktest, backtest_id) is None:
+                return jsonify({'error': 'Backtest not found'}), 404
+            return jsonify({'error': 'Backtest is already running'}), 400
         
         if backtest.status == 'running':
+            db.session.rollback()
             return jsonify({'error': 'Backtest is already running'}), 400
         
         if backtest.status == 'completed':
+            db.session.rollback()
             return jsonify({'error': 'Backtest is already completed'}), 400
         
-        # Update status to running
+        # Update status to running; the commit releases the row lock
         backtest.status = 'running'
         db.session.commit()
         
-        try:
-            # Parse stored data
-            signals_data = json.loads(backtest.signals_data)
-            settings = json.loads(backtest.settings_snapshot)
-            
-            # Run backtest
-            engine = BacktestEngine()
-            results = engine.run_backtest(
-                signals=signals_data,
-                settings=settings,
-                initial_balance=backtest.initial_balance,
-                start_date=backtest.start_date,
-                end_date=backtest.end_date
-            )
-            
-            # Update backtest with results
-            backtest.final_balance = results['final_balance']
-            backtest.total_pnl = results['total_pnl']
-            backtest.total_pnl_percentage = results['total_pnl_percentage']
-            backtest.total_trades = results['total_trades']
-            backtest.winning_trades = results['winning_trades']
-            backtest.losing_trades = results['losing_trades']
-            backtest.win_rate = results['win_rate']
-            backtest.max_drawdown = results['max_drawdown']
-            backtest.sharpe_ratio = results.get('sharpe_ratio')
-            backtest.trade_history = json.dumps(results['trade_history'])
-            backtest.equity_curve = json.dumps(results['equity_curve'])
-            backtest.completed_at = datetime.utcnow()
-            backtest.status = 'completed'
-            
-            db.session.commit()
-            
-            return jsonify({
-                'success': True,
-                'backtest': backtest.to_dict(),
-                'results': results
-            })
-            
-        except Exception as run_error:
-            # Update status to failed
-            backtest.status = 'failed'
-            db.session.commit()
-            raise run_error
+        job_id = _start_job(_execute_backtest, backtest_id, kind='run', backtest_id=backtest_id)
+        
+        return json_response({
+            'success': True,
+            'job_id': job_id,
+            'progress_url': f'/api/backtest/progress/{job_id}',
+            'backtest': backtest.to_dict()
+        }, 202)
         
     except Exception as e:
         logger.error(f"Error running backtest {backtest_id}: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/progress/<job_id>', methods=['GET'])
+def get_backtest_progress(job_id):
+    """Stream progress of a background backtest job as Server-Sent Events."""
+    key = _JOB_KEY.format(job_id)
+    body = cache.get(key)
+    if body is None:
+        return jsonify({'error': 'Backtest job not found'}), 404
+    
+    return Response(
+        stream_with_context(_stream_progress(key, body)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @bp.route('/<int:backtest_id>', methods=['DELETE'])
 def delete_backtest(backtest_id):
     """Delete a backtest."""
@@ -202,6 +485,7 @@ def delete_backtest(backtest_id):
         
         db.session.delete(backtest)
         db.session.commit()
+        cache.delete(f'backtest:{backtest_id}')
         
         return jsonify({
             'success': True,
@@ -223,7 +507,7 @@ def compare_backtests():
         if not backtest_ids or len(backtest_ids) < 2:
             return jsonify({'error': 'At least 2 backtest IDs required'}), 400
         
-        backtests = BitunixBacktest.query.filter(
+        backtests = BitunixBacktest.query.options(*_SUMMARY_OPTIONS).filter(
             BitunixBacktest.id.in_(backtest_ids),
             BitunixBacktest.status == 'completed'
         ).all()
@@ -242,33 +526,29 @@ def compare_backtests():
             }
         }
         
-        best_pnl = float('-inf')
-        best_win_rate = 0
-        best_sharpe = float('-inf')
-        lowest_drawdown = float('inf')
+        comparison['backtests'] = [backtest.to_dict() for backtest in backtests]
         
-        for backtest in backtests:
-            bt_dict = backtest.to_dict()
-            comparison['backtests'].append(bt_dict)
-            
-            # Track best metrics
-            if backtest.total_pnl_percentage and backtest.total_pnl_percentage > best_pnl:
-                best_pnl = backtest.total_pnl_percentage
-                comparison['summary']['best_pnl'] = backtest.id
-            
-            if backtest.win_rate and backtest.win_rate > best_win_rate:
-                best_win_rate = backtest.win_rate
-                comparison['summary']['best_win_rate'] = backtest.id
-            
-            if backtest.sharpe_ratio and backtest.sharpe_ratio > best_sharpe:
-                best_sharpe = backtest.sharpe_ratio
-                comparison['summary']['best_sharpe'] = backtest.id
-            
-            if backtest.max_drawdown and backtest.max_drawdown < lowest_drawdown:
-                lowest_drawdown = backtest.max_drawdown
-                comparison['summary']['lowest_drawdown'] = backtest.id
-        
-        return jsonify({
+        # One column per summary metric; drawdown is negated so every column
+        # is maximized. Missing (or zero) metrics sit at the floor and never win.
+        metrics = np.array([
+            (
+                backtest.total_pnl_percentage or -np.inf,
+                backtest.win_rate or 0,
+                backtest.sharpe_ratio or -np.inf,
+                -(backtest.max_drawdown or np.inf)
+            )
+            for backtest in backtests
+        ])
+        best_rows = metrics.argmax(axis=0)
+        floors = (-np.inf, 0, -np.inf, -np.inf)
+        
+        for column, (key, row, floor) in enumerate(zip(
+            ('best_pnl', 'best_win_rate', 'best_sharpe', 'lowest_drawdown'), best_rows, floors
+        )):
+            if metrics[row, column] > floor:
+                comparison['summary'][key] = backtests[row].id
+        
+        return json_response({
             'success': True,
             'comparison': comparison
         })
@@ -277,53 +557,108 @@ def compare_backtests():
         logger.error(f"Error comparing backtests: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@bp.route('/template', methods=['GET'])
-def get_template_signals():
-    """Get template signals for backtesting."""
-    template_signals = [
+@bp.route('/sweep', methods=['POST'])
+def sweep_backtest():
+    """Start a sweep of a backtest's signals under a grid of settings and return its job id."""
+    try:
+        data = request.get_json()
+        backtest_id = data.get('backtest_id')
+        param_grid = data.get('param_grid', [])
+        
+        if not backtest_id:
+            return jsonify({'error': 'backtest_id is required'}), 400
+        if not param_grid or not all(isinstance(params, dict) for params in param_grid):
+            return jsonify({'error': 'param_grid must be a non-empty list of settings'}), 400
+        
+        if db.session.get(BitunixBacktest, backtest_id) is None:
+            return jsonify({'error': 'Backtest not found'}), 404
+        
+        # Price history is fetched in the sweep, so it runs behind the request like /run
+        job_id = _start_job(
+            _execute_sweep, backtest_id, param_grid,
+            retention=_SWEEP_RETENTION, kind='sweep', backtest_id=backtest_id
+        )
+        
+        return json_response({
+            'success': True,
+            'job_id': job_id,
+            'progress_url': f'/api/backtest/progress/{job_id}',
+            'result_url': f'/api/backtest/sweep/{job_id}',
+            'backtest_id': backtest_id
+        }, 202)
+        
+    except Exception as e:
+        logger.error(f"Error running sweep: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/sweep/<job_id>', methods=['GET'])
+def get_sweep_result(job_id):
+    """Get a sweep job's latest message; its results once it is done."""
+    body = cache.get(_JOB_KEY.format(job_id))
+    message = orjson.loads(body) if body is not None else {}
+    if message.get('kind') != 'sweep':
+        return jsonify({'error': 'Sweep job not found'}), 404
+    
+    # 202 until the job has finished, so clients can poll this instead of the stream
+    status = 200 if message['type'] in ('done', 'error') else 202
+    return Response(body, status=status, mimetype='application/json')
+
+# Template signals response, encoded once at import
+_TEMPLATE_JSON = dumps({
+    'template_signals': [
         "#BTC/USDT\nLONG\nEntry: 45000-46000\nLeverage: 5x\nTargets: 47000, 48000, 49000\nStop Loss: 44000",
         "#ETH/USDT\nSHORT\nEntry: 3200-3250\nLeverage: 3x\nTargets: 3100, 3000, 2900\nStop Loss: 3300",
         "#SOL/USDT\nLONG\nEntry: 180-185\nLeverage: 10x\nTargets: 190, 195, 200\nStop Loss: 175"
-    ]
-    
-    return jsonify({
-        'template_signals': template_signals,
-        'description': 'Sample signals for backtesting'
-    })
+    ],
+    'description': 'Sample signals for backtesting'
+})
+
+@bp.route('/template', methods=['GET'])
+def get_template_signals():
+    """Get template signals for backtesting."""
+    return Response(_TEMPLATE_JSON, mimetype='application/json')
 
 @bp.route('/stats', methods=['GET'])
 def get_backtest_stats():
     """Get backtest statistics."""
     try:
-        total_backtests = BitunixBacktest.query.count()
-        completed_backtests = BitunixBacktest.query.filter_by(status='completed').count()
-        running_backtests = BitunixBacktest.query.filter_by(status='running').count()
-        failed_backtests = BitunixBacktest.query.filter_by(status='failed').count()
+        # Status counts and completed-run averages in a single scan
+        completed = BitunixBacktest.status == 'completed'
+        stats = db.session.query(
+            db.func.count(BitunixBacktest.id).label('total'),
+            db.func.count(BitunixBacktest.id).filter(completed).label('completed'),
+            db.func.count(BitunixBacktest.id).filter(BitunixBacktest.status == 'running').label('running'),
+            db.func.count(BitunixBacktest.id).filter(BitunixBacktest.status == 'failed').label('failed'),
+            db.func.avg(BitunixBacktest.total_pnl_percentage).filter(completed).label('avg_pnl'),
+            db.func.avg(BitunixBacktest.win_rate).filter(completed).label('avg_win_rate'),
+            db.func.avg(BitunixBacktest.max_drawdown).filter(completed).label('avg_drawdown')
+        ).one()
+        
+        # The aggregates change whenever the response would, so they make the ETag;
+        # a client with the current version skips the best-backtest lookup entirely
+        etag = hashlib.md5(repr(tuple(stats)).encode()).hexdigest()
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
         
         # Best performing backtest
-        best_backtest = BitunixBacktest.query.filter_by(status='completed').order_by(
+        best_backtest = BitunixBacktest.query.options(*_SUMMARY_OPTIONS).filter(completed).order_by(
             BitunixBacktest.total_pnl_percentage.desc()
         ).first()
         
-        # Average performance metrics
-        avg_metrics = db.session.query(
-            db.func.avg(BitunixBacktest.total_pnl_percentage).label('avg_pnl'),
-            db.func.avg(BitunixBacktest.win_rate).label('avg_win_rate'),
-            db.func.avg(BitunixBacktest.max_drawdown).label('avg_drawdown')
-        ).filter_by(status='completed').first()
-        
-        return jsonify({
-            'total_backtests': total_backtests,
-            'completed_backtests': completed_backtests,
-            'running_backtests': running_backtests,
-            'failed_backtests': failed_backtests,
+        response = json_response({
+            'total_backtests': stats.total,
+            'completed_backtests': stats.completed,
+            'running_backtests': stats.running,
+            'failed_backtests': stats.failed,
             'best_backtest': best_backtest.to_dict() if best_backtest else None,
             'average_metrics': {
-                'avg_pnl_percentage': float(avg_metrics.avg_pnl) if avg_metrics.avg_pnl else 0,
-                'avg_win_rate': float(avg_metrics.avg_win_rate) if avg_metrics.avg_win_rate else 0,
-                'avg_drawdown': float(avg_metrics.avg_drawdown) if avg_metrics.avg_drawdown else 0
+                'avg_pnl_percentage': float(stats.avg_pnl) if stats.avg_pnl else 0,
+                'avg_win_rate': float(stats.avg_win_rate) if stats.avg_win_rate else 0,
+                'avg_drawdown': float(stats.avg_drawdown) if stats.avg_drawdown else 0
             }
         })
+        response.set_etag(etag)
+        return response
         
     except Exception as e:
         logger.error(f"Error fetching backtest stats: {str(e)}")
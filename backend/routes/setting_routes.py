@@ -1,8 +1,11 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
+from sqlalchemy import update
 from models import BitunixSettings, db
-from services.bitunix_api import BitunixAPI
-import json
+from responses import dumps, json_response, not_modified
+from services.bitunix_api import BitunixAPI, request_pool
+import hashlib
 import logging
+from functools import lru_cache
 from cryptography.fernet import Fernet
 import os
 
@@ -10,40 +13,44 @@ logger = logging.getLogger(__name__)
 
 bp = Blueprint('settings', __name__, url_prefix='/api/settings')
 
+@lru_cache(maxsize=1)
+def _get_fernet():
+    """Build the Fernet cipher from ENCRYPTION_KEY once; None if it is unset."""
+    key = os.environ.get('ENCRYPTION_KEY')
+    if not key:
+        return None
+    return Fernet(key.encode())
+
 def encrypt_api_key(api_key: str) -> str:
     """Encrypt API key for secure storage."""
     if not api_key:
         return api_key
     
-    key = os.environ.get('ENCRYPTION_KEY')
-    if not key:
+    f = _get_fernet()
+    if not f:
         # Generate a key if not provided (for development)
-        key = Fernet.generate_key()
+        f = Fernet(Fernet.generate_key())
         logger.warning("No encryption key found, using generated key")
     
-    if isinstance(key, str):
-        key = key.encode()
-    
-    f = Fernet(key)
     return f.encrypt(api_key.encode()).decode()
 
+@lru_cache(maxsize=16)
+def _decrypt_cached(encrypted_key: str) -> str:
+    """Decrypt a stored credential, memoized per ciphertext."""
+    try:
+        return _get_fernet().decrypt(encrypted_key.encode()).decode()
+    except Exception:
+        return encrypted_key  # Return as-is if decryption fails
+
 def decrypt_api_key(encrypted_key: str) -> str:
     """Decrypt API key for use."""
     if not encrypted_key:
         return encrypted_key
     
-    key = os.environ.get('ENCRYPTION_KEY')
-    if not key:
+    if not _get_fernet():
         return encrypted_key  # Return as-is if no encryption key
     
-    if isinstance(key, str):
-        key = key.encode()
-    
-    try:
-        f = Fernet(key)
-        return f.decrypt(encrypted_key.encode()).decode()
-    except Exception:
-        return encrypted_key  # Return as-is if decryption fails
+    return _decrypt_cached(encrypted_key)
 
 @bp.route('/', methods=['GET'])
 def get_settings():
@@ -57,7 +64,14 @@ def get_settings():
             db.session.add(settings)
             db.session.commit()
         
-        return jsonify(settings.to_dict())
+        # Settings only change with updated_at, so it identifies the representation
+        etag = hashlib.md5(f'{settings.id}:{settings.updated_at.isoformat()}'.encode()).hexdigest()
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
+        
+        response = json_response(settings.to_dict())
+        response.set_etag(etag)
+        return response
         
     except Exception as e:
         logger.error(f"Error fetching settings: {str(e)}")
@@ -98,11 +112,11 @@ def update_settings():
         if 'entry_steps' in data:
             settings.entry_steps = data['entry_steps']
         if 'entry_distribution' in data:
-            settings.entry_distribution = json.dumps(data['entry_distribution'])
+            settings.entry_distribution = data['entry_distribution']
         
         # Update exit configuration
         if 'target_distribution' in data:
-            settings.target_distribution = json.dumps(data['target_distribution'])
+            settings.target_distribution = data['target_distribution']
         if 'auto_stop_loss' in data:
             settings.auto_stop_loss = data['auto_stop_loss']
         if 'trailing_stop' in data:
@@ -134,7 +148,11 @@ def update_settings():
         
         db.session.commit()
         
-        return jsonify({
+        # Drop plaintext of credentials that were just replaced
+        if data.keys() & {'api_key', 'api_secret', 'api_passphrase'}:
+            _decrypt_cached.cache_clear()
+        
+        return json_response({
             'success': True,
             'settings': settings.to_dict()
         })
@@ -162,8 +180,10 @@ def test_api_connection():
         api = BitunixAPI(api_key, api_secret, api_passphrase, settings.testnet)
         
         try:
-            account_info = api.get_account_info()
-            balance = api.get_balance()
+            account_future = request_pool.submit(api.get_account_info)
+            balance_future = request_pool.submit(api.get_balance)
+            account_info = account_future.result()
+            balance = balance_future.result()
             
             return jsonify({
                 'success': True,
@@ -182,74 +202,73 @@ def test_api_connection():
         logger.error(f"Error testing API connection: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+# Trading presets for different strategies, encoded once at import
+_PRESETS = {
+    'conservative': {
+        'name': 'Conservative',
+        'description': 'Low risk, steady gains',
+        'default_leverage': 2,
+        'risk_percentage': 1.0,
+        'entry_steps': 3,
+        'entry_distribution': [50, 30, 20],
+        'target_distribution': [60, 25, 15],
+        'auto_stop_loss': True,
+        'trailing_stop': False
+    },
+    'moderate': {
+        'name': 'Moderate',
+        'description': 'Balanced risk/reward',
+        'default_leverage': 5,
+        'risk_percentage': 2.0,
+        'entry_steps': 3,
+        'entry_distribution': [40, 35, 25],
+        'target_distribution': [50, 30, 20],
+        'auto_stop_loss': True,
+        'trailing_stop': True,
+        'trailing_stop_percentage': 5.0
+    },
+    'aggressive': {
+        'name': 'Aggressive',
+        'description': 'High risk, high reward',
+        'default_leverage': 10,
+        'risk_percentage': 3.0,
+        'entry_steps': 2,
+        'entry_distribution': [60, 40],
+        'target_distribution': [40, 35, 25],
+        'auto_stop_loss': True,
+        'trailing_stop': True,
+        'trailing_stop_percentage': 3.0
+    },
+    'scalping': {
+        'name': 'Scalping',
+        'description': 'Quick small profits',
+        'default_leverage': 15,
+        'risk_percentage': 1.5,
+        'entry_steps': 1,
+        'entry_distribution': [100],
+        'target_distribution': [70, 30],
+        'auto_stop_loss': True,
+        'trailing_stop': True,
+        'trailing_stop_percentage': 2.0
+    }
+}
+
+_PRESETS_JSON = dumps({'presets': _PRESETS})
+
 @bp.route('/presets', methods=['GET'])
 def get_presets():
     """Get trading presets for different strategies."""
-    presets = {
-        'conservative': {
-            'name': 'Conservative',
-            'description': 'Low risk, steady gains',
-            'default_leverage': 2,
-            'risk_percentage': 1.0,
-            'entry_steps': 3,
-            'entry_distribution': [50, 30, 20],
-            'target_distribution': [60, 25, 15],
-            'auto_stop_loss': True,
-            'trailing_stop': False
-        },
-        'moderate': {
-            'name': 'Moderate',
-            'description': 'Balanced risk/reward',
-            'default_leverage': 5,
-            'risk_percentage': 2.0,
-            'entry_steps': 3,
-            'entry_distribution': [40, 35, 25],
-            'target_distribution': [50, 30, 20],
-            'auto_stop_loss': True,
-            'trailing_stop': True,
-            'trailing_stop_percentage': 5.0
-        },
-        'aggressive': {
-            'name': 'Aggressive',
-            'description': 'High risk, high reward',
-            'default_leverage': 10,
-            'risk_percentage': 3.0,
-            'entry_steps': 2,
-            'entry_distribution': [60, 40],
-            'target_distribution': [40, 35, 25],
-            'auto_stop_loss': True,
-            'trailing_stop': True,
-            'trailing_stop_percentage': 3.0
-        },
-        'scalping': {
-            'name': 'Scalping',
-            'description': 'Quick small profits',
-            'default_leverage': 15,
-            'risk_percentage': 1.5,
-            'entry_steps': 1,
-            'entry_distribution': [100],
-            'target_distribution': [70, 30],
-            'auto_stop_loss': True,
-            'trailing_stop': True,
-            'trailing_stop_percentage': 2.0
-        }
-    }
-    
-    return jsonify({'presets': presets})
+    return Response(_PRESETS_JSON, mimetype='application/json')
 
 @bp.route('/presets/<preset_name>', methods=['POST'])
 def apply_preset(preset_name):
     """Apply a trading preset."""
     try:
         # Get preset configuration
-        presets_response = get_presets()
-        presets = presets_response.get_json()['presets']
-        
-        if preset_name not in presets:
+        preset = _PRESETS.get(preset_name)
+        if not preset:
             return jsonify({'error': 'Preset not found'}), 404
         
-        preset = presets[preset_name]
-        
         # Get current settings
         settings = BitunixSettings.query.filter_by(vendor='bitunix').first()
         if not settings:
@@ -260,8 +279,8 @@ def apply_preset(preset_name):
         settings.default_leverage = preset['default_leverage']
         settings.risk_percentage = preset['risk_percentage']
         settings.entry_steps = preset['entry_steps']
-        settings.entry_distribution = json.dumps(preset['entry_distribution'])
-        settings.target_distribution = json.dumps(preset['target_distribution'])
+        settings.entry_distribution = preset['entry_distribution']
+        settings.target_distribution = preset['target_distribution']
         settings.auto_stop_loss = preset['auto_stop_loss']
         settings.trailing_stop = preset['trailing_stop']
         
@@ -270,7 +289,7 @@ def apply_preset(preset_name):
         
         db.session.commit()
         
-        return jsonify({
+        return json_response({
             'success': True,
             'message': f'Applied {preset["name"]} preset',
             'settings': settings.to_dict()
@@ -296,7 +315,7 @@ def backup_settings():
         backup_data['api_secret'] = None
         backup_data['api_passphrase'] = None
         
-        return jsonify({
+        return json_response({
             'success': True,
             'backup': backup_data,
             'timestamp': settings.updated_at.isoformat()
@@ -316,11 +335,6 @@ def restore_settings():
         if not backup_data:
             return jsonify({'error': 'Backup data required'}), 400
         
-        settings = BitunixSettings.query.filter_by(vendor='bitunix').first()
-        if not settings:
-            settings = BitunixSettings(vendor='bitunix')
-            db.session.add(settings)
-        
         # Restore non-sensitive settings
         restore_fields = [
             'default_leverage', 'default_position_size', 'max_position_size',
@@ -331,13 +345,23 @@ def restore_settings():
             'ai_model', 'ai_enabled', 'auto_optimize'
         ]
         
-        for field in restore_fields:
-            if field in backup_data:
-                setattr(settings, field, backup_data[field])
+        values = {field: backup_data[field] for field in restore_fields if field in backup_data}
+        
+        settings = BitunixSettings.query.filter_by(vendor='bitunix').first()
+        if not settings:
+            settings = BitunixSettings(vendor='bitunix', **values)
+            db.session.add(settings)
+        elif values:
+            # One UPDATE for all restored fields
+            db.session.execute(
+                update(BitunixSettings)
+                .where(BitunixSettings.id == settings.id)
+                .values(**values)
+            )
         
         db.session.commit()
         
-        return jsonify({
+        return json_response({
             'success': True,
             'message': 'Settings restored successfully',
             'settings': settings.to_dict()
@@ -362,7 +386,7 @@ def reset_settings():
         db.session.add(new_settings)
         db.session.commit()
         
-        return jsonify({
+        return json_response({
             'success': True,
             'message': 'Settings reset to defaults',
             'settings': new_settings.to_dict()
@@ -1,16 +1,107 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_sqlalchemy import SQLAlchemy
-from models import BitunixSignal, db
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import undefer
+from cache import cache, cached_view, first_page_key
+from models import BitunixSignal, BitunixTrade, db
+from pagination import keyset_page, offset_page
+from responses import conditional, json_response, stream_response
 from services.telegram_parser import TelegramSignalParser
-import json
 import logging
+import queue
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
 bp = Blueprint('signals', __name__, url_prefix='/api/signals')
 parser = TelegramSignalParser()
 
+# Deferred parses are written behind the request, a batch per INSERT
+_write_queue = queue.Queue()
+_writer_lock = threading.Lock()
+_writer = None
+_WRITE_BATCH_SIZE = 500
+_WRITE_BATCH_WINDOW = 0.05  # seconds
+
+# Cached views, dropped after every write in this module
+_CACHED_VIEW_KEYS = ('signals:stats', 'signals:first_page')
+_first_page_key = first_page_key('signals:first_page')
+
+# Columns of BitunixSignal.to_dict(), selected as plain rows for list views
+_SIGNAL_LIST_COLUMNS = (
+    BitunixSignal.id,
+    BitunixSignal.vendor,
+    BitunixSignal.coin,
+    BitunixSignal.pair,
+    BitunixSignal.position_type,
+    BitunixSignal.entry_zones,
+    BitunixSignal.leverage,
+    BitunixSignal.cross_leverage,
+    BitunixSignal.targets,
+    BitunixSignal.stop_loss,
+    BitunixSignal.created_at,
+    BitunixSignal.processed,
+    BitunixSignal.parse_errors
+)
+
+def _signal_row(signal_text, parsed_data):
+    """Insert parameters for a parsed signal."""
+    return {
+        'raw_text': signal_text,
+        'coin': parsed_data.get('coin'),
+        'pair': parsed_data.get('pair', 'USDT'),
+        'position_type': parsed_data.get('position_type'),
+        'entry_zones': parsed_data.get('entry_zones', []),
+        'leverage': parsed_data.get('leverage', 1),
+        'cross_leverage': parsed_data.get('cross_leverage', False),
+        'targets': parsed_data.get('targets', []),
+        'stop_loss': parsed_data.get('stop_loss'),
+        'parse_errors': parsed_data.get('parse_errors', []),
+        'processed': False
+    }
+
+def _write_behind(app):
+    """Drain queued signal rows, inserting whatever arrives within one window together."""
+    while True:
+        rows = [_write_queue.get()]
+        deadline = time.monotonic() + _WRITE_BATCH_WINDOW
+        while len(rows) < _WRITE_BATCH_SIZE:
+            try:
+                rows.append(_write_queue.get(timeout=max(deadline - time.monotonic(), 0)))
+            except queue.Empty:
+                break
+        
+        with app.app_context():
+            try:
+                db.session.execute(insert(BitunixSignal), rows)
+                db.session.commit()
+            except Exception as e:
+                logger.error(f"Error writing {len(rows)} deferred signals, retrying singly: {str(e)}")
+                db.session.rollback()
+                # One bad row must not cost the rest of the batch, already answered with 202
+                for row in rows:
+                    try:
+                        db.session.execute(insert(BitunixSignal), row)
+                        db.session.commit()
+                    except Exception as e:
+                        logger.error(f"Error writing deferred signal: {str(e)}")
+                        db.session.rollback()
+            cache.delete(*_CACHED_VIEW_KEYS)
+
+def _enqueue_signal(row):
+    """Queue a signal row for the write-behind thread, starting it on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(
+                target=_write_behind, args=(current_app._get_current_object(),), daemon=True
+            )
+            _writer.start()
+    _write_queue.put(row)
+
 @bp.route('/', methods=['GET'])
+@cached_view(_first_page_key, 5)
 def get_signals():
     """Get all signals with pagination and filtering."""
     try:
@@ -20,43 +111,45 @@ def get_signals():
         position_type = request.args.get('position_type')
         processed = request.args.get('processed', type=bool)
         
-        query = BitunixSignal.query
+        stmt = select(*_SIGNAL_LIST_COLUMNS)
         
         # Apply filters
         if coin:
-            query = query.filter(BitunixSignal.coin.ilike(f'%{coin}%'))
+            stmt = stmt.where(BitunixSignal.coin.ilike(f'%{coin}%'))
         if position_type:
-            query = query.filter(BitunixSignal.position_type == position_type.upper())
+            stmt = stmt.where(BitunixSignal.position_type == position_type.upper())
         if processed is not None:
-            query = query.filter(BitunixSignal.processed == processed)
-        
-        # Paginate
-        signals = query.order_by(BitunixSignal.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        
-        return jsonify({
-            'signals': [signal.to_dict() for signal in signals.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': signals.total,
-                'pages': signals.pages,
-                'has_next': signals.has_next,
-                'has_prev': signals.has_prev
-            }
-        })
+            stmt = stmt.where(BitunixSignal.processed == processed)
+        
+        # ?cursor=<created_at>_<id> seeks on the (created_at, id) index and skips COUNT(*)
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                signals, pagination = keyset_page(stmt, BitunixSignal, cursor, per_page, stream=True)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+        elif _first_page_key():
+            # The cached first page is built whole, since cached_view stores its body anyway
+            signals, pagination = offset_page(stmt, BitunixSignal, page, per_page)
+            return json_response({'signals': signals, 'pagination': pagination})
+        else:
+            signals, pagination = offset_page(stmt, BitunixSignal, page, per_page, stream=True)
+        
+        # Rows are encoded as they are fetched; a keyset cursor is only known after the last one
+        return stream_response('signals', signals, lambda: {'pagination': pagination})
         
     except Exception as e:
         logger.error(f"Error fetching signals: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/<int:signal_id>', methods=['GET'])
+@conditional(max_age=5)
 def get_signal(signal_id):
     """Get a specific signal by ID."""
     try:
-        signal = BitunixSignal.query.get_or_404(signal_id)
-        return jsonify(signal.to_dict())
+        signal = BitunixSignal.query.options(undefer(BitunixSignal.raw_text)).get_or_404(signal_id)
+        # The single-signal view is the one place the original message is sent
+        return json_response({**signal.to_dict(), 'raw_text': signal.raw_text})
     except Exception as e:
         logger.error(f"Error fetching signal {signal_id}: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -74,25 +167,30 @@ def parse_signal():
         # Parse the signal
         parsed_data = parser.parse_signal(signal_text)
         
+        # "defer": true queues the row instead of waiting for the commit; the
+        # signal has no id yet and shows up in lists once its batch is written
+        if data.get('defer'):
+            # Nothing can be reported once queued, so only complete signals are accepted
+            if not (parsed_data.get('coin') and parsed_data.get('position_type')):
+                return jsonify({
+                    'error': 'Signal could not be parsed',
+                    'parse_errors': parsed_data.get('parse_errors', [])
+                }), 400
+            _enqueue_signal(_signal_row(signal_text, parsed_data))
+            return json_response({
+                'success': True,
+                'queued': True,
+                'parsed_data': parsed_data
+            }, status=202)
+        
         # Create new signal record
-        signal = BitunixSignal(
-            raw_text=signal_text,
-            coin=parsed_data.get('coin'),
-            pair=parsed_data.get('pair', 'USDT'),
-            position_type=parsed_data.get('position_type'),
-            entry_zones=json.dumps(parsed_data.get('entry_zones', [])),
-            leverage=parsed_data.get('leverage', 1),
-            cross_leverage=parsed_data.get('cross_leverage', False),
-            targets=json.dumps(parsed_data.get('targets', [])),
-            stop_loss=parsed_data.get('stop_loss'),
-            parse_errors=json.dumps(parsed_data.get('parse_errors', [])),
-            processed=False
-        )
+        signal = BitunixSignal(**_signal_row(signal_text, parsed_data))
         
         db.session.add(signal)
         db.session.commit()
+        cache.delete(*_CACHED_VIEW_KEYS)
         
-        return jsonify({
+        return json_response({
             'success': True,
             'signal': signal.to_dict(),
             'parsed_data': parsed_data
@@ -116,36 +214,20 @@ def batch_parse_signals():
         # Parse all signals
         parsed_results = parser.batch_parse_signals(signal_texts)
         
-        # Create signal records
-        signals_created = []
-        for i, parsed_data in enumerate(parsed_results):
-            signal = BitunixSignal(
-                raw_text=signal_texts[i],
-                coin=parsed_data.get('coin'),
-                pair=parsed_data.get('pair', 'USDT'),
-                position_type=parsed_data.get('position_type'),
-                entry_zones=json.dumps(parsed_data.get('entry_zones', [])),
-                leverage=parsed_data.get('leverage', 1),
-                cross_leverage=parsed_data.get('cross_leverage', False),
-                targets=json.dumps(parsed_data.get('targets', [])),
-                stop_loss=parsed_data.get('stop_loss'),
-                parse_errors=json.dumps(parsed_data.get('parse_errors', [])),
-                processed=False
-            )
-            
-            db.session.add(signal)
-            signals_created.append(signal)
+        # Create signal records in one multi-row INSERT, returning the listed columns
+        signals_created = [dict(row) for row in db.session.execute(
+            insert(BitunixSignal).returning(*_SIGNAL_LIST_COLUMNS, sort_by_parameter_order=True),
+            [_signal_row(signal_text, parsed_data) for signal_text, parsed_data in zip(signal_texts, parsed_results)]
+        ).mappings()]
         
         db.session.commit()
+        cache.delete(*_CACHED_VIEW_KEYS)
         
-        # Get parsing statistics
-        stats = parser.get_parsing_stats(parsed_results)
-        
-        return jsonify({
+        return json_response({
             'success': True,
             'signals_created': len(signals_created),
-            'signals': [signal.to_dict() for signal in signals_created],
-            'parsing_stats': stats
+            'signals': signals_created,
+            'parsing_stats': parser.get_parsing_stats(parsed_results)
         })
         
     except Exception as e:
@@ -166,21 +248,22 @@ def update_signal(signal_id):
         if 'position_type' in data:
             signal.position_type = data['position_type']
         if 'entry_zones' in data:
-            signal.entry_zones = json.dumps(data['entry_zones'])
+            signal.entry_zones = data['entry_zones']
         if 'leverage' in data:
             signal.leverage = data['leverage']
         if 'cross_leverage' in data:
             signal.cross_leverage = data['cross_leverage']
         if 'targets' in data:
-            signal.targets = json.dumps(data['targets'])
+            signal.targets = data['targets']
         if 'stop_loss' in data:
             signal.stop_loss = data['stop_loss']
         if 'processed' in data:
             signal.processed = data['processed']
         
         db.session.commit()
+        cache.delete(*_CACHED_VIEW_KEYS)
         
-        return jsonify({
+        return json_response({
             'success': True,
             'signal': signal.to_dict()
         })
@@ -194,16 +277,25 @@ def update_signal(signal_id):
 def delete_signal(signal_id):
     """Delete a signal."""
     try:
-        signal = BitunixSignal.query.get_or_404(signal_id)
-        
-        # Check if signal has associated trades
-        if signal.trades:
+        # Check if signal has associated trades, without loading the signal or its trades
+        has_trades = db.session.query(
+            db.session.query(BitunixTrade.id).filter_by(signal_id=signal_id).exists()
+        ).scalar()
+        if has_trades:
             return jsonify({
                 'error': 'Cannot delete signal with associated trades'
             }), 400
         
-        db.session.delete(signal)
+        # A trade created since the check makes the foreign key reject this
+        deleted = db.session.execute(
+            delete(BitunixSignal).where(BitunixSignal.id == signal_id)
+        ).rowcount
+        if not deleted:
+            db.session.rollback()
+            return jsonify({'error': 'Signal not found'}), 404
+        
         db.session.commit()
+        cache.delete(*_CACHED_VIEW_KEYS)
         
         return jsonify({
             'success': True,
@@ -216,16 +308,18 @@ def delete_signal(signal_id):
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/stats', methods=['GET'])
+@conditional(max_age=5)
+@cached_view('signals:stats', 30)
 def get_signal_stats():
     """Get signal statistics."""
     try:
-        total_signals = BitunixSignal.query.count()
-        processed_signals = BitunixSignal.query.filter_by(processed=True).count()
-        unprocessed_signals = total_signals - processed_signals
-        
-        # Count by position type
-        long_signals = BitunixSignal.query.filter_by(position_type='LONG').count()
-        short_signals = BitunixSignal.query.filter_by(position_type='SHORT').count()
+        # Processed and position-type counts in a single scan
+        stats = db.session.query(
+            db.func.count(BitunixSignal.id).label('total'),
+            db.func.count(BitunixSignal.id).filter(BitunixSignal.processed == True).label('processed'),
+            db.func.count(BitunixSignal.id).filter(BitunixSignal.position_type == 'LONG').label('longs'),
+            db.func.count(BitunixSignal.id).filter(BitunixSignal.position_type == 'SHORT').label('shorts')
+        ).one()
         
         # Count by coin (top 10)
         coin_stats = db.session.query(
@@ -236,11 +330,11 @@ def get_signal_stats():
         ).limit(10).all()
         
         return jsonify({
-            'total_signals': total_signals,
-            'processed_signals': processed_signals,
-            'unprocessed_signals': unprocessed_signals,
-            'long_signals': long_signals,
-            'short_signals': short_signals,
+            'total_signals': stats.total,
+            'processed_signals': stats.processed,
+            'unprocessed_signals': stats.total - stats.processed,
+            'long_signals': stats.longs,
+            'short_signals': stats.shorts,
             'top_coins': [{'coin': coin, 'count': count} for coin, count in coin_stats]
         })
         
@@ -252,7 +346,7 @@ def get_signal_stats():
 def reparse_signal(signal_id):
     """Reparse an existing signal."""
     try:
-        signal = BitunixSignal.query.get_or_404(signal_id)
+        signal = BitunixSignal.query.options(undefer(BitunixSignal.raw_text)).get_or_404(signal_id)
         
         # Parse the signal again
         parsed_data = parser.parse_signal(signal.raw_text)
@@ -261,16 +355,17 @@ def reparse_signal(signal_id):
         signal.coin = parsed_data.get('coin')
         signal.pair = parsed_data.get('pair', 'USDT')
         signal.position_type = parsed_data.get('position_type')
-        signal.entry_zones = json.dumps(parsed_data.get('entry_zones', []))
+        signal.entry_zones = parsed_data.get('entry_zones', [])
         signal.leverage = parsed_data.get('leverage', 1)
         signal.cross_leverage = parsed_data.get('cross_leverage', False)
-        signal.targets = json.dumps(parsed_data.get('targets', []))
+        signal.targets = parsed_data.get('targets', [])
         signal.stop_loss = parsed_data.get('stop_loss')
-        signal.parse_errors = json.dumps(parsed_data.get('parse_errors', []))
+        signal.parse_errors = parsed_data.get('parse_errors', [])
         
         db.session.commit()
+        cache.delete(*_CACHED_VIEW_KEYS)
         
-        return jsonify({
+        return json_response({
             'success': True,
             'signal': signal.to_dict(),
             'parsed_data': parsed_data
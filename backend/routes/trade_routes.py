@@ -1,27 +1,69 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from cache import cache, cached_view, first_page_key
 from models import BitunixTrade, BitunixSignal, BitunixSettings, db
+from pagination import keyset_page, offset_page
+from responses import dumps, json_response, not_modified, stream_response
 from services.bitunix_api import BitunixAPI, BitunixTradeManager
-import json
+from datetime import datetime, timedelta
+import hashlib
 import logging
+import orjson
+import threading
 
 logger = logging.getLogger(__name__)
 
 bp = Blueprint('trades', __name__, url_prefix='/api/trades')
 
+# Cached views, dropped after every write; executing a trade also marks its signal processed
+_CACHED_VIEW_KEYS = (
+    'trades:stats', 'trades:first_page',
+    'signals:stats', 'signals:first_page'
+)
+
+# The API client, with its HTTP session, is kept per process and rebuilt when the
+# settings row's (id, updated_at) changes, which every settings write does
+_api_instance = {'version': None, 'api': None}
+_api_lock = threading.Lock()
+
+# Trade history is sent in batches; its performance summary is cached briefly
+_HISTORY_PAGE_SIZE = 40
+_HISTORY_PERFORMANCE_TIMEOUT = 30  # seconds
+
+# Columns of BitunixTrade.to_dict(), selected as plain rows for list views
+_TRADE_LIST_COLUMNS = tuple(BitunixTrade.__table__.columns)
+
 def get_api_instance():
-    """Get authenticated Bitunix API instance."""
-    settings = BitunixSettings.query.filter_by(vendor='bitunix').first()
+    """Get authenticated Bitunix API instance, reused while the settings are unchanged."""
+    # Read from the database on every call, so a settings write reaches all workers at once
+    version = db.session.execute(
+        select(BitunixSettings.id, BitunixSettings.updated_at).filter_by(vendor='bitunix')
+    ).first()
+    if version is None:
+        raise Exception("Bitunix API not configured")
+    version = tuple(version)
+    with _api_lock:
+        if _api_instance['version'] == version:
+            return _api_instance['api']
+    
+    settings = db.session.get(BitunixSettings, version[0])
     if not settings or not settings.api_key:
         raise Exception("Bitunix API not configured")
     
-    return BitunixAPI(
-        api_key=settings.api_key,
-        api_secret=settings.api_secret,
-        api_passphrase=settings.api_passphrase,
-        testnet=settings.testnet
-    )
+    with _api_lock:
+        if _api_instance['version'] != version:
+            _api_instance['api'] = BitunixAPI(
+                api_key=settings.api_key,
+                api_secret=settings.api_secret,
+                api_passphrase=settings.api_passphrase,
+                testnet=settings.testnet
+            )
+            _api_instance['version'] = version
+        return _api_instance['api']
 
 @bp.route('/', methods=['GET'])
+@cached_view(first_page_key('trades:first_page'), 5)
 def get_trades():
     """Get all trades with pagination and filtering."""
     try:
@@ -31,31 +73,29 @@ def get_trades():
         status = request.args.get('status')
         position_type = request.args.get('position_type')
         
-        query = BitunixTrade.query
+        stmt = select(*_TRADE_LIST_COLUMNS)
         
         # Apply filters
         if coin:
-            query = query.filter(BitunixTrade.coin.ilike(f'%{coin}%'))
+            stmt = stmt.where(BitunixTrade.coin.ilike(f'%{coin}%'))
         if status:
-            query = query.filter(BitunixTrade.status == status)
+            stmt = stmt.where(BitunixTrade.status == status)
         if position_type:
-            query = query.filter(BitunixTrade.position_type == position_type.upper())
-        
-        # Paginate
-        trades = query.order_by(BitunixTrade.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+            stmt = stmt.where(BitunixTrade.position_type == position_type.upper())
+        
+        # ?cursor=<created_at>_<id> seeks on the (created_at, id) index and skips COUNT(*)
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                trades, pagination = keyset_page(stmt, BitunixTrade, cursor, per_page)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+        else:
+            trades, pagination = offset_page(stmt, BitunixTrade, page, per_page)
         
-        return jsonify({
-            'trades': [trade.to_dict() for trade in trades.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': trades.total,
-                'pages': trades.pages,
-                'has_next': trades.has_next,
-                'has_prev': trades.has_prev
-            }
+        return json_response({
+            'trades': trades,
+            'pagination': pagination
         })
         
     except Exception as e:
@@ -67,7 +107,16 @@ def get_trade(trade_id):
     """Get a specific trade by ID."""
     try:
         trade = BitunixTrade.query.get_or_404(trade_id)
-        return jsonify(trade.to_dict())
+        
+        # Every write bumps updated_at, so it identifies the representation
+        etag = hashlib.md5(f'{trade.id}:{trade.updated_at}'.encode()).hexdigest()
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
+        
+        response = json_response(trade.to_dict())
+        response.set_etag(etag)
+        response.cache_control.max_age = 5
+        return response
     except Exception as e:
         logger.error(f"Error fetching trade {trade_id}: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -82,48 +131,63 @@ def execute_signal(signal_id):
         if not settings:
             return jsonify({'error': 'Trading settings not configured'}), 400
         
-        # Check if signal already has trades
-        existing_trade = BitunixTrade.query.filter_by(signal_id=signal_id).first()
-        if existing_trade:
+        signal_data = signal.to_dict()
+        settings_data = settings.to_dict()
+        
+        # Claim the signal before touching the exchange: the unique signal_id (added to
+        # existing tables by migration 0002) makes a concurrent execute fail here
+        trade = BitunixTrade(
+            signal_id=signal_id,
+            coin=signal.coin,
+            pair=signal.pair,
+            position_type=signal.position_type,
+            size=0.0,
+            status='executing'
+        )
+        db.session.add(trade)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
             return jsonify({'error': 'Signal already executed'}), 400
         
-        # Get API instance and trade manager
-        api = get_api_instance()
-        trade_manager = BitunixTradeManager(api)
-        
-        # Execute the signal
-        execution_result = trade_manager.execute_signal(
-            signal.to_dict(), 
-            settings.to_dict()
-        )
+        try:
+            # Get API instance and trade manager
+            api = get_api_instance()
+            trade_manager = BitunixTradeManager(api)
+            
+            # Execute the signal
+            execution_result = trade_manager.execute_signal(signal_data, settings_data)
+        except Exception:
+            # Release the claim so the signal can be executed again
+            db.session.rollback()
+            db.session.delete(trade)
+            db.session.commit()
+            raise
         
         if execution_result['success']:
-            # Create trade record
-            trade = BitunixTrade(
-                signal_id=signal_id,
-                coin=signal.coin,
-                pair=signal.pair,
-                position_type=signal.position_type,
-                size=execution_result['position_size'],
-                leverage=execution_result['leverage'],
-                entry_orders=json.dumps([order.get('orderId') for order in execution_result.get('entry_orders', [])]),
-                target_orders=json.dumps([order.get('orderId') for order in execution_result.get('target_orders', [])]),
-                stop_loss_order_id=execution_result.get('stop_order', {}).get('orderId'),
-                status='active'
-            )
+            # Fill in the claimed trade record
+            trade.size = execution_result['position_size']
+            trade.leverage = execution_result['leverage']
+            trade.entry_orders = [order.get('orderId') for order in execution_result.get('entry_orders', [])]
+            trade.target_orders = [order.get('orderId') for order in execution_result.get('target_orders', [])]
+            trade.stop_loss_order_id = execution_result.get('stop_order', {}).get('orderId')
+            trade.status = 'active'
             
             # Mark signal as processed
             signal.processed = True
             
-            db.session.add(trade)
             db.session.commit()
+            cache.delete(*_CACHED_VIEW_KEYS)
             
-            return jsonify({
+            return json_response({
                 'success': True,
                 'trade': trade.to_dict(),
                 'execution_result': execution_result
             })
         else:
+            db.session.delete(trade)
+            db.session.commit()
             return jsonify({
                 'success': False,
                 'error': execution_result.get('error', 'Unknown error')
@@ -161,8 +225,9 @@ def update_trade_status(trade_id):
                 trade.closed_at = db.func.now()
             
             db.session.commit()
+            cache.delete(*_CACHED_VIEW_KEYS)
             
-            return jsonify({
+            return json_response({
                 'success': True,
                 'trade': trade.to_dict(),
                 'position_data': position_data
@@ -177,73 +242,101 @@ def update_trade_status(trade_id):
         logger.error(f"Error updating trade {trade_id}: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def _set_trade_status(trade_id, status, **values):
+    """Move a claimed trade out of 'closing' and commit."""
+    db.session.execute(
+        update(BitunixTrade)
+        .where(BitunixTrade.id == trade_id, BitunixTrade.status == 'closing')
+        .values(status=status, **values)
+    )
+    db.session.commit()
+
 @bp.route('/<int:trade_id>/close', methods=['POST'])
 def close_trade(trade_id):
     """Manually close a trade."""
     try:
-        trade = BitunixTrade.query.get_or_404(trade_id)
-        
-        if trade.status in ['closed', 'cancelled']:
+        row = db.session.execute(select(BitunixTrade.status).where(BitunixTrade.id == trade_id)).first()
+        if row is None:
+            return jsonify({'error': 'Trade not found'}), 404
+        status = row.status
+        if status in ('closed', 'cancelled'):
             return jsonify({'error': 'Trade is already closed'}), 400
+        if status == 'closing':
+            return jsonify({'error': 'Trade is already being closed'}), 400
+        
+        # Claim the trade with a committed 'closing' status, so no transaction or row
+        # lock is held across the exchange calls; a concurrent close loses the swap
+        claimed = db.session.execute(
+            update(BitunixTrade)
+            .where(BitunixTrade.id == trade_id, BitunixTrade.status == status)
+            .values(status='closing')
+            .returning(BitunixTrade.coin, BitunixTrade.pair, BitunixTrade.position_type)
+        ).one_or_none()
+        db.session.commit()
+        if claimed is None:
+            return jsonify({'error': 'Trade is already being closed'}), 400
         
-        api = get_api_instance()
-        symbol = f"{trade.coin}{trade.pair}"
-        
-        # Get current position
-        positions = api.get_positions(symbol)
-        if not positions:
-            return jsonify({'error': 'No active position found'}), 400
-        
-        position = positions[0]
-        position_size = float(position.get('size', 0))
-        
-        if position_size == 0:
-            trade.status = 'closed'
-            trade.closed_at = db.func.now()
-            db.session.commit()
+        try:
+            api = get_api_instance()
+            symbol = f"{claimed.coin}{claimed.pair}"
+            
+            # Get current position
+            positions = api.get_positions(symbol)
+            if not positions:
+                _set_trade_status(trade_id, status)
+                return jsonify({'error': 'No active position found'}), 400
+            
+            position_size = float(positions[0].get('size', 0))
+            close_order = None
+            if position_size != 0:
+                # Place market order to close position
+                side = 'sell' if claimed.position_type == 'LONG' else 'buy'
+                close_order = api.place_order(
+                    symbol=symbol,
+                    side=side,
+                    order_type='market',
+                    size=position_size,
+                    reduce_only=True
+                )
+        except Exception:
+            # Release the claim so the close can be retried
+            _set_trade_status(trade_id, status)
+            raise
+        
+        _set_trade_status(trade_id, 'closed', closed_at=db.func.now())
+        cache.delete(*_CACHED_VIEW_KEYS)
+        
+        if close_order is None:
             return jsonify({'success': True, 'message': 'Position already closed'})
         
-        # Place market order to close position
-        side = 'sell' if trade.position_type == 'LONG' else 'buy'
-        close_order = api.place_order(
-            symbol=symbol,
-            side=side,
-            order_type='market',
-            size=position_size,
-            reduce_only=True
-        )
-        
-        # Update trade status
-        trade.status = 'closed'
-        trade.closed_at = db.func.now()
-        
-        db.session.commit()
-        
-        return jsonify({
+        return json_response({
             'success': True,
-            'trade': trade.to_dict(),
+            'trade': db.session.get(BitunixTrade, trade_id).to_dict(),
             'close_order': close_order
         })
         
     except Exception as e:
         logger.error(f"Error closing trade {trade_id}: {str(e)}")
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/stats', methods=['GET'])
+@cached_view('trades:stats', 30)
 def get_trade_stats():
     """Get trading statistics."""
     try:
-        total_trades = BitunixTrade.query.count()
-        active_trades = BitunixTrade.query.filter_by(status='active').count()
-        closed_trades = BitunixTrade.query.filter_by(status='closed').count()
-        
-        # PnL statistics
-        closed_trades_query = BitunixTrade.query.filter_by(status='closed')
-        total_pnl = db.session.query(db.func.sum(BitunixTrade.pnl)).filter_by(status='closed').scalar() or 0
-        winning_trades = closed_trades_query.filter(BitunixTrade.pnl > 0).count()
-        losing_trades = closed_trades_query.filter(BitunixTrade.pnl < 0).count()
-        
-        win_rate = (winning_trades / closed_trades * 100) if closed_trades > 0 else 0
+        # Status counts and closed-trade PnL in a single scan
+        closed = BitunixTrade.status == 'closed'
+        stats = db.session.query(
+            db.func.count(BitunixTrade.id).label('total'),
+            db.func.count(BitunixTrade.id).filter(BitunixTrade.status == 'active').label('active'),
+            db.func.count(BitunixTrade.id).filter(closed).label('closed'),
+            db.func.sum(BitunixTrade.pnl).filter(closed).label('total_pnl'),
+            db.func.count(BitunixTrade.id).filter(closed, BitunixTrade.pnl > 0).label('winning'),
+            db.func.count(BitunixTrade.id).filter(closed, BitunixTrade.pnl < 0).label('losing')
+        ).one()
+        
+        win_rate = (stats.winning / stats.closed * 100) if stats.closed > 0 else 0
         
         # Top performing coins
         coin_performance = db.session.query(
@@ -255,12 +348,12 @@ def get_trade_stats():
         ).limit(10).all()
         
         return jsonify({
-            'total_trades': total_trades,
-            'active_trades': active_trades,
-            'closed_trades': closed_trades,
-            'total_pnl': total_pnl,
-            'winning_trades': winning_trades,
-            'losing_trades': losing_trades,
+            'total_trades': stats.total,
+            'active_trades': stats.active,
+            'closed_trades': stats.closed,
+            'total_pnl': stats.total_pnl or 0,
+            'winning_trades': stats.winning,
+            'losing_trades': stats.losing,
             'win_rate': round(win_rate, 2),
             'top_coins': [
                 {
@@ -280,7 +373,9 @@ def get_trade_stats():
 def get_active_trades():
     """Get all active trades with current status."""
     try:
-        active_trades = BitunixTrade.query.filter_by(status='active').all()
+        active_trades = db.session.execute(
+            select(*_TRADE_LIST_COLUMNS).where(BitunixTrade.status == 'active')
+        ).mappings().all()
         
         if not active_trades:
             return jsonify({'trades': []})
@@ -290,22 +385,23 @@ def get_active_trades():
             api = get_api_instance()
             trade_manager = BitunixTradeManager(api)
             
+            # One positions call for every active trade instead of one per trade
+            symbols = [f"{trade['coin']}{trade['pair']}" for trade in active_trades]
+            positions = trade_manager.monitor_positions(symbols)
+            
             trades_with_status = []
-            for trade in active_trades:
-                symbol = f"{trade.coin}{trade.pair}"
-                position_data = trade_manager.monitor_position(symbol)
-                
-                trade_dict = trade.to_dict()
-                trade_dict['position_data'] = position_data
+            for trade, symbol in zip(active_trades, symbols):
+                trade_dict = dict(trade)
+                trade_dict['position_data'] = positions[symbol]
                 trades_with_status.append(trade_dict)
             
-            return jsonify({'trades': trades_with_status})
+            return json_response({'trades': trades_with_status})
             
         except Exception as api_error:
             # Return trades without live data if API fails
             logger.warning(f"API error, returning trades without live data: {str(api_error)}")
-            return jsonify({
-                'trades': [trade.to_dict() for trade in active_trades],
+            return json_response({
+                'trades': [dict(trade) for trade in active_trades],
                 'warning': 'Live position data unavailable'
             })
         
@@ -313,45 +409,71 @@ def get_active_trades():
         logger.error(f"Error fetching active trades: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def _history_performance(window):
+    """Totals and daily PnL of the closed trades in a history window."""
+    # Calculate performance metrics in the database
+    performance = db.session.query(
+        db.func.count(BitunixTrade.id).label('total'),
+        db.func.sum(BitunixTrade.pnl).label('total_pnl'),
+        db.func.count(BitunixTrade.id).filter(BitunixTrade.pnl > 0).label('winning')
+    ).filter(*window).one()
+    total_trades = performance.total
+    winning_trades = performance.winning
+    
+    win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
+    
+    # Daily performance, grouped by close date
+    closed_day = db.func.date(BitunixTrade.closed_at).label('day')
+    daily_rows = db.session.query(closed_day, db.func.sum(BitunixTrade.pnl)).filter(
+        *window, BitunixTrade.closed_at.isnot(None), BitunixTrade.pnl != 0
+    ).group_by(closed_day).all()
+    
+    return {
+        'total_trades': total_trades,
+        'total_pnl': performance.total_pnl or 0,
+        'winning_trades': winning_trades,
+        'losing_trades': total_trades - winning_trades,
+        'win_rate': round(win_rate, 2),
+        # date() comes back as a date on PostgreSQL and as text on SQLite
+        'daily_pnl': {str(day): pnl for day, pnl in daily_rows}
+    }
+
 @bp.route('/history', methods=['GET'])
 def get_trade_history():
     """Get trade history with performance metrics."""
     try:
         days = request.args.get('days', 30, type=int)
+        limit = request.args.get('limit', _HISTORY_PAGE_SIZE, type=int)
+        if limit < 1:
+            limit = _HISTORY_PAGE_SIZE
         
         # Get trades from last N days
-        from datetime import datetime, timedelta
         start_date = datetime.utcnow() - timedelta(days=days)
+        window = (BitunixTrade.created_at >= start_date, BitunixTrade.status == 'closed')
         
-        trades = BitunixTrade.query.filter(
-            BitunixTrade.created_at >= start_date,
-            BitunixTrade.status == 'closed'
-        ).order_by(BitunixTrade.closed_at.desc()).all()
-        
-        # Calculate performance metrics
-        total_trades = len(trades)
-        total_pnl = sum(trade.pnl for trade in trades if trade.pnl)
-        winning_trades = sum(1 for trade in trades if trade.pnl and trade.pnl > 0)
-        
-        win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
-        
-        # Daily performance
-        daily_pnl = {}
-        for trade in trades:
-            if trade.closed_at and trade.pnl:
-                date_key = trade.closed_at.date().isoformat()
-                daily_pnl[date_key] = daily_pnl.get(date_key, 0) + trade.pnl
+        # Trades arrive in close-time order, one ?cursor=<closed_at>_<id> batch at a time
+        try:
+            trades, pagination = keyset_page(
+                select(*_TRADE_LIST_COLUMNS).where(*window, BitunixTrade.closed_at.isnot(None)),
+                BitunixTrade, request.args.get('cursor'), limit, column=BitunixTrade.closed_at,
+                stream=True
+            )
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        
+        # Every batch repeats the window's performance, so it is cached briefly
+        cache_key = f'trades:history_performance:{days}'
+        cached = cache.get(cache_key)
+        if cached is not None:
+            performance = orjson.loads(cached)
+        else:
+            performance = _history_performance(window)
+            cache.set(cache_key, dumps(performance), _HISTORY_PERFORMANCE_TIMEOUT)
         
-        return jsonify({
-            'trades': [trade.to_dict() for trade in trades],
-            'performance': {
-                'total_trades': total_trades,
-                'total_pnl': total_pnl,
-                'winning_trades': winning_trades,
-                'losing_trades': total_trades - winning_trades,
-                'win_rate': round(win_rate, 2),
-                'daily_pnl': daily_pnl
-            },
+        # Trades are encoded as they are fetched; next_cursor is only known after the last one
+        return stream_response('trades', trades, lambda: {
+            'next_cursor': pagination['next_cursor'],
+            'performance': performance,
             'period_days': days
         })
         
@@ -1,35 +1,412 @@
 import openai
 import anthropic
+import asyncio
+import functools
+import hashlib
+import httpx
 import json
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional
+import orjson
+import random
+import re
+import threading
+import time
+from cache import cache
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Union
 import os
 
 logger = logging.getLogger(__name__)
 
+# Provider calls in flight at once per optimizer; the rest wait their turn
+MAX_CONCURRENT_REQUESTS = int(os.environ.get('AI_OPTIMIZER_MAX_CONCURRENCY', 20))
+
+# Provider calls started per minute across the process, with bursts up to the concurrency
+REQUESTS_PER_MINUTE = int(os.environ.get('AI_OPTIMIZER_RPM', 120))
+
+# Throttling and transient provider failures are retried with jittered exponential backoff
+MAX_ATTEMPTS = 5
+MAX_BACKOFF = 30
+RETRYABLE_ERRORS = (
+    openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError,
+    anthropic.RateLimitError, anthropic.APIConnectionError, anthropic.InternalServerError
+)
+
+# Keep-alive pool handed to the provider SDK so repeat calls skip TCP and TLS setup
+HTTP_LIMITS = httpx.Limits(max_connections=512, max_keepalive_connections=256)
+HTTP_TIMEOUT = httpx.Timeout(120.0)
+PREWARM_TIMEOUT = 5.0
+
+# Greedy decoding makes a prompt's response repeatable, so it can be served from cache
+TEMPERATURE = 0
+RESPONSE_CACHE_TIMEOUT = 3600
+
+# When set, decimals in the prompt are rounded to this many significant digits for the
+# cache key only, so prompts whose metrics differ by small deltas share a response
+SIMILAR_PROMPT_DIGITS = int(os.environ.get('AI_OPTIMIZER_CACHE_SIGNIFICANT_DIGITS', 0))
+_DECIMAL_RE = re.compile(r'-?\d+\.\d+')
+
+# OpenAI models that accept response_format json_object; older ones reject the parameter
+JSON_MODE_MODELS = ('gpt-4o', 'gpt-4-turbo', 'gpt-4-1106', 'gpt-4-0125', 'gpt-4.1', 'gpt-3.5-turbo', 'o1', 'o3', 'o4')
+
+# Static instructions live in the system prompt, ahead of the per-call data, so
+# providers can cache the prefix; they must stay byte-identical between calls
+SYSTEM_PROMPT = "You are an expert cryptocurrency trading analyst and optimizer."
+
+ANALYSIS_INSTRUCTIONS = """
+Please provide specific recommendations to improve performance. Focus on:
+1. Parameter adjustments for better risk/reward
+2. Entry and exit strategy improvements
+3. Risk management optimization
+4. Expected impact of each recommendation
+
+Format your response as JSON with the following structure:
+{
+    "analysis": "Detailed analysis of current performance",
+    "recommendations": {
+        "parameter_name": new_value,
+        "another_parameter": new_value
+    },
+    "reasoning": "Explanation for each recommendation",
+    "expected_improvement": "Estimated improvement percentage",
+    "confidence": "Confidence level (0-1)"
+}
+"""
+
+OPTIMIZATION_INSTRUCTIONS = """
+Please provide optimized settings that would improve performance based on the historical data.
+Focus on finding the best balance between the specified goals.
+
+Return your response as JSON with optimized parameter values:
+{
+    "optimized_settings": {
+        "parameter_name": new_value
+    },
+    "reasoning": "Explanation for the optimizations",
+    "expected_improvement": estimated_improvement_percentage,
+    "confidence": confidence_level
+}
+"""
+
+SUGGESTIONS_INSTRUCTIONS = """
+Provide actionable suggestions for improvement. Include:
+1. Market condition adaptations
+2. Risk management improvements  
+3. Entry/exit timing optimizations
+4. General trading strategy advice
+
+Format as JSON:
+{
+    "suggestions": [
+        {
+            "category": "risk_management|strategy|timing|market_adaptation",
+            "title": "Suggestion title",
+            "description": "Detailed description",
+            "priority": "high|medium|low",
+            "implementation": "How to implement this suggestion"
+        }
+    ],
+    "summary": "Overall assessment and key insights"
+}
+"""
+
+MARKET_ANALYSIS_INSTRUCTIONS = """
+Please provide:
+1. Overall market sentiment analysis
+2. Individual coin assessments
+3. Trading recommendations based on current conditions
+4. Risk factors to consider
+5. Optimal strategy suggestions for current market
+
+Format your response as JSON:
+{
+    "market_sentiment": "bullish|bearish|neutral|uncertain",
+    "overall_analysis": "General market assessment",
+    "coin_analysis": {
+        "COIN": {
+            "sentiment": "bullish|bearish|neutral",
+            "key_factors": ["factor1", "factor2"],
+            "recommendation": "buy|sell|hold|avoid"
+        }
+    },
+    "recommendations": [
+        {
+            "action": "Recommended action",
+            "reasoning": "Why this action is recommended",
+            "timeframe": "short|medium|long term"
+        }
+    ],
+    "risk_factors": ["factor1", "factor2"],
+    "strategy_suggestions": ["suggestion1", "suggestion2"]
+}
+
+Note: Base your analysis on general market principles and technical analysis concepts.
+"""
+
+BATCH_ANALYSIS_INSTRUCTIONS = ANALYSIS_INSTRUCTIONS + """
+Several numbered backtests follow. Analyze each one independently and return a
+JSON array holding one object in the structure above per backtest, in the same
+order as the backtests, with its number in an added "index" field.
+"""
+
+# Output budgets sized to each reply's JSON with headroom, since a truncated reply does not parse
+ANALYSIS_MAX_TOKENS = 800
+OPTIMIZATION_MAX_TOKENS = 600
+SUGGESTIONS_MAX_TOKENS = 1200
+MARKET_ANALYSIS_MAX_TOKENS = 1500
+# Each batched analysis needs roughly a few hundred tokens
+BATCH_MAX_TOKENS = 4000
+
+@functools.lru_cache(maxsize=None)
+def _openai_system_message(instructions: str) -> Dict:
+    """The OpenAI system message for a set of instructions, built once per constant."""
+    return {"role": "system", "content": SYSTEM_PROMPT + instructions}
+
+@functools.lru_cache(maxsize=None)
+def _anthropic_system(instructions: str) -> List[Dict]:
+    """The Anthropic system blocks for a set of instructions, marked for prompt caching."""
+    return [
+        {
+            "type": "text",
+            "text": SYSTEM_PROMPT + instructions,
+            "cache_control": {"type": "ephemeral"}
+        }
+    ]
+
+_DECODER = json.JSONDecoder()
+_CLOSERS = {'{': '}', '[': ']'}
+
+# Keywords that move the confidence score, scanned for in one pass over the response
+CONFIDENCE_WEIGHTS = {
+    'confident': 0.1, 'strong': 0.1, 'clear': 0.1, 'significant': 0.1, 'highly': 0.1,
+    'uncertain': -0.1, 'might': -0.1, 'possibly': -0.1, 'unclear': -0.1, 'difficult': -0.1
+}
+# Longest first, so 'unclear' is not also counted as 'clear'
+_CONFIDENCE_RE = re.compile(
+    '|'.join(sorted(CONFIDENCE_WEIGHTS, key=len, reverse=True)), re.IGNORECASE
+)
+
+def _extract_json(text: str, opener: str = '{') -> Optional[Union[Dict, List]]:
+    """Decode the first JSON value that starts with opener in text, or None if there is none."""
+    idx = text.find(opener)
+    if idx == -1:
+        return None
+    
+    # Streamed responses stop at the value's closing bracket, so the span to the last
+    # closer is usually exactly the value and orjson can decode it directly
+    end = text.rfind(_CLOSERS[opener])
+    if end > idx:
+        try:
+            return orjson.loads(text[idx:end + 1])
+        except orjson.JSONDecodeError:
+            pass
+    
+    # raw_decode stops at the end of the value, so surrounding prose needs no regex
+    while idx != -1:
+        try:
+            return _DECODER.raw_decode(text, idx)[0]
+        except ValueError:
+            idx = text.find(opener, idx + 1)
+    return None
+
+class _RateLimiter:
+    """Token bucket over provider calls, shared by every optimizer and event loop in the process."""
+    
+    def __init__(self, per_minute: int, burst: int):
+        self.interval = 60.0 / per_minute
+        self.tolerance = self.interval * (burst - 1)
+        self._next = 0.0
+        self._lock = threading.Lock()
+    
+    async def wait(self):
+        """Sleep until the next call may start."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        delay = slot - now - self.tolerance
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+_limiter = _RateLimiter(REQUESTS_PER_MINUTE, MAX_CONCURRENT_REQUESTS)
+
+class _JsonStreamScanner:
+    """Collects streamed text and spots when the first JSON value opened by opener is complete."""
+    
+    def __init__(self, opener: str = '{'):
+        self.opener = opener
+        self._parts = []
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+    
+    @property
+    def text(self) -> str:
+        return ''.join(self._parts)
+    
+    def feed(self, chunk: str) -> bool:
+        """Add a chunk of text; True once a complete JSON value has arrived."""
+        self._parts.append(chunk)
+        for char in chunk:
+            pos = self._pos
+            self._pos += 1
+            if self._start < 0:
+                if char == self.opener:
+                    self._start, self._depth = pos, 1
+                continue
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    # Balanced brackets in prose are not JSON; keep looking past them
+                    try:
+                        _DECODER.raw_decode(self.text, self._start)
+                        return True
+                    except ValueError:
+                        self._start = -1
+        return False
+
+def _response_cache_key(provider: str, model: str, instructions: str, prompt: str,
+                        max_tokens: int, temperature: float) -> Optional[str]:
+    """Cache key for a completion, or None when sampling makes the response non-deterministic."""
+    if temperature > 0:
+        return None
+    if SIMILAR_PROMPT_DIGITS:
+        prompt = _DECIMAL_RE.sub(lambda match: f"{float(match.group()):.{SIMILAR_PROMPT_DIGITS}g}", prompt)
+    payload = json.dumps({
+        'provider': provider,
+        'model': model,
+        'instructions': instructions,
+        'prompt': prompt,
+        'max_tokens': max_tokens,
+        'temperature': temperature
+    }, sort_keys=True)
+    return f"ai:response:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+_loop = None
+_loop_lock = threading.Lock()
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Lazily start the event loop that runs AI requests for sync callers."""
+    # Started on first use, so a worker forked from a preloaded app gets its own thread
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='ai-optimizer-loop', daemon=True).start()
+        return _loop
+
+def _run(coro):
+    """Run a coroutine on the background loop and block until it finishes."""
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result()
+
+async def _prewarm(http: httpx.AsyncClient, url: str):
+    """Open a keep-alive connection to the provider so the first real call skips TCP and TLS setup."""
+    try:
+        # Any status will do; only the pooled connection matters
+        await http.head(url, timeout=PREWARM_TIMEOUT)
+    except httpx.HTTPError as e:
+        logger.debug(f"AI provider prewarm failed: {str(e)}")
+
+def _shared_client(provider: str):
+    """The process-wide (http pool, SDK client) pair for a provider, created on first use."""
+    with _clients_lock:
+        if provider not in _clients:
+            http = httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+            if provider == 'openai':
+                client = openai.AsyncOpenAI(
+                    api_key=os.environ.get('OPENAI_API_KEY'),
+                    http_client=http,
+                    max_retries=0
+                )
+            else:
+                client = anthropic.AsyncAnthropic(
+                    api_key=os.environ.get('ANTHROPIC_API_KEY'),
+                    http_client=http,
+                    max_retries=0
+                )
+            _clients[provider] = (http, client)
+            asyncio.run_coroutine_threadsafe(_prewarm(http, str(client.base_url)), _background_loop())
+        return _clients[provider]
+
 class AIOptimizer:
     """
     AI-powered optimization service for trading parameters and strategies.
     Supports multiple AI providers (OpenAI, Anthropic) for analysis and recommendations.
     """
     
+    # Estimated improvement (%) per recommended parameter; others count 1.0
+    IMPROVEMENT_FACTORS = {
+        'default_leverage': 5.0,
+        'risk_percentage': 3.0,
+        'entry_distribution': 2.0,
+        'target_distribution': 2.0,
+        'entry_steps': 1.5
+    }
+    
     def __init__(self, provider: str = 'openai', model: str = 'gpt-4'):
         self.provider = provider.lower()
         self.model = model
         
-        # Initialize AI client based on provider
         if self.provider == 'openai':
-            openai.api_key = os.environ.get('OPENAI_API_KEY')
-            self.client = openai
+            self._request_completion = self._stream_openai
         elif self.provider == 'anthropic':
-            self.client = anthropic.Anthropic(
-                api_key=os.environ.get('ANTHROPIC_API_KEY')
-            )
+            self._request_completion = self._stream_anthropic
         else:
             raise ValueError(f"Unsupported AI provider: {provider}")
+        
+        # Every optimizer for a provider shares one async client and its connection pool;
+        # the sync methods run on the background loop, which owns those connections
+        self._http, self.client = _shared_client(self.provider)
+        
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self.stats = {'hits': 0, 'misses': 0}
+    
+    async def aclose(self):
+        """Close the provider's shared connection pool; the next optimizer opens a new one."""
+        with _clients_lock:
+            if _clients.get(self.provider, (None,))[0] is self._http:
+                del _clients[self.provider]
+        await self._http.aclose()
     
     def analyze_performance(self, backtest_data: Dict, optimization_type: str = 'parameters') -> Dict:
+        """Blocking wrapper around analyze_performance_async for sync callers."""
+        return _run(self.analyze_performance_async(backtest_data, optimization_type))
+    
+    def optimize_settings(self, performance_data: List[Dict], 
+                         current_settings: Dict, optimization_goals: List[str]) -> Dict:
+        """Blocking wrapper around optimize_settings_async for sync callers."""
+        return _run(self.optimize_settings_async(performance_data, current_settings, optimization_goals))
+    
+    def get_trading_suggestions(self, recent_performance: List[Dict], 
+                              current_settings: Dict) -> Dict:
+        """Blocking wrapper around get_trading_suggestions_async for sync callers."""
+        return _run(self.get_trading_suggestions_async(recent_performance, current_settings))
+    
+    def analyze_market_conditions(self, coins: List[str]) -> Dict:
+        """Blocking wrapper around analyze_market_conditions_async for sync callers."""
+        return _run(self.analyze_market_conditions_async(coins))
+    
+    def analyze_performance_batch(self, backtests: List[Dict], optimization_type: str = 'parameters') -> List[Dict]:
+        """Blocking wrapper around analyze_performance_batch_async for sync callers."""
+        return _run(self.analyze_performance_batch_async(backtests, optimization_type))
+    
+    async def analyze_performance_async(self, backtest_data: Dict, optimization_type: str = 'parameters') -> Dict:
         """
         Analyze backtest performance and provide optimization recommendations.
         
@@ -45,7 +422,7 @@ class AIOptimizer:
             prompt = self._create_analysis_prompt(backtest_data, optimization_type)
             
             # Get AI response
-            ai_response = self._get_ai_response(prompt)
+            ai_response = await self._get_ai_response_async(prompt, ANALYSIS_INSTRUCTIONS, ANALYSIS_MAX_TOKENS)
             
             if ai_response:
                 # Parse AI recommendations
@@ -58,7 +435,7 @@ class AIOptimizer:
                     'recommendations': recommendations,
                     'confidence_score': self._calculate_confidence(ai_response),
                     'expected_improvement': self._estimate_improvement(recommendations, backtest_data),
-                    'timestamp': datetime.utcnow().isoformat()
+                    'timestamp': datetime.now(timezone.utc).isoformat()
                 }
             else:
                 return {
@@ -73,8 +450,75 @@ class AIOptimizer:
                 'error': str(e)
             }
     
-    def optimize_settings(self, performance_data: List[Dict], 
-                         current_settings: Dict, optimization_goals: List[str]) -> Dict:
+    async def analyze_performance_batch_async(self, backtests: List[Dict],
+                                              optimization_type: str = 'parameters') -> List[Dict]:
+        """
+        Analyze several backtests with a single AI request instead of one request each.
+        
+        Args:
+            backtests: Backtest data dicts, as passed to analyze_performance
+            optimization_type: Type of optimization (parameters, strategy, risk_management)
+            
+        Returns:
+            List[Dict]: One analysis result per backtest, in input order
+        """
+        try:
+            prompt = ''.join(
+                f"\nBACKTEST {i}:{self._create_analysis_prompt(backtest_data, optimization_type)}"
+                for i, backtest_data in enumerate(backtests)
+            )
+            
+            ai_response = await self._get_ai_response_async(
+                prompt, BATCH_ANALYSIS_INSTRUCTIONS, BATCH_MAX_TOKENS, opener='['
+            )
+            if not ai_response:
+                return [{'success': False, 'error': 'Failed to get AI response'} for _ in backtests]
+            
+            # The model's index is used only if it names a backtest not yet answered;
+            # a missing, out-of-range or repeated index falls back to list position
+            analyses = {}
+            unplaced = []
+            for position, analysis in enumerate(self._parse_batch_analyses(ai_response)):
+                if not isinstance(analysis, dict):
+                    continue
+                index = analysis.get('index')
+                if (isinstance(index, int) and not isinstance(index, bool)
+                        and 0 <= index < len(backtests) and index not in analyses):
+                    analyses[index] = analysis
+                else:
+                    unplaced.append((position, analysis))
+            for position, analysis in unplaced:
+                if position < len(backtests) and position not in analyses:
+                    analyses[position] = analysis
+            
+            timestamp = datetime.now(timezone.utc).isoformat()
+            results = []
+            for i, backtest_data in enumerate(backtests):
+                analysis = analyses.get(i)
+                if analysis is None:
+                    results.append({'success': False, 'error': 'No analysis returned for backtest'})
+                    continue
+                
+                # Each backtest keeps its own slice of the response
+                response = orjson.dumps(analysis).decode()
+                recommendations = analysis.get('recommendations') or {}
+                results.append({
+                    'success': True,
+                    'prompt': prompt,
+                    'response': response,
+                    'recommendations': recommendations,
+                    'confidence_score': self._calculate_confidence(response),
+                    'expected_improvement': self._estimate_improvement(recommendations, backtest_data),
+                    'timestamp': timestamp
+                })
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error in batched AI analysis: {str(e)}")
+            return [{'success': False, 'error': str(e)} for _ in backtests]
+    
+    async def optimize_settings_async(self, performance_data: List[Dict], 
+                                      current_settings: Dict, optimization_goals: List[str]) -> Dict:
         """
         Optimize trading settings based on historical performance data.
         
@@ -91,7 +535,7 @@ class AIOptimizer:
                 performance_data, current_settings, optimization_goals
             )
             
-            ai_response = self._get_ai_response(prompt)
+            ai_response = await self._get_ai_response_async(prompt, OPTIMIZATION_INSTRUCTIONS, OPTIMIZATION_MAX_TOKENS)
             
             if ai_response:
                 recommendations = self._parse_settings_recommendations(ai_response)
@@ -102,8 +546,9 @@ class AIOptimizer:
                     'response': ai_response,
                     'recommendations': recommendations,
                     'confidence_score': self._calculate_confidence(ai_response),
-                    'expected_improvement': self._estimate_settings_improvement(recommendations),
-                    'timestamp': datetime.utcnow().isoformat()
+                    # 2.5% per optimized setting, capped at 15%
+                    'expected_improvement': min(len(recommendations) * 2.5, 15.0),
+                    'timestamp': datetime.now(timezone.utc).isoformat()
                 }
             else:
                 return {
@@ -118,8 +563,8 @@ class AIOptimizer:
                 'error': str(e)
             }
     
-    def get_trading_suggestions(self, recent_performance: List[Dict], 
-                              current_settings: Dict) -> Dict:
+    async def get_trading_suggestions_async(self, recent_performance: List[Dict], 
+                                            current_settings: Dict) -> Dict:
         """
         Get general trading suggestions based on recent performance.
         
@@ -133,7 +578,7 @@ class AIOptimizer:
         try:
             prompt = self._create_suggestions_prompt(recent_performance, current_settings)
             
-            ai_response = self._get_ai_response(prompt)
+            ai_response = await self._get_ai_response_async(prompt, SUGGESTIONS_INSTRUCTIONS, SUGGESTIONS_MAX_TOKENS)
             
             if ai_response:
                 suggestions = self._parse_suggestions(ai_response)
@@ -142,7 +587,7 @@ class AIOptimizer:
                     'success': True,
                     'suggestions': suggestions,
                     'confidence': self._calculate_confidence(ai_response),
-                    'timestamp': datetime.utcnow().isoformat()
+                    'timestamp': datetime.now(timezone.utc).isoformat()
                 }
             else:
                 return {
@@ -157,7 +602,7 @@ class AIOptimizer:
                 'error': str(e)
             }
     
-    def analyze_market_conditions(self, coins: List[str]) -> Dict:
+    async def analyze_market_conditions_async(self, coins: List[str]) -> Dict:
         """
         Analyze current market conditions for given coins.
         
@@ -170,7 +615,7 @@ class AIOptimizer:
         try:
             prompt = self._create_market_analysis_prompt(coins)
             
-            ai_response = self._get_ai_response(prompt)
+            ai_response = await self._get_ai_response_async(prompt, MARKET_ANALYSIS_INSTRUCTIONS, MARKET_ANALYSIS_MAX_TOKENS)
             
             if ai_response:
                 analysis = self._parse_market_analysis(ai_response)
@@ -180,7 +625,7 @@ class AIOptimizer:
                     'analysis': analysis,
                     'recommendations': analysis.get('recommendations', []),
                     'sentiment': analysis.get('sentiment', 'neutral'),
-                    'timestamp': datetime.utcnow().isoformat()
+                    'timestamp': datetime.now(timezone.utc).isoformat()
                 }
             else:
                 return {
@@ -195,35 +640,94 @@ class AIOptimizer:
                 'error': str(e)
             }
     
-    def _get_ai_response(self, prompt: str) -> Optional[str]:
-        """Get response from AI provider."""
+    async def _get_ai_response_async(self, prompt: str, instructions: str,
+                                     max_tokens: int, opener: str = '{') -> Optional[str]:
+        """Get response from AI provider, reusing a cached response to the same prompt."""
+        key = _response_cache_key(self.provider, self.model, instructions, prompt, max_tokens, TEMPERATURE)
+        if key:
+            cached = cache.get(key)
+            if cached is not None:
+                self.stats['hits'] += 1
+                return cached.decode()
+        self.stats['misses'] += 1
+        
         try:
-            if self.provider == 'openai':
-                response = self.client.ChatCompletion.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": "You are an expert cryptocurrency trading analyst and optimizer."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=2000,
-                    temperature=0.7
-                )
-                return response.choices[0].message.content
-                
-            elif self.provider == 'anthropic':
-                response = self.client.messages.create(
-                    model=self.model,
-                    max_tokens=2000,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                return response.content[0].text
-                
+            for attempt in range(MAX_ATTEMPTS):
+                try:
+                    await _limiter.wait()
+                    async with self._semaphore:
+                        response = await self._request_completion(prompt, instructions, max_tokens, opener)
+                    break
+                except RETRYABLE_ERRORS as e:
+                    if attempt == MAX_ATTEMPTS - 1:
+                        raise
+                    delay = min(2 ** attempt + random.random(), MAX_BACKOFF)
+                    logger.warning(f"AI provider call failed, retrying in {delay:.1f}s: {str(e)}")
+                    await asyncio.sleep(delay)
+            
+            if response and key:
+                cache.set(key, response.encode(), RESPONSE_CACHE_TIMEOUT)
+            return response
         except Exception as e:
             logger.error(f"Error getting AI response: {str(e)}")
             return None
     
+    # One of these is bound as _request_completion in __init__. Both stream the
+    # completion and stop once its JSON is complete, since only the JSON is parsed
+    # and any prose the model writes after it is never waited for.
+    
+    async def _stream_openai(self, prompt: str, instructions: str, max_tokens: int,
+                             opener: str) -> Optional[str]:
+        """Stream one OpenAI chat completion."""
+        scanner = _JsonStreamScanner(opener)
+        # JSON mode only produces objects, so a batched array is left unconstrained
+        options = {}
+        if opener == '{' and self.model.startswith(JSON_MODE_MODELS):
+            options['response_format'] = {"type": "json_object"}
+        
+        # OpenAI caches long identical prefixes automatically
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                _openai_system_message(instructions),
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max_tokens,
+            temperature=TEMPERATURE,
+            stream=True,
+            **options
+        )
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if scanner.feed(chunk.choices[0].delta.content):
+                        break
+        finally:
+            await stream.response.aclose()
+        return scanner.text or None
+    
+    async def _stream_anthropic(self, prompt: str, instructions: str, max_tokens: int,
+                                opener: str) -> Optional[str]:
+        """Stream one Anthropic message."""
+        scanner = _JsonStreamScanner(opener)
+        # Prefilling the reply with the opening bracket makes the model continue with JSON
+        scanner.feed(opener)
+        async with self.client.messages.stream(
+            model=self.model,
+            max_tokens=max_tokens,
+            temperature=TEMPERATURE,
+            system=_anthropic_system(instructions),
+            messages=[
+                {"role": "user", "content": prompt},
+                {"role": "assistant", "content": opener}
+            ]
+        ) as stream:
+            async for text in stream.text_stream:
+                if scanner.feed(text):
+                    break
+        text = scanner.text
+        return text if text != opener else None
+    
     def _create_analysis_prompt(self, backtest_data: Dict, optimization_type: str) -> str:
         """Create analysis prompt for AI."""
         results = backtest_data['results']
@@ -248,139 +752,57 @@ CURRENT SETTINGS:
 - Target Distribution: {settings.get('target_distribution', [50, 30, 20])}
 
 OPTIMIZATION TYPE: {optimization_type}
-
-Please provide specific recommendations to improve performance. Focus on:
-1. Parameter adjustments for better risk/reward
-2. Entry and exit strategy improvements
-3. Risk management optimization
-4. Expected impact of each recommendation
-
-Format your response as JSON with the following structure:
-{{
-    "analysis": "Detailed analysis of current performance",
-    "recommendations": {{
-        "parameter_name": new_value,
-        "another_parameter": new_value
-    }},
-    "reasoning": "Explanation for each recommendation",
-    "expected_improvement": "Estimated improvement percentage",
-    "confidence": "Confidence level (0-1)"
-}}
 """
         return prompt
     
     def _create_optimization_prompt(self, performance_data: List[Dict], 
                                   current_settings: Dict, optimization_goals: List[str]) -> str:
         """Create optimization prompt for AI."""
-        prompt = f"""
+        parts = [f"""
 Optimize trading settings based on the following historical performance data:
 
 CURRENT SETTINGS:
-{json.dumps(current_settings, indent=2)}
+{orjson.dumps(current_settings, option=orjson.OPT_SORT_KEYS).decode()}
 
 HISTORICAL PERFORMANCE:
-"""
+"""]
         for i, data in enumerate(performance_data):
             results = data['results']
-            prompt += f"""
+            parts.append(f"""
 Backtest {i+1}:
 - PnL: {results.get('total_pnl_percentage', 0):.2f}%
 - Win Rate: {results.get('win_rate', 0):.2f}%
 - Max Drawdown: {results.get('max_drawdown', 0):.2f}%
-"""
+""")
         
-        prompt += f"""
+        parts.append(f"""
 OPTIMIZATION GOALS: {', '.join(optimization_goals)}
-
-Please provide optimized settings that would improve performance based on the historical data.
-Focus on finding the best balance between the specified goals.
-
-Return your response as JSON with optimized parameter values:
-{{
-    "optimized_settings": {{
-        "parameter_name": new_value
-    }},
-    "reasoning": "Explanation for the optimizations",
-    "expected_improvement": estimated_improvement_percentage,
-    "confidence": confidence_level
-}}
-"""
-        return prompt
+""")
+        return ''.join(parts)
     
     def _create_suggestions_prompt(self, recent_performance: List[Dict], 
                                  current_settings: Dict) -> str:
         """Create suggestions prompt for AI."""
-        prompt = f"""
+        parts = ["""
 Provide trading improvement suggestions based on recent performance:
 
 RECENT PERFORMANCE:
-"""
+"""]
         for i, result in enumerate(recent_performance):
-            prompt += f"""
+            parts.append(f"""
 Backtest {i+1}: PnL: {result.get('total_pnl_percentage', 0):.2f}%, Win Rate: {result.get('win_rate', 0):.2f}%
-"""
+""")
         
-        prompt += f"""
+        parts.append(f"""
 CURRENT SETTINGS:
-{json.dumps(current_settings, indent=2)}
-
-Provide actionable suggestions for improvement. Include:
-1. Market condition adaptations
-2. Risk management improvements  
-3. Entry/exit timing optimizations
-4. General trading strategy advice
-
-Format as JSON:
-{{
-    "suggestions": [
-        {{
-            "category": "risk_management|strategy|timing|market_adaptation",
-            "title": "Suggestion title",
-            "description": "Detailed description",
-            "priority": "high|medium|low",
-            "implementation": "How to implement this suggestion"
-        }}
-    ],
-    "summary": "Overall assessment and key insights"
-}}
-"""
-        return prompt
+{orjson.dumps(current_settings, option=orjson.OPT_SORT_KEYS).decode()}
+""")
+        return ''.join(parts)
     
     def _create_market_analysis_prompt(self, coins: List[str]) -> str:
         """Create market analysis prompt for AI."""
         prompt = f"""
 Analyze current market conditions for the following cryptocurrencies: {', '.join(coins)}
-
-Please provide:
-1. Overall market sentiment analysis
-2. Individual coin assessments
-3. Trading recommendations based on current conditions
-4. Risk factors to consider
-5. Optimal strategy suggestions for current market
-
-Format your response as JSON:
-{{
-    "market_sentiment": "bullish|bearish|neutral|uncertain",
-    "overall_analysis": "General market assessment",
-    "coin_analysis": {{
-        "COIN": {{
-            "sentiment": "bullish|bearish|neutral",
-            "key_factors": ["factor1", "factor2"],
-            "recommendation": "buy|sell|hold|avoid"
-        }}
-    }},
-    "recommendations": [
-        {{
-            "action": "Recommended action",
-            "reasoning": "Why this action is recommended",
-            "timeframe": "short|medium|long term"
-        }}
-    ],
-    "risk_factors": ["factor1", "factor2"],
-    "strategy_suggestions": ["suggestion1", "suggestion2"]
-}}
-
-Note: Base your analysis on general market principles and technical analysis concepts.
 """
         return prompt
     
@@ -388,11 +810,8 @@ Note: Base your analysis on general market principles and technical analysis con
         """Parse AI response into structured recommendations."""
         try:
             # Try to extract JSON from the response
-            import re
-            json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                parsed = json.loads(json_str)
+            parsed = _extract_json(ai_response)
+            if parsed is not None:
                 return parsed.get('recommendations', {})
             else:
                 # Fallback: create basic recommendations
@@ -402,14 +821,20 @@ Note: Base your analysis on general market principles and technical analysis con
             logger.error(f"Error parsing AI recommendations: {str(e)}")
             return self._create_fallback_recommendations(optimization_type)
     
+    def _parse_batch_analyses(self, ai_response: str) -> List[Dict]:
+        """Parse AI response for a batched analysis into its list of per-backtest objects."""
+        try:
+            parsed = _extract_json(ai_response, '[')
+            return parsed if parsed is not None else []
+        except Exception as e:
+            logger.error(f"Error parsing batched analyses: {str(e)}")
+            return []
+    
     def _parse_settings_recommendations(self, ai_response: str) -> Dict:
         """Parse AI response for settings optimization."""
         try:
-            import re
-            json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                parsed = json.loads(json_str)
+            parsed = _extract_json(ai_response)
+            if parsed is not None:
                 return parsed.get('optimized_settings', {})
             else:
                 return {}
@@ -420,11 +845,8 @@ Note: Base your analysis on general market principles and technical analysis con
     def _parse_suggestions(self, ai_response: str) -> List[Dict]:
         """Parse AI response for trading suggestions."""
         try:
-            import re
-            json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                parsed = json.loads(json_str)
+            parsed = _extract_json(ai_response)
+            if parsed is not None:
                 return parsed.get('suggestions', [])
             else:
                 return []
@@ -435,11 +857,9 @@ Note: Base your analysis on general market principles and technical analysis con
     def _parse_market_analysis(self, ai_response: str) -> Dict:
         """Parse AI response for market analysis."""
         try:
-            import re
-            json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                return json.loads(json_str)
+            parsed = _extract_json(ai_response)
+            if parsed is not None:
+                return parsed
             else:
                 return {'sentiment': 'neutral', 'analysis': 'Unable to parse market analysis'}
         except Exception as e:
@@ -448,41 +868,18 @@ Note: Base your analysis on general market principles and technical analysis con
     
     def _calculate_confidence(self, ai_response: str) -> float:
         """Calculate confidence score based on AI response."""
-        # Simple confidence calculation based on response length and keywords
-        confidence_keywords = ['confident', 'strong', 'clear', 'significant', 'highly']
-        uncertainty_keywords = ['uncertain', 'might', 'possibly', 'unclear', 'difficult']
-        
-        response_lower = ai_response.lower()
-        confidence_count = sum(1 for word in confidence_keywords if word in response_lower)
-        uncertainty_count = sum(1 for word in uncertainty_keywords if word in response_lower)
+        # Each keyword counts once, however often it appears
+        found = {match.lower() for match in _CONFIDENCE_RE.findall(ai_response)}
         
         base_confidence = 0.5
-        confidence_boost = confidence_count * 0.1
-        uncertainty_penalty = uncertainty_count * 0.1
+        adjustment = sum(CONFIDENCE_WEIGHTS[word] for word in found)
         
-        return max(0.1, min(1.0, base_confidence + confidence_boost - uncertainty_penalty))
+        return max(0.1, min(1.0, base_confidence + adjustment))
     
     def _estimate_improvement(self, recommendations: Dict, backtest_data: Dict) -> float:
         """Estimate potential improvement from recommendations."""
-        # Simple estimation based on number and type of recommendations
-        improvement_factors = {
-            'default_leverage': 5.0,
-            'risk_percentage': 3.0,
-            'entry_distribution': 2.0,
-            'target_distribution': 2.0,
-            'entry_steps': 1.5
-        }
-        
-        total_improvement = 0
-        for param, value in recommendations.items():
-            factor = improvement_factors.get(param, 1.0)
-            total_improvement += factor
-        
-        return min(total_improvement, 20.0)  # Cap at 20% estimated improvement
-    
-    def _estimate_settings_improvement(self, recommendations: Dict) -> float:
-        """Estimate improvement from settings optimization."""
-        return min(len(recommendations) * 2.5, 15.0)  # Simple estimation
+        # Simple estimation based on number and type of recommendations, capped at 20%
+        return min(sum(self.IMPROVEMENT_FACTORS.get(param, 1.0) for param in recommendations), 20.0)
     
     def _create_fallback_recommendations(self, optimization_type: str) -> Dict:
         """Create fallback recommendations if AI parsing fails."""
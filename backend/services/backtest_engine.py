@@ -1,13 +1,222 @@
+import multiprocessing
 import requests
+import threading
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
-import pandas as pd
 import numpy as np
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Union
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Klines per (symbol, start ms, end ms) of closed windows, shared by every backtest in the process
+KLINES_CACHE_SIZE = 128
+_klines_cache = OrderedDict()
+_klines_lock = threading.Lock()
+
+# One symbol's 1h candles as parallel arrays, timestamps ascending
+HistArrays = namedtuple('HistArrays', ['timestamps', 'low', 'high', 'close'])
+
+# Binance returns at most this many candles per klines request
+KLINES_PAGE_LIMIT = 1000
+
+# Symbols fetched at once before a run; the fetches are network-bound
+PREFETCH_WORKERS = 8
+
+# Backtests with at least this many signals resolve price paths in worker processes
+PARALLEL_MIN_SIGNALS = 64
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Lazily start the shared backtest pool; spawn avoids forking a threaded worker."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+# One keep-alive session per process, shared by every engine and its prefetch threads
+_session = None
+_session_lock = threading.Lock()
+
+def _get_session() -> requests.Session:
+    """Lazily build the shared Binance session, retrying throttled or failed requests."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(
+                pool_connections=16,
+                pool_maxsize=16,
+                max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+            ))
+            session.headers.update({'Accept-Encoding': 'gzip'})
+            _session = session
+        return _session
+
+def _resolve_symbol_paths(symbol: str, historical_data: HistArrays, records: np.ndarray,
+                          zones: np.ndarray, targets: np.ndarray) -> List[Optional[Dict]]:
+    """Resolve one symbol's packed signals inside a pool worker."""
+    engine = BacktestEngine()
+    return [
+        engine._resolve_trade_path(symbol, historical_data, record, zones, targets)
+        for record in records
+    ]
+
+# Signal fields the engine reads; backtests store these column-wise
+SIGNAL_FIELDS = ('coin', 'pair', 'position_type', 'leverage', 'stop_loss', 'entry_zones', 'targets')
+
+def signals_to_columns(signals: List[Dict]) -> Dict[str, List]:
+    """Convert parsed signal dicts to one list per field (struct of arrays)."""
+    return {field: [signal.get(field) for signal in signals] for field in SIGNAL_FIELDS}
+
+def columns_to_signals(columns: Dict[str, List]) -> List[Dict]:
+    """Rebuild per-signal dicts from the column-wise layout."""
+    return [
+        dict(zip(SIGNAL_FIELDS, values))
+        for values in zip(*(columns[field] for field in SIGNAL_FIELDS))
+    ]
+
+# Equity points as stored by EquityCurveType, one record per completed trade
+EQUITY_DTYPE = np.dtype([('timestamp', '<M8[ms]'), ('balance', '<f8'), ('trade_pnl', '<f8')])
+
+# Per-signal scalars the price scans read; entry zones and targets are slices of flat arrays
+SIGNAL_DTYPE = np.dtype([
+    ('side', 'i1'), ('stop_loss', 'f8'),
+    ('zones_start', 'i4'), ('zones_end', 'i4'),
+    ('targets_start', 'i4'), ('targets_end', 'i4')
+])
+# Position types as the sign of a trade's return; anything else is 0
+SIDES = {'LONG': 1, 'SHORT': -1}
+
+def _pack_signals(signals: List[Dict]) -> tuple:
+    """
+    Pack the signal fields the price scans read into contiguous arrays.
+    
+    Returns:
+        tuple: (records, zones, targets) where records is a SIGNAL_DTYPE array,
+        zones holds every signal's entry zones in order and targets every
+        signal's targets, nearest first for its side
+    """
+    records = np.zeros(len(signals), dtype=SIGNAL_DTYPE)
+    records['side'] = [SIDES.get(signal.get('position_type'), 0) for signal in signals]
+    records['stop_loss'] = [signal.get('stop_loss') or 0 for signal in signals]
+    
+    zone_lists = [signal.get('entry_zones') or [] for signal in signals]
+    target_lists = [
+        sorted(signal.get('targets') or [], reverse=side < 0)
+        for signal, side in zip(signals, records['side'])
+    ]
+    for prefix, lists in (('zones', zone_lists), ('targets', target_lists)):
+        ends = np.cumsum([len(values) for values in lists])
+        records[f'{prefix}_end'] = ends
+        records[f'{prefix}_start'][1:] = ends[:-1]
+    
+    zones = np.array([zone for values in zone_lists for zone in values], dtype=float)
+    targets = np.array([target for values in target_lists for target in values], dtype=float)
+    return records, zones, targets
+
+# Candles compared per step of an entry or exit scan; most trades fill and exit within a week
+SCAN_BLOCK = 168
+
+def _scan_entry(lows: np.ndarray, highs: np.ndarray, zones: np.ndarray) -> tuple:
+    """First candle trading through an entry zone, one block at a time; (row, zone index) or (-1, -1)."""
+    for start in range(0, len(lows), SCAN_BLOCK):
+        block_lows = lows[start:start + SCAN_BLOCK]
+        block_highs = highs[start:start + SCAN_BLOCK]
+        
+        # hits[i, j]: entry zone j traded inside candle i
+        hits = (block_lows[:, None] <= zones) & (zones <= block_highs[:, None])
+        hit_rows = hits.any(axis=1)
+        if hit_rows.any():
+            # First candle with a hit, then the first zone hit in that candle
+            row = hit_rows.argmax()
+            return start + row, hits[row].argmax()
+    
+    return -1, -1
+
+def _scan_exit(lows: np.ndarray, highs: np.ndarray, levels: np.ndarray,
+               stop_loss: Optional[float], is_long: bool) -> tuple:
+    """
+    Find the first candle hitting the stop loss or a target, one block at a time.
+    
+    Args:
+        lows: Candle lows after entry
+        highs: Candle highs after entry
+        levels: Targets ordered nearest first for the position side
+        stop_loss: Stop loss price, if any
+        is_long: True for LONG, False for SHORT
+        
+    Returns:
+        tuple: (row, exit_price, exit_reason), or (-1, None, None) if nothing is hit
+    """
+    # hits[i, j]: barrier j touched in candle i; the stop loss comes first, so it wins ties
+    first_target = 1 if stop_loss else 0
+    for start in range(0, len(lows), SCAN_BLOCK):
+        block_lows = lows[start:start + SCAN_BLOCK]
+        block_highs = highs[start:start + SCAN_BLOCK]
+        
+        hits = np.empty((len(block_lows), first_target + len(levels)), dtype=bool)
+        if is_long:
+            if stop_loss:
+                hits[:, 0] = block_lows <= stop_loss
+            hits[:, first_target:] = block_highs[:, None] >= levels
+        else:
+            if stop_loss:
+                hits[:, 0] = block_highs >= stop_loss
+            hits[:, first_target:] = block_lows[:, None] <= levels
+        
+        hit_rows = hits.any(axis=1)
+        if hit_rows.any():
+            row = hit_rows.argmax()
+            barrier = hits[row].argmax()
+            if barrier < first_target:
+                return start + row, float(stop_loss), 'stop_loss'
+            return start + row, float(levels[barrier - first_target]), 'target'
+    
+    return -1, None, None
+
+def _scan_trade(data: HistArrays, zones: np.ndarray, levels: np.ndarray,
+                stop_loss: float, side: int) -> Optional[tuple]:
+    """
+    Find a trade's entry and exit candles in one pass over a symbol's arrays.
+    
+    The exit scan continues from the candle after entry on views of the same
+    arrays, so no post-entry copy or timestamp lookup is needed.
+    
+    Args:
+        data: The symbol's candles
+        zones: Entry zone prices
+        levels: Targets ordered nearest first for the position side
+        stop_loss: Stop loss price, 0 if not set
+        side: 1 for LONG, -1 for SHORT, 0 to hold until the last candle
+        
+    Returns:
+        Optional[tuple]: (entry_row, zone_index, exit_row, exit_price, exit_reason),
+        or None if the signal never fills before the last candle
+    """
+    entry_row, zone_index = _scan_entry(data.low, data.high, zones)
+    start = entry_row + 1
+    if entry_row < 0 or start >= len(data.low):
+        return None
+    
+    if side:
+        # Nearest target first, so a candle crossing several exits at the first one reached
+        row, exit_price, exit_reason = _scan_exit(
+            data.low[start:], data.high[start:], levels, stop_loss, side > 0
+        )
+        if row >= 0:
+            return entry_row, zone_index, start + row, exit_price, exit_reason
+    
+    # If no exit found, use last available price
+    return entry_row, zone_index, len(data.low) - 1, float(data.close[-1]), 'timeout'
+
 class BacktestEngine:
     """
     Backtesting engine for Telegram trading signals.
@@ -17,24 +226,29 @@ class BacktestEngine:
     def __init__(self):
         self.base_url = "https://api.binance.com"  # Using Binance for historical data
         
-    def run_backtest(self, signals: List[Dict], settings: Dict, 
+    def run_backtest(self, signals: Union[List[Dict], Dict[str, List]], settings: Dict, 
                     initial_balance: float = 1000.0,
                     start_date: datetime = None, 
-                    end_date: datetime = None) -> Dict:
+                    end_date: datetime = None,
+                    progress_cb: Optional[Callable[[float, str], None]] = None) -> Dict:
         """
         Run a complete backtest on the given signals.
         
         Args:
-            signals: List of parsed signal dictionaries
+            signals: Parsed signals, column-wise or as a list of dictionaries
             settings: Trading settings and configuration
             initial_balance: Starting balance in USDT
             start_date: Start date for backtest
             end_date: End date for backtest
+            progress_cb: Called as progress_cb(pct, message) as signals are resolved
             
         Returns:
             Dict: Complete backtest results with metrics
         """
         try:
+            if isinstance(signals, dict):
+                signals = columns_to_signals(signals)
+            
             # Default date range if not provided
             if not start_date:
                 start_date = datetime.utcnow() - timedelta(days=30)
@@ -45,56 +259,72 @@ class BacktestEngine:
             balance = initial_balance
             positions = {}
             trade_history = []
-            equity_curve = []
+            
+            # Equity records, one slot per possible trade
+            equity = np.empty(len(signals), dtype=EQUITY_DTYPE)
+            points = 0
             
             logger.info(f"Starting backtest with {len(signals)} signals from {start_date} to {end_date}")
+            self._prefetch_historical_data(signals, start_date, end_date)
             
-            # Process each signal
-            for signal in signals:
+            paths = self._resolve_trade_paths(signals, start_date, end_date, progress_cb)
+            
+            # Sizing depends on the running balance, so trades are applied in signal order
+            for signal, path in zip(signals, paths):
+                if not path:
+                    continue
                 try:
-                    if not signal.get('coin') or not signal.get('entry_zones'):
-                        continue
+                    trade_result = self._simulate_trade(signal, path, settings, balance)
+                    trade_history.append(trade_result)
+                    balance += trade_result['pnl']
                     
-                    # Simulate trade execution
-                    trade_result = self._simulate_trade(
-                        signal, settings, balance, start_date, end_date
-                    )
+                    # Record equity point
+                    equity[points] = (trade_result['exit_time'], balance, trade_result['pnl'])
+                    points += 1
                     
-                    if trade_result:
-                        trade_history.append(trade_result)
-                        balance += trade_result['pnl']
-                        
-                        # Record equity point
-                        equity_curve.append({
-                            'timestamp': trade_result['exit_time'],
-                            'balance': balance,
-                            'trade_pnl': trade_result['pnl']
-                        })
-                        
-                        logger.info(f"Trade completed: {signal['coin']} {signal['position_type']} PnL: {trade_result['pnl']:.2f}")
+                    # Per-trade logging is skipped entirely unless debugging; large runs have thousands
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Trade completed: %s %s PnL: %.2f",
+                                     signal['coin'], signal['position_type'], trade_result['pnl'])
                 
                 except Exception as e:
                     logger.error(f"Error processing signal {signal}: {str(e)}")
                     continue
             
+            # Every summary below reads this one array
+            pnls = np.fromiter((t['pnl'] for t in trade_history), dtype=float, count=len(trade_history))
+            winning_trades = int((pnls > 0).sum())
+            
+            equity = equity[:points]
+            
             # Calculate performance metrics
             metrics = self._calculate_metrics(
-                trade_history, initial_balance, balance, equity_curve
+                trade_history, initial_balance, balance, equity['balance'], pnls
             )
             
+            equity_curve = [
+                {'timestamp': timestamp, 'balance': point_balance, 'trade_pnl': trade_pnl}
+                for timestamp, point_balance, trade_pnl in zip(
+                    np.datetime_as_string(equity['timestamp'], unit='s').tolist(),
+                    equity['balance'].tolist(),
+                    equity['trade_pnl'].tolist()
+                )
+            ]
+            
             return {
                 'initial_balance': initial_balance,
                 'final_balance': balance,
                 'total_pnl': balance - initial_balance,
                 'total_pnl_percentage': ((balance - initial_balance) / initial_balance) * 100,
                 'total_trades': len(trade_history),
-                'winning_trades': sum(1 for t in trade_history if t['pnl'] > 0),
-                'losing_trades': sum(1 for t in trade_history if t['pnl'] <= 0),
-                'win_rate': (sum(1 for t in trade_history if t['pnl'] > 0) / len(trade_history) * 100) if trade_history else 0,
+                'winning_trades': winning_trades,
+                'losing_trades': len(trade_history) - winning_trades,
+                'win_rate': (winning_trades / len(trade_history) * 100) if trade_history else 0,
                 'max_drawdown': metrics['max_drawdown'],
                 'sharpe_ratio': metrics['sharpe_ratio'],
                 'trade_history': trade_history,
                 'equity_curve': equity_curve,
+                'equity_records': equity,
                 'metrics': metrics
             }
             
@@ -102,175 +332,331 @@ class BacktestEngine:
             logger.error(f"Backtest error: {str(e)}")
             raise
     
-    def _simulate_trade(self, signal: Dict, settings: Dict, balance: float,
-                       start_date: datetime, end_date: datetime) -> Optional[Dict]:
-        """Simulate a single trade based on signal and historical data."""
-        try:
-            coin = signal['coin']
-            pair = signal.get('pair', 'USDT')
-            symbol = f"{coin}{pair}"
-            position_type = signal['position_type']
-            entry_zones = signal.get('entry_zones', [])
-            targets = signal.get('targets', [])
-            stop_loss = signal.get('stop_loss')
-            
-            if not entry_zones:
-                return None
-            
-            # Get historical data
-            historical_data = self._get_historical_data(symbol, start_date, end_date)
-            if not historical_data:
-                return None
+    def run_sweep(self, signals: Union[List[Dict], Dict[str, List]], param_grid: List[Dict],
+                  initial_balance: float = 1000.0,
+                  start_date: datetime = None,
+                  end_date: datetime = None,
+                  progress_cb: Optional[Callable[[float, str], None]] = None) -> List[Dict]:
+        """
+        Run the same signals under many settings at once.
+        
+        Entry and exit points do not depend on settings, so each signal's
+        price path is resolved once and only position sizing and PnL are
+        computed per parameter set, vectorized across the whole grid.
+        
+        Args:
+            signals: Parsed signals, column-wise or as a list of dictionaries
+            param_grid: Settings overrides, one dict per parameter set
+            initial_balance: Starting balance in USDT
+            start_date: Start date for backtest
+            end_date: End date for backtest
+            progress_cb: Called as progress_cb(pct, message) as signals are resolved
             
-            # Calculate position size
-            position_size = self._calculate_position_size(
-                balance, settings.get('default_position_size', 10.0),
-                settings.get('risk_percentage', 2.0),
-                entry_zones[0], stop_loss
-            )
+        Returns:
+            List[Dict]: Summary metrics per parameter set, in grid order
+        """
+        if isinstance(signals, dict):
+            signals = columns_to_signals(signals)
+        if not start_date:
+            start_date = datetime.utcnow() - timedelta(days=30)
+        if not end_date:
+            end_date = datetime.utcnow()
+        
+        default_sizes = np.array([params.get('default_position_size', 10.0) for params in param_grid], dtype=float)
+        risk_percentages = np.array([params.get('risk_percentage', 2.0) for params in param_grid], dtype=float)
+        
+        # equity[p, t]: balance of parameter set p after trade t
+        balances = np.full(len(param_grid), float(initial_balance))
+        equity = [balances]
+        pnls = []
+        
+        logger.info(f"Starting sweep of {len(param_grid)} parameter sets over {len(signals)} signals")
+        self._prefetch_historical_data(signals, start_date, end_date)
+        
+        for signal, path in zip(signals, self._resolve_trade_paths(signals, start_date, end_date, progress_cb)):
+            if not path:
+                continue
             
-            # Find entry point
-            entry_price, entry_time = self._find_entry_point(
-                historical_data, entry_zones, position_type
+            sizes = self._calculate_position_sizes(
+                balances, default_sizes, risk_percentages,
+                signal['entry_zones'][0], signal.get('stop_loss')
             )
+            pnl = path['return'] * signal.get('leverage', 1) * sizes
+            balances = balances + pnl
+            equity.append(balances)
+            pnls.append(pnl)
+        
+        equity = np.column_stack(equity)
+        pnls = np.column_stack(pnls) if pnls else np.zeros((len(param_grid), 0))
+        
+        # Max drawdown against the running peak, as in _calculate_metrics
+        peaks = np.maximum.accumulate(equity, axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            max_drawdown = np.where(peaks > 0, (peaks - equity) / peaks * 100, 0.0).max(axis=1)
+            returns = np.where(equity[:, :-1] > 0, np.diff(equity, axis=1) / equity[:, :-1], 0.0)
+        if returns.shape[1]:
+            std = returns.std(axis=1)
+            sharpe_ratio = np.divide(
+                returns.mean(axis=1), std, out=np.zeros_like(std), where=std > 0
+            ) * np.sqrt(252)
+        else:
+            sharpe_ratio = np.zeros(len(param_grid))
+        
+        winning_trades = (pnls > 0).sum(axis=1)
+        gross_profit = np.where(pnls > 0, pnls, 0).sum(axis=1)
+        gross_loss = -np.where(pnls <= 0, pnls, 0).sum(axis=1)
+        profit_factor = np.divide(gross_profit, gross_loss, out=np.zeros_like(gross_profit), where=gross_loss > 0)
+        
+        total_trades = pnls.shape[1]
+        final_balance = equity[:, -1]
+        return [
+            {
+                'params': params,
+                'final_balance': final_balance[p],
+                'total_pnl': final_balance[p] - initial_balance,
+                'total_pnl_percentage': (final_balance[p] - initial_balance) / initial_balance * 100,
+                'total_trades': total_trades,
+                'winning_trades': int(winning_trades[p]),
+                'losing_trades': total_trades - int(winning_trades[p]),
+                'win_rate': winning_trades[p] / total_trades * 100 if total_trades else 0,
+                'max_drawdown': max_drawdown[p],
+                'sharpe_ratio': sharpe_ratio[p],
+                'profit_factor': profit_factor[p]
+            }
+            for p, params in enumerate(param_grid)
+        ]
+    
+    def _simulate_trade(self, signal: Dict, path: Dict, settings: Dict, balance: float) -> Dict:
+        """Size a resolved trade against the current balance and build its record."""
+        # Calculate position size
+        position_size = self._calculate_position_size(
+            balance, settings.get('default_position_size', 10.0),
+            settings.get('risk_percentage', 2.0),
+            signal['entry_zones'][0], signal.get('stop_loss')
+        )
+        
+        # Apply leverage
+        leverage = signal.get('leverage', 1)
+        pnl = path['return'] * position_size * leverage
+        
+        entry_time = path['entry_time']
+        exit_time = path['exit_time']
+        return {
+            'coin': signal['coin'],
+            'symbol': path['symbol'],
+            'position_type': signal['position_type'],
+            'entry_price': path['entry_price'],
+            'exit_price': path['exit_price'],
+            'entry_time': entry_time.isoformat(),
+            'exit_time': exit_time.isoformat(),
+            'position_size': position_size,
+            'leverage': leverage,
+            'pnl': pnl,
+            'pnl_percentage': (pnl / position_size) * 100,
+            'exit_reason': path['exit_reason'],
+            'duration_hours': (exit_time - entry_time).total_seconds() / 3600
+        }
+    
+    def _resolve_trade_paths(self, signals: List[Dict], start_date: datetime, end_date: datetime,
+                             progress_cb: Optional[Callable[[float, str], None]] = None) -> List[Optional[Dict]]:
+        """
+        Resolve every signal's price path, one task per symbol.
+        
+        Paths do not depend on balance or settings, so large backtests resolve
+        them in worker processes; the caller applies sizing in signal order.
+        
+        Args:
+            signals: Parsed signals as a list of dictionaries
+            start_date: Start date for backtest
+            end_date: End date for backtest
+            progress_cb: Called as progress_cb(pct, message) after each symbol
             
-            if not entry_price:
+        Returns:
+            List[Optional[Dict]]: Path per signal, None where no trade happened
+        """
+        by_symbol = {}
+        for index, signal in enumerate(signals):
+            if signal.get('coin') and signal.get('entry_zones'):
+                by_symbol.setdefault(self._signal_symbol(signal), []).append(index)
+        
+        tasks = []
+        for symbol, indexes in by_symbol.items():
+            historical_data = self._get_historical_data(symbol, start_date, end_date)
+            if historical_data is not None and len(historical_data.timestamps):
+                tasks.append((symbol, historical_data, indexes))
+        
+        records, zones, targets = _pack_signals(signals)
+        paths = [None] * len(signals)
+        resolved = len(signals) - sum(len(indexes) for _, _, indexes in tasks)
+        completed = 0
+        if len(tasks) > 1 and len(signals) - resolved >= PARALLEL_MIN_SIGNALS:
+            try:
+                pool = _get_pool()
+                futures = [
+                    pool.submit(_resolve_symbol_paths, symbol, historical_data, records[indexes], zones, targets)
+                    for symbol, historical_data, indexes in tasks
+                ]
+                for (_, _, indexes), future in zip(tasks, futures):
+                    for index, path in zip(indexes, future.result()):
+                        paths[index] = path
+                    completed += 1
+                    resolved += len(indexes)
+                    if progress_cb:
+                        progress_cb(resolved / len(signals) * 100, f"Processed {resolved}/{len(signals)} signals")
+            except Exception as e:
+                logger.warning(f"Parallel path resolution failed, resolving serially: {str(e)}")
+        
+        for symbol, historical_data, indexes in tasks[completed:]:
+            for index in indexes:
+                paths[index] = self._resolve_trade_path(symbol, historical_data, records[index], zones, targets)
+            resolved += len(indexes)
+            if progress_cb:
+                progress_cb(resolved / len(signals) * 100, f"Processed {resolved}/{len(signals)} signals")
+        
+        return paths
+    
+    def _resolve_trade_path(self, symbol: str, historical_data: HistArrays, record: np.void,
+                            zones: np.ndarray, targets: np.ndarray) -> Optional[Dict]:
+        """Find a packed signal's entry and exit in historical data; independent of settings."""
+        try:
+            entry_zones = zones[record['zones_start']:record['zones_end']]
+            if not len(entry_zones):
                 return None
             
-            # Find exit point (target or stop loss)
-            exit_price, exit_time, exit_reason = self._find_exit_point(
-                historical_data, entry_time, targets, stop_loss, position_type
+            # Find entry and exit point (target or stop loss) in one scan
+            trade = _scan_trade(
+                historical_data, entry_zones,
+                targets[record['targets_start']:record['targets_end']],
+                record['stop_loss'], record['side']
             )
+            if not trade:
+                return None
             
-            if not exit_price:
+            entry_row, zone_index, exit_row, exit_price, exit_reason = trade
+            entry_price = float(entry_zones[zone_index])
+            if not entry_price or not exit_price:
                 return None
+            entry_time = historical_data.timestamps[entry_row]
+            exit_time = historical_data.timestamps[exit_row]
             
-            # Calculate PnL
-            if position_type == 'LONG':
-                pnl = (exit_price - entry_price) / entry_price * position_size
+            # Unleveraged return per unit of position size
+            if record['side'] > 0:
+                trade_return = (exit_price - entry_price) / entry_price
             else:  # SHORT
-                pnl = (entry_price - exit_price) / entry_price * position_size
-            
-            # Apply leverage
-            leverage = signal.get('leverage', 1)
-            pnl *= leverage
+                trade_return = (entry_price - exit_price) / entry_price
             
             return {
-                'coin': coin,
                 'symbol': symbol,
-                'position_type': position_type,
                 'entry_price': entry_price,
                 'exit_price': exit_price,
-                'entry_time': entry_time.isoformat(),
-                'exit_time': exit_time.isoformat(),
-                'position_size': position_size,
-                'leverage': leverage,
-                'pnl': pnl,
-                'pnl_percentage': (pnl / position_size) * 100,
+                'entry_time': entry_time.item(),
+                'exit_time': exit_time.item(),
                 'exit_reason': exit_reason,
-                'duration_hours': (exit_time - entry_time).total_seconds() / 3600
+                'return': trade_return
             }
             
         except Exception as e:
-            logger.error(f"Error simulating trade for {signal}: {str(e)}")
+            logger.error(f"Error resolving trade path for {symbol}: {str(e)}")
             return None
     
+    @staticmethod
+    def _signal_symbol(signal: Dict) -> str:
+        """Trading symbol for a signal, e.g. BTCUSDT."""
+        return f"{signal['coin']}{signal.get('pair') or 'USDT'}"
+    
+    def _prefetch_historical_data(self, signals: List[Dict], start_date: datetime,
+                                  end_date: datetime):
+        """Fetch every symbol the signals trade concurrently, so the signal loop reads from cache."""
+        symbols = {
+            self._signal_symbol(signal)
+            for signal in signals
+            if signal.get('coin') and signal.get('entry_zones')
+        }
+        if not symbols:
+            return
+        with ThreadPoolExecutor(max_workers=min(PREFETCH_WORKERS, len(symbols))) as executor:
+            list(executor.map(lambda symbol: self._get_historical_data(symbol, start_date, end_date), symbols))
+    
     def _get_historical_data(self, symbol: str, start_date: datetime, 
-                           end_date: datetime) -> Optional[pd.DataFrame]:
-        """Get historical price data from Binance API."""
+                           end_date: datetime) -> Optional[HistArrays]:
+        """Get historical price data from Binance API, reusing recent fetches of the same window."""
+        # Convert to Binance symbol format
+        if symbol.endswith('USDT'):
+            binance_symbol = symbol
+        else:
+            binance_symbol = f"{symbol}USDT"
+        
+        # Convert dates to milliseconds
+        start_ms = int(start_date.timestamp() * 1000)
+        end_ms = int(end_date.timestamp() * 1000)
+        
+        key = (binance_symbol, start_ms, end_ms)
+        with _klines_lock:
+            hist = _klines_cache.get(key)
+            if hist is not None:
+                _klines_cache.move_to_end(key)
+                return hist
+            # A cached window covering this one is sliced instead of fetched again
+            for (cached_symbol, cached_start, cached_end), cached in _klines_cache.items():
+                if cached_symbol == binance_symbol and cached_start <= start_ms and end_ms <= cached_end:
+                    first = np.searchsorted(cached.timestamps, np.datetime64(start_ms, 'ms'), side='left')
+                    last = np.searchsorted(cached.timestamps, np.datetime64(end_ms, 'ms'), side='right')
+                    return HistArrays(*(column[first:last] for column in cached))
+        
+        hist = self._fetch_klines(binance_symbol, start_ms, end_ms)
+        # Candles of the current hour are still forming, so only closed windows are kept
+        if hist is not None and end_ms < int(time.time() * 1000) // 3600000 * 3600000:
+            with _klines_lock:
+                _klines_cache[key] = hist
+                while len(_klines_cache) > KLINES_CACHE_SIZE:
+                    _klines_cache.popitem(last=False)
+        return hist
+    
+    def _fetch_klines(self, binance_symbol: str, start_ms: int, end_ms: int) -> Optional[HistArrays]:
+        """Fetch 1h klines for a symbol from Binance, paging past the per-request limit."""
         try:
-            # Convert to Binance symbol format
-            if symbol.endswith('USDT'):
-                binance_symbol = symbol
-            else:
-                binance_symbol = f"{symbol}USDT"
-            
-            # Convert dates to milliseconds
-            start_ms = int(start_date.timestamp() * 1000)
-            end_ms = int(end_date.timestamp() * 1000)
-            
             # Get kline data (1 hour intervals)
             url = f"{self.base_url}/api/v3/klines"
-            params = {
-                'symbol': binance_symbol,
-                'interval': '1h',
-                'startTime': start_ms,
-                'endTime': end_ms,
-                'limit': 1000
-            }
-            
-            response = requests.get(url, params=params)
-            if response.status_code != 200:
-                logger.warning(f"Failed to get data for {symbol}: {response.status_code}")
-                return None
-            
-            data = response.json()
-            
-            # Convert to DataFrame
-            df = pd.DataFrame(data, columns=[
-                'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_asset_volume', 'number_of_trades',
-                'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
-            ])
-            
-            # Convert data types
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            for col in ['open', 'high', 'low', 'close', 'volume']:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            df.set_index('timestamp', inplace=True)
+            data = []
+            while start_ms < end_ms:
+                params = {
+                    'symbol': binance_symbol,
+                    'interval': '1h',
+                    'startTime': start_ms,
+                    'endTime': end_ms,
+                    'limit': KLINES_PAGE_LIMIT
+                }
+                
+                response = _get_session().get(url, params=params)
+                if response.status_code != 200:
+                    logger.warning(f"Failed to get data for {binance_symbol}: {response.status_code}")
+                    return None
+                
+                page = response.json()
+                data.extend(page)
+                if len(page) < KLINES_PAGE_LIMIT:
+                    break
+                # Resume after the last candle's close time
+                start_ms = page[-1][6] + 1
+            
+            # Kline rows are [open_time, open, high, low, close, ...] with prices as strings
+            if not data:
+                return HistArrays(np.empty(0, dtype='datetime64[ms]'), np.empty(0), np.empty(0), np.empty(0))
+            rows = np.asarray(data, dtype=object)
+            hist = HistArrays(
+                timestamps=rows[:, 0].astype(np.int64).astype('datetime64[ms]'),
+                low=rows[:, 3].astype(float),
+                high=rows[:, 2].astype(float),
+                close=rows[:, 4].astype(float)
+            )
             
-            logger.info(f"Got {len(df)} data points for {symbol}")
-            return df
+            logger.debug("Got %d data points for %s", len(hist.timestamps), binance_symbol)
+            return hist
             
         except Exception as e:
-            logger.error(f"Error getting historical data for {symbol}: {str(e)}")
+            logger.error(f"Error getting historical data for {binance_symbol}: {str(e)}")
             return None
     
-    def _find_entry_point(self, data: pd.DataFrame, entry_zones: List[float],
-                         position_type: str) -> tuple:
-        """Find the first valid entry point in historical data."""
-        for idx, row in data.iterrows():
-            price_range = [row['low'], row['high']]
-            
-            for entry_price in entry_zones:
-                # Check if entry price was hit during this candle
-                if price_range[0] <= entry_price <= price_range[1]:
-                    return entry_price, idx
-        
-        return None, None
-    
-    def _find_exit_point(self, data: pd.DataFrame, entry_time: datetime,
-                        targets: List[float], stop_loss: float,
-                        position_type: str) -> tuple:
-        """Find exit point (target or stop loss) after entry."""
-        # Filter data after entry time
-        exit_data = data[data.index > entry_time]
-        
-        if exit_data.empty:
-            return None, None, None
-        
-        for idx, row in exit_data.iterrows():
-            price_range = [row['low'], row['high']]
-            
-            # Check stop loss first
-            if stop_loss:
-                if position_type == 'LONG' and price_range[0] <= stop_loss:
-                    return stop_loss, idx, 'stop_loss'
-                elif position_type == 'SHORT' and price_range[1] >= stop_loss:
-                    return stop_loss, idx, 'stop_loss'
-            
-            # Check targets
-            for target in targets:
-                if position_type == 'LONG' and price_range[1] >= target:
-                    return target, idx, 'target'
-                elif position_type == 'SHORT' and price_range[0] <= target:
-                    return target, idx, 'target'
-        
-        # If no exit found, use last available price
-        last_row = exit_data.iloc[-1]
-        return last_row['close'], exit_data.index[-1], 'timeout'
-    
     def _calculate_position_size(self, balance: float, default_size: float,
                                risk_percentage: float, entry_price: float,
                                stop_loss: float) -> float:
@@ -287,9 +673,24 @@ class BacktestEngine:
         
         return min(default_size, balance * 0.1)
     
+    def _calculate_position_sizes(self, balances: np.ndarray, default_sizes: np.ndarray,
+                                  risk_percentages: np.ndarray, entry_price: float,
+                                  stop_loss: float) -> np.ndarray:
+        """Vectorized _calculate_position_size over one balance per parameter set."""
+        if not stop_loss or not entry_price or stop_loss <= 0 or entry_price <= 0:
+            return np.minimum(default_sizes, balances * 0.1)
+        
+        risk_per_unit = abs(entry_price - stop_loss) / entry_price
+        if risk_per_unit > 0:
+            max_sizes = balances * (risk_percentages / 100) / risk_per_unit
+            return np.minimum(max_sizes, balances * 0.2)
+        
+        return np.minimum(default_sizes, balances * 0.1)
+    
     def _calculate_metrics(self, trade_history: List[Dict], initial_balance: float,
-                          final_balance: float, equity_curve: List[Dict]) -> Dict:
-        """Calculate advanced performance metrics."""
+                          final_balance: float, equity_balances: np.ndarray,
+                          pnls: Optional[np.ndarray] = None) -> Dict:
+        """Calculate advanced performance metrics; pnls may pass trade PnLs already gathered."""
         try:
             if not trade_history:
                 return {
@@ -299,42 +700,38 @@ class BacktestEngine:
                     'profit_factor': 0
                 }
             
-            # Convert equity curve to series for calculations
-            equity_values = [initial_balance] + [point['balance'] for point in equity_curve]
-            
-            # Calculate maximum drawdown
-            peak = equity_values[0]
-            max_drawdown = 0
-            
-            for value in equity_values:
-                if value > peak:
-                    peak = value
-                drawdown = (peak - value) / peak * 100
-                max_drawdown = max(max_drawdown, drawdown)
+            # Equity after each trade, preceded by the starting balance
+            equity_values = np.empty(len(equity_balances) + 1)
+            equity_values[0] = initial_balance
+            equity_values[1:] = equity_balances
             
-            # Calculate returns for Sharpe ratio
-            returns = []
-            for i in range(1, len(equity_values)):
-                ret = (equity_values[i] - equity_values[i-1]) / equity_values[i-1]
-                returns.append(ret)
+            # Maximum drawdown against the running peak, and returns for Sharpe ratio;
+            # a balance at or below zero yields 0 instead of inf/NaN
+            peaks = np.maximum.accumulate(equity_values)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                max_drawdown = float(np.where(peaks > 0, (peaks - equity_values) / peaks, 0.0).max() * 100)
+                returns = np.where(
+                    equity_values[:-1] > 0, np.diff(equity_values) / equity_values[:-1], 0.0
+                )
             
             # Sharpe ratio (simplified, assuming daily returns)
-            if returns and np.std(returns) > 0:
-                avg_return = np.mean(returns)
-                sharpe_ratio = avg_return / np.std(returns) * np.sqrt(252)  # Annualized
+            std = returns.std() if returns.size else 0
+            if std > 0:
+                sharpe_ratio = float(returns.mean() / std * np.sqrt(252))  # Annualized
             else:
                 sharpe_ratio = 0
             
             # Other metrics
-            trade_pnls = [trade['pnl'] for trade in trade_history]
-            winning_trades = [pnl for pnl in trade_pnls if pnl > 0]
-            losing_trades = [pnl for pnl in trade_pnls if pnl <= 0]
+            if pnls is None:
+                pnls = np.fromiter((trade['pnl'] for trade in trade_history), dtype=float, count=len(trade_history))
+            winning_trades = pnls[pnls > 0]
+            losing_trades = pnls[pnls <= 0]
             
-            average_trade = np.mean(trade_pnls) if trade_pnls else 0
+            average_trade = float(pnls.mean())
             
             # Profit factor
-            gross_profit = sum(winning_trades) if winning_trades else 0
-            gross_loss = abs(sum(losing_trades)) if losing_trades else 0
+            gross_profit = float(winning_trades.sum())
+            gross_loss = float(-losing_trades.sum())
             profit_factor = gross_profit / gross_loss if gross_loss > 0 else 0
             
             return {
@@ -344,8 +741,8 @@ class BacktestEngine:
                 'profit_factor': profit_factor,
                 'gross_profit': gross_profit,
                 'gross_loss': gross_loss,
-                'largest_win': max(winning_trades) if winning_trades else 0,
-                'largest_loss': min(losing_trades) if losing_trades else 0
+                'largest_win': float(winning_trades.max()) if winning_trades.size else 0,
+                'largest_loss': float(losing_trades.min()) if losing_trades.size else 0
             }
             
         except Exception as e:
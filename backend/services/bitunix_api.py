@@ -1,14 +1,46 @@
 import hashlib
 import hmac
+import threading
 import time
-import json
+import orjson
 import requests
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from typing import Dict, List, Optional, Tuple
 import logging
-from urllib.parse import urlencode
+import string
+from urllib.parse import quote_plus
 
 logger = logging.getLogger(__name__)
 
+# Exchange calls are round-trip bound; one shared pool overlaps independent ones,
+# such as a signal's DCA legs or the settings connection test
+REQUEST_WORKERS = 8
+request_pool = ThreadPoolExecutor(max_workers=REQUEST_WORKERS, thread_name_prefix='bitunix-api')
+
+# Identical GETs within this many seconds share one response; burst polling repeats them
+GET_CACHE_TTL = 0.5
+GET_CACHE_SIZE = 256
+
+# Signed method names, encoded once
+_METHOD_BYTES = {method: method.encode('ascii') for method in ('GET', 'POST', 'DELETE')}
+
+# Characters quote_plus leaves as-is; query parts made only of these skip quoting
+_QUERY_SAFE = frozenset(string.ascii_letters + string.digits + '_.-~')
+
+def _encode_params(params: Dict) -> str:
+    """Query string for signing and sending, keys sorted so the signature is order-independent."""
+    pairs = []
+    for key, value in sorted(params.items()):
+        key, value = str(key), str(value)
+        if not _QUERY_SAFE.issuperset(key):
+            key = quote_plus(key)
+        if not _QUERY_SAFE.issuperset(value):
+            value = quote_plus(value)
+        pairs.append(f"{key}={value}")
+    return '&'.join(pairs)
+
 class BitunixAPI:
     """
     Bitunix exchange API integration for futures trading.
@@ -20,6 +52,8 @@ class BitunixAPI:
         self.api_secret = api_secret
         self.api_passphrase = api_passphrase
         self.testnet = testnet
+        # Keyed HMAC state, copied per request instead of re-deriving the key pads
+        self._hmac_template = hmac.new(api_secret.encode('utf-8'), digestmod=hashlib.sha256)
         
         # Base URLs
         if testnet:
@@ -28,64 +62,93 @@ class BitunixAPI:
             self.base_url = "https://api.bitunix.com"
         
         self.session = requests.Session()
+        # Room for concurrent order placement on one set of keep-alive connections
+        self.session.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=20))
+        # Static auth headers; requests only add the signature and timestamp
         self.session.headers.update({
             'Content-Type': 'application/json',
             'BX-ACCESS-KEY': self.api_key,
+            'BX-ACCESS-PASSPHRASE': self.api_passphrase,
         })
+        
+        # Raw GET response bodies; orders and leverage changes make positions and orders
+        # stale, so every write bumps the generation and clears them
+        self._get_cache = OrderedDict()
+        self._get_cache_lock = threading.Lock()
+        self._get_cache_generation = 0
     
-    def _generate_signature(self, timestamp: str, method: str, request_path: str, body: str = '') -> str:
+    def _generate_signature(self, timestamp: str, method: str, request_path: str, body: bytes = b'') -> str:
         """Generate HMAC SHA256 signature for API authentication."""
-        message = timestamp + method + request_path + body
-        signature = hmac.new(
-            self.api_secret.encode('utf-8'),
-            message.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
-        return signature
+        # HMAC is incremental, so the message parts are fed in turn instead of joined first
+        signature = self._hmac_template.copy()
+        signature.update(timestamp.encode('ascii'))
+        signature.update(_METHOD_BYTES.get(method) or method.encode('utf-8'))
+        signature.update(request_path.encode('utf-8'))
+        # The serialized body is signed as sent, without a str round trip
+        signature.update(body)
+        return signature.hexdigest()
     
     def _make_request(self, method: str, endpoint: str, params: Dict = None, data: Dict = None) -> Dict:
         """Make authenticated API request to Bitunix."""
+        if method == 'GET':
+            cache_key = (endpoint, tuple(sorted(params.items())) if params else ())
+            with self._get_cache_lock:
+                entry = self._get_cache.get(cache_key)
+                generation = self._get_cache_generation
+            if entry is not None and entry[0] > time.monotonic():
+                # Decoded per hit, so callers never share a mutable response
+                return orjson.loads(entry[1])
+        
         try:
             timestamp = str(int(time.time() * 1000))
             request_path = endpoint
             
             # Prepare body
-            body = ''
+            body = b''
             if data:
-                body = json.dumps(data, separators=(',', ':'))
+                # orjson output is already compact UTF-8, as the signature expects
+                body = orjson.dumps(data)
             
             # Add query parameters to path if GET request
             if method == 'GET' and params:
-                query_string = urlencode(params)
+                query_string = _encode_params(params)
                 request_path += '?' + query_string
             
             # Generate signature
             signature = self._generate_signature(timestamp, method, request_path, body)
             
-            # Set headers
+            # Set per-request headers; the session carries the rest
             headers = {
-                'BX-ACCESS-KEY': self.api_key,
                 'BX-ACCESS-SIGN': signature,
-                'BX-ACCESS-TIMESTAMP': timestamp,
-                'BX-ACCESS-PASSPHRASE': self.api_passphrase,
-                'Content-Type': 'application/json'
+                'BX-ACCESS-TIMESTAMP': timestamp
             }
             
             # Make request
             url = self.base_url + endpoint
             
             if method == 'GET':
-                response = self.session.get(url, params=params, headers=headers)
-            elif method == 'POST':
-                response = self.session.post(url, data=body, headers=headers)
-            elif method == 'DELETE':
-                response = self.session.delete(url, data=body, headers=headers)
+                # Send the exact query string that was signed
+                response = self.session.get(self.base_url + request_path, headers=headers)
+            elif method in ('POST', 'DELETE'):
+                try:
+                    response = self.session.request(method, url, data=body, headers=headers)
+                finally:
+                    # Even a failed write may have reached the exchange
+                    self._invalidate_get_cache()
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
             # Handle response
             if response.status_code == 200:
-                return response.json()
+                result = orjson.loads(response.content)
+                if method == 'GET':
+                    with self._get_cache_lock:
+                        if generation == self._get_cache_generation:
+                            self._get_cache[cache_key] = (time.monotonic() + GET_CACHE_TTL, response.content)
+                            self._get_cache.move_to_end(cache_key)
+                            while len(self._get_cache) > GET_CACHE_SIZE:
+                                self._get_cache.popitem(last=False)
+                return result
             else:
                 error_msg = f"API request failed: {response.status_code} - {response.text}"
                 logger.error(error_msg)
@@ -95,6 +158,12 @@ class BitunixAPI:
             logger.error(f"API request error: {str(e)}")
             raise
     
+    def _invalidate_get_cache(self):
+        """Drop cached GETs after a write; the new generation keeps in-flight GETs from storing old state."""
+        with self._get_cache_lock:
+            self._get_cache_generation += 1
+            self._get_cache.clear()
+    
     def get_account_info(self) -> Dict:
         """Get account information and balances."""
         return self._make_request('GET', '/api/v1/account')
@@ -330,26 +399,16 @@ class BitunixTradeManager:
         entry_distribution = settings.get('entry_distribution', [40, 35, 25])
         entry_steps = min(len(entry_zones), len(entry_distribution))
         
-        orders = []
-        for i in range(entry_steps):
-            entry_price = entry_zones[i]
-            size_percentage = entry_distribution[i] / 100
-            order_size = total_size * size_percentage
-            
-            try:
-                order = self.api.place_order(
-                    symbol=symbol,
-                    side=side,
-                    order_type='limit',
-                    size=order_size,
-                    price=entry_price
-                )
-                orders.append(order)
-                logger.info(f"Entry order placed: {symbol} {side} {order_size} @ {entry_price}")
-            except Exception as e:
-                logger.error(f"Failed to place entry order: {str(e)}")
-        
-        return orders
+        return self._place_orders('Entry', [
+            {
+                'symbol': symbol,
+                'side': side,
+                'order_type': 'limit',
+                'size': total_size * entry_distribution[i] / 100,
+                'price': entry_zones[i]
+            }
+            for i in range(entry_steps)
+        ])
     
     def _place_target_orders(self, symbol: str, position_type: str,
                            targets: List[float], total_size: float,
@@ -362,27 +421,31 @@ class BitunixTradeManager:
         target_distribution = settings.get('target_distribution', [50, 30, 20])
         target_steps = min(len(targets), len(target_distribution))
         
-        orders = []
-        for i in range(target_steps):
-            target_price = targets[i]
-            size_percentage = target_distribution[i] / 100
-            order_size = total_size * size_percentage
-            
+        return self._place_orders('Target', [
+            {
+                'symbol': symbol,
+                'side': side,
+                'order_type': 'limit',
+                'size': total_size * target_distribution[i] / 100,
+                'price': targets[i],
+                'reduce_only': True
+            }
+            for i in range(target_steps)
+        ])
+    
+    def _place_orders(self, kind: str, orders: List[Dict]) -> List[Dict]:
+        """Place several orders concurrently; returns the ones placed, in request order."""
+        futures = [request_pool.submit(self.api.place_order, **order) for order in orders]
+        
+        placed = []
+        for order, future in zip(orders, futures):
             try:
-                order = self.api.place_order(
-                    symbol=symbol,
-                    side=side,
-                    order_type='limit',
-                    size=order_size,
-                    price=target_price,
-                    reduce_only=True
-                )
-                orders.append(order)
-                logger.info(f"Target order placed: {symbol} {side} {order_size} @ {target_price}")
+                placed.append(future.result())
+                logger.info(f"{kind} order placed: {order['symbol']} {order['side']} {order['size']} @ {order['price']}")
             except Exception as e:
-                logger.error(f"Failed to place target order: {str(e)}")
+                logger.error(f"Failed to place {kind.lower()} order: {str(e)}")
         
-        return orders
+        return placed
     
     def _place_stop_loss_order(self, symbol: str, position_type: str,
                              stop_loss: float, total_size: float) -> Optional[Dict]:
@@ -412,20 +475,38 @@ class BitunixTradeManager:
         try:
             positions = self.api.get_positions(symbol)
             if positions:
-                position = positions[0]
-                return {
-                    'symbol': position.get('symbol'),
-                    'side': position.get('side'),
-                    'size': float(position.get('size', 0)),
-                    'entry_price': float(position.get('avgPrice', 0)),
-                    'mark_price': float(position.get('markPrice', 0)),
-                    'pnl': float(position.get('unrealizedPnl', 0)),
-                    'pnl_percentage': float(position.get('unrealizedPnlPcnt', 0)) * 100,
-                    'margin': float(position.get('positionMargin', 0)),
-                    'leverage': int(position.get('leverage', 1))
-                }
+                return self._position_summary(positions[0])
             else:
                 return {'symbol': symbol, 'status': 'no_position'}
         except Exception as e:
             logger.error(f"Error monitoring position: {str(e)}")
-            return {'error': str(e)}
\ No newline at end of file
+            return {'error': str(e)}
+    
+    def monitor_positions(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Monitor several positions with a single exchange call, keyed by symbol."""
+        try:
+            positions = {}
+            for position in self.api.get_positions():
+                positions.setdefault(position.get('symbol'), position)
+            return {
+                symbol: self._position_summary(positions[symbol]) if symbol in positions
+                else {'symbol': symbol, 'status': 'no_position'}
+                for symbol in symbols
+            }
+        except Exception as e:
+            logger.error(f"Error monitoring positions: {str(e)}")
+            return {symbol: {'error': str(e)} for symbol in symbols}
+    
+    def _position_summary(self, position: Dict) -> Dict:
+        """Normalize an exchange position record."""
+        return {
+            'symbol': position.get('symbol'),
+            'side': position.get('side'),
+            'size': float(position.get('size', 0)),
+            'entry_price': float(position.get('avgPrice', 0)),
+            'mark_price': float(position.get('markPrice', 0)),
+            'pnl': float(position.get('unrealizedPnl', 0)),
+            'pnl_percentage': float(position.get('unrealizedPnlPcnt', 0)) * 100,
+            'margin': float(position.get('positionMargin', 0)),
+            'leverage': int(position.get('leverage', 1))
+        }
\ No newline at end of file
@@ -1,66 +1,130 @@
 import re
+import functools
 import json
 import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Distinct raw messages whose parse results are kept; forwards and replays repeat text
+PARSE_CACHE_SIZE = 4096
+
+# Batches at least this large are split across worker processes; regex holds the GIL
+PARALLEL_MIN_BATCH = 64
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Lazily start the shared parse pool; spawn avoids forking a threaded worker."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+def _parse_chunk(texts: List[str]) -> List[Dict]:
+    """Parse a slice of a batch inside a pool worker."""
+    parser = TelegramSignalParser()
+    return [parser.parse_signal(text) for text in texts]
+
+class _CleanTable(dict):
+    """str.translate table turning characters a pattern matches into spaces, filled per code point on first use."""
+    
+    def __init__(self, pattern: re.Pattern):
+        super().__init__()
+        self.pattern = pattern
+    
+    def __missing__(self, codepoint: int):
+        value = ' ' if self.pattern.match(chr(codepoint)) else codepoint
+        self[codepoint] = value
+        return value
+
 class TelegramSignalParser:
     """
     Robust parser for Telegram trading signals with multiple format support.
     Handles various signal providers and formats with intelligent pattern matching.
     """
     
+    # Common patterns for different signal elements, compiled once
+    # Matched against cleaned text, which is upper case, so no IGNORECASE is needed
+    COIN_PATTERNS = [re.compile(p) for p in (
+        r'#([A-Z]{3,6})/USDT',
+        r'#([A-Z]{3,6})USDT',
+        r'#([A-Z]{3,6})',
+        r'\$([A-Z]{3,6})',
+        r'([A-Z]{3,6})/USDT',
+        r'([A-Z]{3,6})USDT',
+        r'COIN[:\s]*([A-Z]{3,6})',
+        r'SYMBOL[:\s]*([A-Z]{3,6})',
+    )]
+    
+    POSITION_PATTERNS = [re.compile(p) for p in (
+        r'(?:POSITION|DIRECTION|TYPE)[:\s]*(LONG|SHORT)',
+        r'(LONG|SHORT)(?:\s+POSITION)?',
+        r'#(LONG|SHORT)',
+        r'📈\s*(LONG)',
+        r'📉\s*(SHORT)',
+    )]
+    
+    LEVERAGE_PATTERNS = [re.compile(p) for p in (
+        r'LEVERAGE[:\s]*(\d+)X?',
+        r'CROSS[:\s]*(\d+)X?',
+        r'(\d+)X\s*CROSS',
+        r'(\d+)X\s*LEVERAGE',
+        r'LEV[:\s]*(\d+)',
+    )]
+    
+    ENTRY_PATTERNS = [re.compile(p) for p in (
+        r'ENTRY[:\s]*([0-9,.]+(?:\s*-\s*[0-9,.]+)?)',
+        r'ENTRY ZONE[:\s]*([0-9,.]+(?:\s*-\s*[0-9,.]+)?)',
+        r'BUY[:\s]*([0-9,.]+(?:\s*-\s*[0-9,.]+)?)',
+        r'ENTER[:\s]*([0-9,.]+(?:\s*-\s*[0-9,.]+)?)',
+        r'PRICE[:\s]*([0-9,.]+(?:\s*-\s*[0-9,.]+)?)',
+    )]
+    
+    TARGET_PATTERNS = [re.compile(p) for p in (
+        r'TARGET[S]?[:\s]*([0-9,.\s-]+)',
+        r'TP[S]?[:\s]*([0-9,.\s-]+)',
+        r'TAKE PROFIT[S]?[:\s]*([0-9,.\s-]+)',
+        r'SELL[:\s]*([0-9,.\s-]+)',
+    )]
+    
+    STOPLOSS_PATTERNS = [re.compile(p) for p in (
+        r'STOP LOSS[:\s]*([0-9,.]+)',
+        r'SL[:\s]*([0-9,.]+)',
+        r'STOP[:\s]*([0-9,.]+)',
+        r'LOSS[:\s]*([0-9,.]+)',
+    )]
+    
+    # Each list's patterns all contain one of these literals; when the cleaned (upper-case)
+    # text has none of them, a substring test skips the whole list without a regex pass
+    COIN_KEYWORDS = ('#', '$', 'USDT', 'COIN', 'SYMBOL')
+    POSITION_KEYWORDS = ('LONG', 'SHORT')
+    LEVERAGE_KEYWORDS = ('LEV', 'CROSS')
+    ENTRY_KEYWORDS = ('ENTRY', 'ENTER', 'BUY', 'PRICE')
+    TARGET_KEYWORDS = ('TARGET', 'TP', 'TAKE PROFIT', 'SELL')
+    STOPLOSS_KEYWORDS = ('STOP', 'SL', 'LOSS')
+    
+    CLEAN_SYMBOLS = re.compile(r'[^\w\s#$/.:-]')
+    # Same replacement as CLEAN_SYMBOLS.sub(' ', text), done by str.translate
+    CLEAN_TABLE = _CleanTable(CLEAN_SYMBOLS)
+    PRICE_NUMBER = re.compile(r'\b\d+\.?\d*\b')
+    TARGET_NUMBER = re.compile(r'\d+\.?\d*')
+    # 'Cross Leverage' and 'Cross Margin' both contain it, so one keyword covers all three
+    CROSS_KEYWORD = 'CROSS'
+    
     def __init__(self):
-        # Common patterns for different signal elements
-        self.coin_patterns = [
-            r'#([A-Z]{3,6})/USDT',
-            r'#([A-Z]{3,6})USDT',
-            r'#([A-Z]{3,6})',
-            r'\$([A-Z]{3,6})',
-            r'([A-Z]{3,6})/USDT',
-            r'([A-Z]{3,6})USDT',
-            r'Coin[:\s]*([A-Z]{3,6})',
-            r'Symbol[:\s]*([A-Z]{3,6})',
-        ]
-        
-        self.position_patterns = [
-            r'(?:Position|Direction|Type)[:\s]*(LONG|SHORT)',
-            r'(LONG|SHORT)(?:\s+Position)?',
-            r'#(LONG|SHORT)',
-            r'📈\s*(LONG)',
-            r'📉\s*(SHORT)',
-        ]
-        
-        self.leverage_patterns = [
-            r'Leverage[:\s]*(\d+)x?',
-            r'Cross[:\s]*(\d+)x?',
-            r'(\d+)x\s*Cross',
-            r'(\d+)x\s*Leverage',
-            r'Lev[:\s]*(\d+)',
-        ]
-        
-        self.entry_patterns = [
-            r'Entry[:\s]*([0-9,.]+(?:\s*-\s*[0-9,.]+)?)',
-            r'Entry Zone[:\s]*([0-9,.]+(?:\s*-\s*[0-9,.]+)?)',
-            r'Buy[:\s]*([0-9,.]+(?:\s*-\s*[0-9,.]+)?)',
-            r'Enter[:\s]*([0-9,.]+(?:\s*-\s*[0-9,.]+)?)',
-            r'Price[:\s]*([0-9,.]+(?:\s*-\s*[0-9,.]+)?)',
-        ]
-        
-        self.target_patterns = [
-            r'Target[s]?[:\s]*([0-9,.\s-]+)',
-            r'TP[s]?[:\s]*([0-9,.\s-]+)',
-            r'Take Profit[s]?[:\s]*([0-9,.\s-]+)',
-            r'Sell[:\s]*([0-9,.\s-]+)',
-        ]
-        
-        self.stoploss_patterns = [
-            r'Stop Loss[:\s]*([0-9,.]+)',
-            r'SL[:\s]*([0-9,.]+)',
-            r'Stop[:\s]*([0-9,.]+)',
-            r'Loss[:\s]*([0-9,.]+)',
-        ]
+        self.coin_patterns = self.COIN_PATTERNS
+        self.position_patterns = self.POSITION_PATTERNS
+        self.leverage_patterns = self.LEVERAGE_PATTERNS
+        self.entry_patterns = self.ENTRY_PATTERNS
+        self.target_patterns = self.TARGET_PATTERNS
+        self.stoploss_patterns = self.STOPLOSS_PATTERNS
     
     def parse_signal(self, text: str) -> Dict:
         """
@@ -72,6 +136,18 @@ class TelegramSignalParser:
         Returns:
             Dict: Parsed signal data with extracted fields
         """
+        if not isinstance(text, str):
+            # Unhashable input cannot be a cache key; the uncached path reports the error
+            return self._parse_signal(text)
+        result = _parse_cached(text)
+        # Callers own their result, so the cached lists are copied out
+        return {
+            key: list(value) if isinstance(value, list) else value
+            for key, value in result.items()
+        }
+    
+    def _parse_signal(self, text: str) -> Dict:
+        """Uncached parse_signal."""
         try:
             # Clean and normalize text
             cleaned_text = self._clean_text(text)
@@ -118,34 +194,42 @@ class TelegramSignalParser:
     def _clean_text(self, text: str) -> str:
         """Clean and normalize signal text."""
         # Remove emojis but keep important trading symbols
-        text = re.sub(r'[^\w\s#$/.:-]', ' ', text)
-        # Normalize whitespace
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip().upper()
+        text = text.translate(self.CLEAN_TABLE)
+        # Normalize whitespace; split() breaks on the same characters as \s
+        return ' '.join(text.split()).upper()
+    
+    @staticmethod
+    def _mentions(text: str, keywords: Tuple[str, ...]) -> bool:
+        """Whether any of a pattern list's keywords occurs in the text."""
+        return any(keyword in text for keyword in keywords)
     
     def _extract_coin(self, text: str) -> Optional[str]:
         """Extract coin symbol from text."""
+        if not self._mentions(text, self.COIN_KEYWORDS):
+            return None
         for pattern in self.coin_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+            match = pattern.search(text)
             if match:
-                coin = match.group(1).upper()
-                # Validate coin format (3-6 characters, alphabetic)
-                if 3 <= len(coin) <= 6 and coin.isalpha():
-                    return coin
+                # [A-Z]{3,6} without IGNORECASE already guarantees 3-6 upper-case letters
+                return match.group(1)
         return None
     
     def _extract_position_type(self, text: str) -> Optional[str]:
         """Extract position type (LONG/SHORT) from text."""
+        if not self._mentions(text, self.POSITION_KEYWORDS):
+            return None
         for pattern in self.position_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+            match = pattern.search(text)
             if match:
                 return match.group(1).upper()
         return None
     
     def _extract_leverage(self, text: str) -> int:
         """Extract leverage from text, default to 1."""
+        if not self._mentions(text, self.LEVERAGE_KEYWORDS):
+            return 1
         for pattern in self.leverage_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+            match = pattern.search(text)
             if match:
                 try:
                     leverage = int(match.group(1))
@@ -158,8 +242,9 @@ class TelegramSignalParser:
         """Extract entry zones from text."""
         entries = []
         
-        for pattern in self.entry_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
+        patterns = self.entry_patterns if self._mentions(text, self.ENTRY_KEYWORDS) else ()
+        for pattern in patterns:
+            matches = pattern.findall(text)
             for match in matches:
                 # Handle ranges (e.g., "0.5-0.6" or "0.5 - 0.6")
                 if '-' in match:
@@ -182,47 +267,44 @@ class TelegramSignalParser:
                         continue
         
         # Remove duplicates and sort
-        entries = sorted(list(set(entries)))
+        entries = sorted(set(entries))
         
-        # If no entries found, try to extract numbers from the text
+        # If no entries found, try to extract numbers from the text;
+        # PRICE_NUMBER only matches digits with one optional point, so float() cannot fail
         if not entries:
-            numbers = re.findall(r'\b\d+\.?\d*\b', text)
-            for num in numbers:
-                try:
-                    val = float(num)
-                    if 0.000001 < val < 1000000:  # Reasonable price range
-                        entries.append(val)
-                except ValueError:
-                    continue
+            entries = [
+                val for val in map(float, self.PRICE_NUMBER.findall(text))
+                if 0.000001 < val < 1000000  # Reasonable price range
+            ]
         
         return entries[:5]  # Limit to 5 entries max
     
     def _extract_targets(self, text: str) -> List[float]:
         """Extract target prices from text."""
+        if not self._mentions(text, self.TARGET_KEYWORDS):
+            return []
         targets = []
         
         for pattern in self.target_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+            match = pattern.search(text)
             if match:
                 target_text = match.group(1)
-                # Extract all numbers from targets
-                numbers = re.findall(r'\d+\.?\d*', target_text)
-                for num in numbers:
-                    try:
-                        target = float(num)
-                        if target > 0:
-                            targets.append(target)
-                    except ValueError:
-                        continue
+                # Extract all numbers from targets; TARGET_NUMBER matches always parse
+                targets.extend(
+                    target for target in map(float, self.TARGET_NUMBER.findall(target_text))
+                    if target > 0
+                )
         
         # Remove duplicates and sort
-        targets = sorted(list(set(targets)))
+        targets = sorted(set(targets))
         return targets[:5]  # Limit to 5 targets max
     
     def _extract_stop_loss(self, text: str) -> Optional[float]:
         """Extract stop loss price from text."""
+        if not self._mentions(text, self.STOPLOSS_KEYWORDS):
+            return None
         for pattern in self.stoploss_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+            match = pattern.search(text)
             if match:
                 try:
                     sl = float(match.group(1).replace(',', ''))
@@ -232,17 +314,8 @@ class TelegramSignalParser:
         return None
     
     def _detect_cross_leverage(self, text: str) -> bool:
-        """Detect if cross leverage is mentioned."""
-        cross_patterns = [
-            r'CROSS',
-            r'Cross Leverage',
-            r'Cross Margin',
-        ]
-        
-        for pattern in cross_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                return True
-        return False
+        """Detect if cross leverage is mentioned in cleaned (already upper-case) text."""
+        return self.CROSS_KEYWORD in text
     
     def _validate_signal(self, coin: str, position_type: str, entry_zones: List[float]) -> List[str]:
         """Validate parsed signal and return list of errors."""
@@ -261,10 +334,18 @@ class TelegramSignalParser:
     
     def batch_parse_signals(self, signals: List[str]) -> List[Dict]:
         """Parse multiple signals in batch."""
-        results = []
-        for signal_text in signals:
-            result = self.parse_signal(signal_text)
-            results.append(result)
+        results = None
+        if len(signals) >= PARALLEL_MIN_BATCH:
+            # A few chunks per core keeps workers busy without pickling per message
+            size = max(len(signals) // (4 * (os.cpu_count() or 1)), 16)
+            chunks = [signals[i:i + size] for i in range(0, len(signals), size)]
+            try:
+                results = [result for chunk in _get_pool().map(_parse_chunk, chunks) for result in chunk]
+            except Exception as e:
+                logger.warning(f"Parallel batch parse failed, parsing serially: {str(e)}")
+        
+        if results is None:
+            results = [self.parse_signal(signal_text) for signal_text in signals]
         
         logger.info(f"Batch parsed {len(signals)} signals, {sum(1 for r in results if r['parsed_successfully'])} successful")
         return results
@@ -272,15 +353,15 @@ class TelegramSignalParser:
     def get_parsing_stats(self, results: List[Dict]) -> Dict:
         """Get statistics about parsing results."""
         total = len(results)
-        successful = sum(1 for r in results if r.get('parsed_successfully', False))
-        failed = total - successful
+        failed = 0
         
         error_types = {}
         for result in results:
             if not result.get('parsed_successfully', False):
-                errors = result.get('parse_errors', [])
-                for error in errors:
+                failed += 1
+                for error in result.get('parse_errors', []):
                     error_types[error] = error_types.get(error, 0) + 1
+        successful = total - failed
         
         return {
             'total_signals': total,
@@ -288,4 +369,11 @@ class TelegramSignalParser:
             'failed_parses': failed,
             'success_rate': (successful / total * 100) if total > 0 else 0,
             'common_errors': error_types
-        }
\ No newline at end of file
+        }
+
+_default_parser = TelegramSignalParser()
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_cached(text: str) -> Dict:
+    """Parse a raw message once; patterns are class-level, so any parser gives the same result."""
+    return _default_parser._parse_signal(text)
@@ -12,6 +12,7 @@ import { tradeAPI } from '../services/api';
 
 const Trades = () => {
   const [trades, setTrades] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [activeTab, setActiveTab] = useState('active');
 
@@ -31,6 +32,7 @@ const Trades = () => {
       }
       
       setTrades(response.data.trades || []);
+      setNextCursor(response.data.next_cursor || null);
     } catch (error) {
       console.error('Error loading trades:', error);
       toast.error('Failed to load trades');
@@ -39,6 +41,17 @@ const Trades = () => {
     }
   };
 
+  const loadMoreTrades = async () => {
+    try {
+      const response = await tradeAPI.getTradeHistory(30, nextCursor);
+      setTrades((current) => [...current, ...(response.data.trades || [])]);
+      setNextCursor(response.data.next_cursor || null);
+    } catch (error) {
+      console.error('Error loading more trades:', error);
+      toast.error('Failed to load more trades');
+    }
+  };
+
   const closeTrade = async (tradeId) => {
     if (!window.confirm('Are you sure you want to close this trade?')) return;
     
@@ -197,6 +210,13 @@ const Trades = () => {
                 ))}
               </tbody>
             </table>
+            {nextCursor && (
+              <div className="p-4 text-center">
+                <button onClick={loadMoreTrades} className="btn-secondary">
+                  Load more
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
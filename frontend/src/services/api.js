@@ -66,7 +66,7 @@ export const tradeAPI = {
   updateTradeStatus: (id) => api.post(`/trades/${id}/update`),
   closeTrade: (id) => api.post(`/trades/${id}/close`),
   getActiveTrades: () => api.get('/trades/active'),
-  getTradeHistory: (days = 30) => api.get('/trades/history', { params: { days } }),
+  getTradeHistory: (days = 30, cursor) => api.get('/trades/history', { params: { days, cursor } }),
   getTradeStats: () => api.get('/trades/stats'),
 };
 
@@ -86,10 +86,12 @@ export const settingsAPI = {
 export const backtestAPI = {
   getBacktests: (params = {}) => api.get('/backtest', { params }),
   getBacktest: (id) => api.get(`/backtest/${id}`),
+  getEquityCurve: (id) => api.get(`/backtest/${id}/equity_curve.bin`, { responseType: 'arraybuffer' }),
   createBacktest: (data) => api.post('/backtest/create', data),
   runBacktest: (id) => api.post(`/backtest/${id}/run`),
   deleteBacktest: (id) => api.delete(`/backtest/${id}`),
   compareBacktests: (backtestIds) => api.post('/backtest/compare', { backtest_ids: backtestIds }),
+  sweepBacktest: (backtestId, paramGrid) => api.post('/backtest/sweep', { backtest_id: backtestId, param_grid: paramGrid }),
   getTemplateSignals: () => api.get('/backtest/template'),
   getBacktestStats: () => api.get('/backtest/stats'),
 };